@@ -0,0 +1,58 @@
+import os  # 서비스 모듈 경로 계산용
+import sys  # analyzer_worker 모듈 import 경로 추가용
+import time  # 처리 시간 측정용
+import random  # 문장 샘플링용
+import argparse  # 실행 옵션 파싱
+
+# analyzer_worker 디렉토리를 import 경로에 추가 (서비스별 단일 모듈 구조)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "analyzer_worker"))
+
+# 라이브 세션에서 자주 나오는 길이 분포를 흉내낸 샘플 문장
+SAMPLES = [
+    "yes",
+    "thank you so much",
+    "I really enjoyed the presentation today",
+    "this is not what I expected at all and I am quite disappointed",
+    "the studio arrived late but the sound quality was great",
+    "could you please repeat the last part of the question",
+    "honestly the whole experience was frustrating from start to finish because nobody answered",
+    "great",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="analyzer_worker 단건 vs 배치 분류 처리량 비교")
+    parser.add_argument("--sentences", type=int, default=512, help="측정에 사용할 문장 수")
+    parser.add_argument("--batch-size", type=int, default=32, help="배치 모드 한 번에 분류할 문장 수")
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op 스레드 수 (코어당 처리량 측정 시 1)")
+    args = parser.parse_args()
+
+    import torch
+    torch.set_num_threads(args.threads)
+    os.environ.setdefault("ONNX_INTRA_OP_THREADS", str(args.threads))
+    from sentiment_backend import load_backend
+    backend = load_backend()  # ANALYZER_BACKEND 환경변수로 torch / onnx 선택
+
+    random.seed(0)
+    texts = [random.choice(SAMPLES) for _ in range(args.sentences)]
+    backend.classify_batch(texts[:8])  # 워밍업
+
+    started = time.perf_counter()
+    for text in texts:
+        backend.classify(text)
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(0, len(texts), args.batch_size):
+        backend.classify_batch(texts[i:i + args.batch_size])
+    batched = time.perf_counter() - started
+
+    print(f"백엔드: {backend.name}, 문장 수: {len(texts)}, 스레드: {args.threads}")
+    print(f"단건          : {len(texts) / single:8.1f} sentences/s ({len(texts) / single / args.threads:.1f}/core)")
+    print(f"배치 (size={args.batch_size}): {len(texts) / batched:8.1f} sentences/s "
+          f"({len(texts) / batched / args.threads:.1f}/core)")
+    print(f"속도 향상: x{single / batched:.2f}")
+
+
+if __name__ == "__main__":
+    main()
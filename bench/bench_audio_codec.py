@@ -0,0 +1,97 @@
+import os  # 서비스 모듈 경로 계산용
+import sys  # fastapi_service 모듈 import 경로 추가
+import math  # 합성 음성 파형
+import time  # 디코딩 CPU 시간 측정
+import struct  # 클라이언트 프레이밍 재현
+import asyncio  # decode_chunk (스레드 풀 경로) 측정
+import argparse  # 실행 옵션 파싱
+
+# fastapi_service 디렉토리를 import 경로에 추가 (audio_codec 재사용)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "fastapi_service"))
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = SAMPLE_RATE * 20 // 1000  # 브라우저 AudioEncoder 설정과 같은 20ms 프레임
+SEND_INTERVAL_FRAMES = 25  # 0.5초마다 한 메시지로 전송
+
+
+def synth_pcm(seconds: float) -> bytes:
+    # 말소리 비슷한 신호: 기본 주파수가 흔들리는 배음 + 음절 단위 진폭 변화 (완전 무음/난수보다 현실적인 비트레이트)
+    samples = []
+    for i in range(int(seconds * SAMPLE_RATE)):
+        t = i / SAMPLE_RATE
+        f0 = 140 + 30 * math.sin(2 * math.pi * 0.7 * t)
+        envelope = max(0.0, math.sin(2 * math.pi * 3 * t))
+        value = sum(math.sin(2 * math.pi * f0 * k * t) / k for k in range(1, 6)) * envelope
+        samples.append(int(max(-1.0, min(1.0, value * 0.3)) * 32767))
+    return struct.pack(f"<{len(samples)}h", *samples)
+
+
+def encode_messages(pcm: bytes, bitrate: int) -> list:
+    # 클라이언트와 같은 형식: 20ms opus 패킷을 [uint16 LE 길이][패킷]으로 이어붙여 0.5초 단위 메시지로 묶음
+    import opuslib
+    encoder = opuslib.Encoder(SAMPLE_RATE, 1, opuslib.APPLICATION_VOIP)
+    encoder.bitrate = bitrate
+    frame_bytes = FRAME_SAMPLES * 2
+    messages, current = [], []
+    for offset in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+        packet = encoder.encode(pcm[offset:offset + frame_bytes], FRAME_SAMPLES)
+        current.append(struct.pack("<H", len(packet)) + packet)
+        if len(current) == SEND_INTERVAL_FRAMES:
+            messages.append(b"".join(current))
+            current = []
+    if current:
+        messages.append(b"".join(current))
+    return messages
+
+
+def decode_cost(messages: list) -> tuple:
+    # 연결 하나의 디코더로 전체 스트림 디코딩: (디코딩된 PCM 바이트, 스레드 CPU 초)
+    from audio_codec import OpusStreamDecoder
+    decoder = OpusStreamDecoder()
+    started = time.thread_time()
+    decoded = sum(len(decoder.decode(message)) for message in messages)
+    return decoded, time.thread_time() - started
+
+
+async def pool_throughput(messages: list, streams: int) -> float:
+    # streams개 연결이 동시에 decode_chunk를 호출할 때 벽시계 시간 (스레드 풀 + 대기 상한 경로)
+    from audio_codec import OpusStreamDecoder, decode_chunk
+    decoders = [OpusStreamDecoder() for _ in range(streams)]
+
+    async def run(decoder):
+        for message in messages:
+            await decode_chunk(decoder, message)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(decoder) for decoder in decoders))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오디오 업링크 pcm vs opus 대역폭/디코딩 비용 비교")
+    parser.add_argument("--seconds", type=float, default=10.0, help="합성 음성 길이")
+    parser.add_argument("--bitrate", type=int, default=24000, help="opus 비트레이트 (브라우저 설정과 동일)")
+    parser.add_argument("--streams", type=int, default=32, help="동시 디코딩 연결 수 (스레드 풀 측정)")
+    args = parser.parse_args()
+
+    pcm = synth_pcm(args.seconds)
+    messages = encode_messages(pcm, args.bitrate)
+    opus_bytes = sum(len(message) for message in messages)
+    print(f"{'codec':<8}{'bytes/s':>12}{'kbit/s':>10}")
+    print(f"{'pcm':<8}{len(pcm) / args.seconds:>12.0f}{len(pcm) * 8 / args.seconds / 1000:>10.1f}")
+    print(f"{'opus':<8}{opus_bytes / args.seconds:>12.0f}{opus_bytes * 8 / args.seconds / 1000:>10.1f}"
+          f"   ({len(pcm) / opus_bytes:.1f}x 감소)")
+
+    decoded, cpu = decode_cost(messages)
+    core_share = cpu / args.seconds
+    print(f"\n디코딩: {args.seconds:.0f}s 오디오 → CPU {cpu * 1000:.1f}ms "
+          f"(스트림당 코어의 {core_share * 100:.2f}%, 코어당 약 {1 / core_share:.0f} 스트림)")
+    print(f"디코딩 결과 {decoded} bytes (원본 {len(pcm)} bytes)")
+
+    wall = asyncio.run(pool_throughput(messages, args.streams))
+    print(f"\n스레드 풀: {args.streams} 스트림 x {args.seconds:.0f}s 디코딩 벽시계 {wall * 1000:.0f}ms "
+          f"(실시간 대비 {args.streams * args.seconds / wall:.0f}배)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os  # 서비스 모듈 경로 계산용
+import sys  # fastapi_service 모듈 import 경로 추가
+import time  # 직렬화 시간 측정
+import argparse  # 실행 옵션 파싱
+
+# fastapi_service 디렉토리를 import 경로에 추가 (AudioStore 재사용)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "fastapi_service"))
+
+BENCH_QUEUE = "bench_audio_queue"  # 실제 stt_queue를 건드리지 않도록 별도 큐 사용
+
+
+def serialization_cost(payload, iterations: int) -> tuple:
+    # Celery(kombu json) 메시지 본문 직렬화/역직렬화 시간과 크기
+    from kombu.serialization import dumps, loads
+    body = ((payload,), {}, {"callbacks": None, "errbacks": None, "chain": None, "chord": None})
+    started = time.perf_counter()
+    for _ in range(iterations):
+        content_type, encoding, data = dumps(body, serializer="json")
+    encode = (time.perf_counter() - started) / iterations
+    started = time.perf_counter()
+    for _ in range(iterations):
+        loads(data, content_type, encoding)
+    decode = (time.perf_counter() - started) / iterations
+    return len(data), encode, decode
+
+
+def broker_memory(redis_url: str, transport: str, chunk: bytes, count: int) -> tuple:
+    # 청크 count개를 큐에 쌓았을 때 Redis used_memory 증가량 (blob 포함) 과 fastapi 측 전송 시간
+    import redis
+    from celery import Celery
+    from audio_store import AudioStore
+
+    client = redis.Redis.from_url(redis_url)
+    app = Celery("bench", broker=redis_url)
+    store = AudioStore(redis_url, transport=transport)
+    client.delete(BENCH_QUEUE)
+    before = client.info("memory")["used_memory"]
+    refs = []
+    started = time.perf_counter()
+    for _ in range(count):
+        ref = store.put(chunk)
+        refs.append(ref)
+        app.send_task("stt_worker.transcribe_audio", args=[ref], queue=BENCH_QUEUE)
+    send_seconds = (time.perf_counter() - started) / count
+    used = client.info("memory")["used_memory"] - before
+    # 정리: 벤치 큐와 blob 삭제
+    client.delete(BENCH_QUEUE)
+    for ref in refs:
+        if isinstance(ref, str) and ref.startswith("redis:"):
+            client.delete(ref.partition(":")[2])
+        elif isinstance(ref, str) and ref.startswith("shm:"):
+            os.remove(ref.partition(":")[2])
+    return used, send_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오디오 페이로드 전송 방식(inline/redis/shm) 비교")
+    parser.add_argument("--seconds", type=float, default=3.0, help="청크 길이 (16kHz int16)")
+    parser.add_argument("--iterations", type=int, default=200, help="직렬화 측정 반복 횟수")
+    parser.add_argument("--count", type=int, default=200, help="브로커 메모리 측정 시 쌓을 청크 수")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL"), help="지정 시 실제 Redis 메모리/전송 시간 측정")
+    args = parser.parse_args()
+
+    chunk = os.urandom(int(args.seconds * 16000) * 2)
+    print(f"청크 크기: {len(chunk) / 1024:.0f}KB ({args.seconds}s PCM)")
+    print(f"{'payload':<10}{'msg size':>12}{'encode(ms)':>12}{'decode(ms)':>12}")
+    for name, payload in (("inline", chunk), ("ref", "redis:audio:0123456789abcdef0123456789abcdef")):
+        size, encode, decode = serialization_cost(payload, args.iterations)
+        print(f"{name:<10}{size / 1024:>10.1f}KB{encode * 1000:>12.3f}{decode * 1000:>12.3f}")
+
+    if not args.redis_url:
+        print("--redis-url 미지정: 브로커 메모리 측정 생략")
+        return
+    print(f"\n{'transport':<10}{'redis mem/chunk':>18}{'send(ms)':>10}")
+    for transport in ("inline", "redis"):
+        used, send_seconds = broker_memory(args.redis_url, transport, chunk, args.count)
+        print(f"{transport:<10}{used / args.count / 1024:>16.1f}KB{send_seconds * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
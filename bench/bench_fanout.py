@@ -0,0 +1,110 @@
+import os  # 서비스 모듈 경로 계산용
+import sys  # fastapi_service 모듈 import 경로 추가
+import time  # 전달 지연 측정
+import random  # 클라이언트별 전송 지연 분포
+import asyncio  # 가상 WebSocket 클라이언트
+import argparse  # 실행 옵션 파싱
+
+# fastapi_service 디렉토리를 import 경로에 추가 (BroadcastHub 재사용)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "fastapi_service"))
+
+
+class FakeWebSocket:  # send_text 지연만 흉내 내는 가상 브라우저 연결
+    def __init__(self, delay: float, stalled: bool):
+        self.delay = delay
+        self.stalled = stalled
+        self.latencies = []
+        self.sent_at = {}
+
+    async def send_text(self, message: str):
+        # 멈춘 브라우저는 TCP 버퍼가 가득 찬 것처럼 send가 끝나지 않음
+        await asyncio.sleep(3600 if self.stalled else self.delay)
+        self.latencies.append(time.perf_counter() - self.sent_at[message])
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def make_clients(count: int, stalled: int, delay_ms: float) -> list:
+    rng = random.Random(0)
+    return [FakeWebSocket(rng.uniform(0, delay_ms * 2) / 1000, i < stalled) for i in range(count)]
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float("nan")
+
+
+async def run_sequential(clients: list, messages: int, interval: float, timeout: float) -> float:
+    # 기존 redis_subscriber 방식: 한 코루틴에서 사용자마다 await send_text
+    async def deliver():
+        for i in range(messages):
+            message = f"msg-{i}"
+            for client in clients:
+                client.sent_at[message] = time.perf_counter()
+            for client in clients:
+                await client.send_text(message)
+            await asyncio.sleep(interval)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(deliver(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    return time.perf_counter() - started
+
+
+async def run_hub(clients: list, messages: int, interval: float, timeout: float) -> float:
+    # BroadcastHub: 연결별 큐 적재만 하고 writer 태스크가 동시에 전송
+    from broadcast import BroadcastHub
+
+    hub = BroadcastHub()
+    for client in clients:
+        hub.add(client)
+    started = time.perf_counter()
+    for i in range(messages):
+        message = f"msg-{i}"
+        for client in clients:
+            client.sent_at[message] = time.perf_counter()
+        hub.broadcast(message)
+        await asyncio.sleep(interval)
+    # 정상 클라이언트가 모든 메시지를 받을 때까지 대기
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        if all(len(c.latencies) >= messages for c in clients if not c.stalled):
+            break
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    for client in list(hub.connections):
+        await hub.remove(client)
+    return elapsed
+
+
+def report(name: str, clients: list, messages: int, elapsed: float):
+    healthy = [c for c in clients if not c.stalled]
+    latencies = [lat for c in healthy for lat in c.latencies]
+    delivered = len(latencies) / (len(healthy) * messages) * 100 if healthy else 0
+    print(f"{name:<12}{delivered:>9.1f}%{percentile(latencies, 0.5) * 1000:>10.1f}"
+          f"{percentile(latencies, 0.95) * 1000:>10.1f}{percentile(latencies, 0.99) * 1000:>10.1f}{elapsed:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="결과 fan-out: 순차 send vs BroadcastHub 전달 지연 비교")
+    parser.add_argument("--clients", type=int, default=1000, help="가상 WebSocket 클라이언트 수")
+    parser.add_argument("--stalled", type=int, default=5, help="send가 멈춘 클라이언트 수")
+    parser.add_argument("--messages", type=int, default=20, help="브로드캐스트할 메시지 수")
+    parser.add_argument("--interval", type=float, default=0.05, help="메시지 간격 (초)")
+    parser.add_argument("--delay-ms", type=float, default=1.0, help="정상 클라이언트 평균 send 지연")
+    parser.add_argument("--timeout", type=float, default=10.0, help="방식별 최대 측정 시간 (초)")
+    args = parser.parse_args()
+
+    print(f"클라이언트 {args.clients}개 (멈춤 {args.stalled}개), 메시지 {args.messages}개")
+    print(f"{'mode':<12}{'delivered':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'elapsed':>10}")
+    for name, runner in (("sequential", run_sequential), ("hub", run_hub)):
+        clients = make_clients(args.clients, args.stalled, args.delay_ms)
+        elapsed = asyncio.run(runner(clients, args.messages, args.interval, args.timeout))
+        report(name, clients, args.messages, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os  # 서비스 모듈 경로 계산용
+import sys  # stt_worker 모듈 import 경로 추가
+import time  # 처리 시간 측정
+import argparse  # 실행 옵션 파싱
+
+# stt_worker 디렉토리를 import 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "stt_worker"))
+from repetition_filter import RepetitionFilter  # noqa: E402
+# 회귀 코퍼스 / 기존 다중 정규식 구현은 pytest 테스트와 공유 (판정 일치 검사는 test_repetition_filter.py)
+from test_repetition_filter import CORPUS, fuzz_texts, legacy_is_repetitive  # noqa: E402
+
+
+def timed(fn, texts, repeat: int, rounds: int = 5) -> float:
+    # 여러 번 측정해 가장 빠른 값 사용 (다른 프로세스로 인한 잡음 제거)
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best / (repeat * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="반복 텍스트 필터 회귀 검사 + 마이크로벤치마크 (기존 vs 단일 패스)")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = RepetitionFilter()
+    failures = 0
+    for text, expected in CORPUS:
+        new, old = engine.is_repetitive(text), legacy_is_repetitive(text)
+        if new != expected or old != expected:
+            failures += 1
+            print(f"❌ {text!r}: 기대 {expected}, 단일 패스 {new}, 기존 {old}")
+    fuzz = fuzz_texts(5000)
+    for text in fuzz:
+        if engine.is_repetitive(text) != legacy_is_repetitive(text):
+            failures += 1
+            print(f"❌ {text!r}: 기존 구현과 판정 다름")
+    print(f"회귀 코퍼스 {len(CORPUS)}건 + 무작위 {len(fuzz)}건 중 불일치 {failures}건")
+
+    # 실제 STT 결과 길이(짧은 문장 ~ 긴 환각)를 섞어서 측정
+    short = [t for t, _ in CORPUS]
+    for label, texts in (("짧은 문장", short), ("긴 환각 포함", short + [" ".join(short)] * 2)):
+        old = timed(legacy_is_repetitive, texts, args.repeat)
+        new = timed(engine.is_repetitive, texts, args.repeat)
+        print(f"[{label}] 기존 다중 정규식 : {old * 1e6:8.2f} µs/문장")
+        print(f"[{label}] 단일 패스       : {new * 1e6:8.2f} µs/문장 (x{old / new:.2f})")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
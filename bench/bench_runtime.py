@@ -0,0 +1,127 @@
+import os  # 스레드 수 환경변수 / 서비스 모듈 경로
+import sys  # 서비스 모듈 import 경로 추가
+import json  # 결과 파일 저장
+import time  # 처리량 측정
+import argparse  # 실행 옵션 파싱
+import multiprocessing  # 워커 프로세스 흉내 (spawn: 자식마다 스레드 환경변수를 새로 적용)
+
+import numpy as np  # 3초 청크 오디오
+
+# (프로세스 수 × 프로세스당 스레드 수) 조합별 STT 처리량 측정 → worker_runtime.py(WORKER_RUNTIME=auto) 기본값 근거
+# 각 프로세스가 3초 청크를 쉬지 않고 디코딩할 때 오디오 초 / 벽시계 초, CPU 코어당 값을 비교
+#   python bench/bench_runtime.py                              # whisper 모델이 있으면 whisper, 없으면 torch 대용 부하
+#   python bench/bench_runtime.py --engine whisper --grid 1x4 2x2 4x1
+#   taskset -c 0-3 python bench/bench_runtime.py               # 4코어 파드 흉내 (cgroup 할당량 / affinity 기준)
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+STT_DIR = os.path.join(BENCH_DIR, "..", "services", "stt_worker")
+sys.path.insert(0, STT_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "services", "common"))
+from worker_runtime import cgroup_cpus, plan  # 실제 워커와 같은 CPU 할당량 계산
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 3.0
+
+
+class TorchProxyEngine:  # whisper 모델 없이 측정할 때: whisper base 인코더 크기의 트랜스포머 층을 청크마다 실행
+    def __init__(self, threads: int):
+        import torch
+        torch.set_num_threads(threads)
+        self.torch = torch
+        self.layer = torch.nn.TransformerEncoderLayer(512, 8, 2048, batch_first=True).eval()
+        self.frames = int(CHUNK_SECONDS * 50)  # whisper 인코더 프레임 (20ms)
+
+    def transcribe(self, audio, prompt=None) -> str:
+        with self.torch.inference_mode():
+            x = self.torch.randn(1, self.frames, 512)
+            for _ in range(6):
+                x = self.layer(x)
+        return ""
+
+
+def load_engine(name: str, threads: int):
+    if name == "torch":
+        return TorchProxyEngine(threads)
+    import whisper_engine
+    return whisper_engine.get_engine()
+
+
+def run_process(engine_name: str, threads: int, seconds: float, start, results):
+    # 자식 프로세스: 스레드 수 고정 → 엔진 로드 + 워밍업 → 모든 프로세스가 준비되면 동시에 측정 시작
+    engine = load_engine(engine_name, threads)
+    audio = (np.random.default_rng(0).standard_normal(int(SAMPLE_RATE * CHUNK_SECONDS)) * 3000).astype(np.int16)
+    engine.transcribe(audio)
+    results.put(("ready", 0, 0.0))
+    start.wait()
+    chunks, latencies = 0, []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        engine.transcribe(audio)
+        latencies.append(time.perf_counter() - started)
+        chunks += 1
+    results.put(("done", chunks, float(np.median(latencies)) if latencies else 0.0))
+
+
+def measure(engine_name: str, processes: int, threads: int, seconds: float) -> dict:
+    context = multiprocessing.get_context("spawn")
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "WHISPER_THREADS"):
+        os.environ[name] = str(threads)  # spawn 자식이 import 시점에 읽음 (worker_runtime.pin_threads와 같은 효과)
+    start, results = context.Event(), context.Queue()
+    workers = [context.Process(target=run_process, args=(engine_name, threads, seconds, start, results))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        results.get()  # ready
+    start.set()
+    done = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    chunks = sum(count for _, count, _ in done)
+    return {"processes": processes, "threads": threads, "chunks": chunks,
+            "audio_per_s": chunks * CHUNK_SECONDS / seconds,
+            "chunk_p50_ms": float(np.median([latency for _, _, latency in done])) * 1000}
+
+
+def default_grid(cpus: float) -> list:
+    # 할당량 안의 모든 (processes, threads) 조합 + 2배 과점유 조합 하나 (노드 공유 시 기본 스레드 수 그대로 두는 경우)
+    cores = max(1, int(cpus))
+    grid = [(p, t) for t in (1, 2, 4, 8) for p in range(1, cores + 1) if p * t <= cores and cores % (p * t) == 0]
+    grid.append((cores, 2))
+    return sorted(set(grid))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="(프로세스 × 스레드) 조합별 STT 처리량 / 코어당 처리량 측정")
+    parser.add_argument("--engine", choices=["auto", "whisper", "torch"], default="auto",
+                        help="whisper(WHISPER_MODEL 필요) | torch(모델 없이 인코더 크기 대용 부하)")
+    parser.add_argument("--grid", nargs="*", default=[], metavar="PxT", help="예: 1x4 2x2 4x1 (기본: 할당량 기준 전체)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="조합별 측정 시간")
+    parser.add_argument("--json", help="결과를 JSON으로 저장")
+    args = parser.parse_args()
+
+    engine = args.engine
+    if engine == "auto":
+        import whisper_engine
+        engine = "whisper" if os.path.exists(whisper_engine.WHISPER_MODEL) else "torch"
+    cpus = cgroup_cpus()
+    grid = [tuple(int(v) for v in item.split("x")) for item in args.grid] or default_grid(cpus)
+    chosen = plan(cpus, 2)  # WORKER_RUNTIME=auto, STT 기본 스레드 2개일 때 선택되는 조합
+    print(f"[Runtime] 🧮 CPU 할당량 {cpus:g}개, 엔진 {engine}, auto 선택 {chosen[0]}x{chosen[1]}")
+
+    results = []
+    print(f"{'PxT':<8}{'audio s/s':>11}{'per core':>10}{'chunk p50(ms)':>15}")
+    for processes, threads in grid:
+        result = measure(engine, processes, threads, args.seconds)
+        result["per_core"] = result["audio_per_s"] / cpus
+        results.append(result)
+        mark = " ← auto" if (processes, threads) == chosen else ""
+        print(f"{processes}x{threads:<6}{result['audio_per_s']:>11.1f}{result['per_core']:>10.1f}"
+              f"{result['chunk_p50_ms']:>15.0f}{mark}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cpus": cpus, "engine": engine, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os  # 서비스 모듈 경로 계산용
+import sys  # analyzer_worker 모듈 import 경로 추가 / 자식 프로세스 실행
+import json  # 자식 프로세스 결과 전달
+import time  # 로드/추론 시간 측정
+import argparse  # 실행 옵션 파싱
+import resource  # 최대 RSS 측정
+import subprocess  # 백엔드별 독립 프로세스 실행 (RSS를 분리해서 측정)
+
+ANALYZER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services", "analyzer_worker")
+
+sys.path.insert(0, ANALYZER_DIR)
+from test_sentiment_parity import PARITY_TEXTS  # 라벨/점수 일치 여부를 확인할 문장 (pytest parity 테스트와 같은 목록)
+
+
+def run_child(backend_name: str, repeat: int):
+    # 자식 프로세스: 백엔드 하나만 로드해 로드 시간 / 지연 / 최대 RSS / 예측 결과를 JSON으로 출력
+    started = time.perf_counter()
+    import sentiment_backend
+    backend = sentiment_backend.BACKENDS[backend_name]()
+    load_seconds = time.perf_counter() - started
+
+    predictions = backend.classify_batch(PARITY_TEXTS)
+    latencies = []
+    for _ in range(repeat):
+        for text in PARITY_TEXTS:
+            t0 = time.perf_counter()
+            backend.classify(text)
+            latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        backend.classify_batch(PARITY_TEXTS)
+    batch_seconds = time.perf_counter() - t0
+    print(json.dumps({
+        "backend": backend_name,
+        "load_s": load_seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "batch_sentences_per_s": repeat * len(PARITY_TEXTS) / batch_seconds,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "predictions": predictions,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="torch vs onnx(int8) 감정 분석 백엔드 parity / 지연 / RSS 비교")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--min-agreement", type=float, default=0.95, help="라벨 일치율 하한 (미달 시 exit 1)")
+    parser.add_argument("--max-score-diff", type=float, default=0.05, help="점수 차이 상한 (미달 시 exit 1)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.repeat)
+        return
+
+    reports = {}
+    for name in ("torch", "onnx"):
+        output = subprocess.run([sys.executable, __file__, "--child", name, "--repeat", str(args.repeat)],
+                                check=True, capture_output=True, text=True).stdout
+        reports[name] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'backend':<8}{'load(s)':>9}{'p50(ms)':>9}{'p95(ms)':>9}{'batch/s':>10}{'RSS(MB)':>9}")
+    for name, rep in reports.items():
+        print(f"{name:<8}{rep['load_s']:>9.2f}{rep['p50_ms']:>9.2f}{rep['p95_ms']:>9.2f}"
+              f"{rep['batch_sentences_per_s']:>10.1f}{rep['max_rss_mb']:>9.0f}")
+
+    # parity: 라벨 일치율 + 점수 최대 차이
+    pairs = list(zip(reports["torch"]["predictions"], reports["onnx"]["predictions"]))
+    agreement = sum(a["label"] == b["label"] for a, b in pairs) / len(pairs)
+    score_diff = max((abs(a["score"] - b["score"]) for a, b in pairs if a["label"] == b["label"]), default=0.0)
+    print(f"라벨 일치율: {agreement * 100:.1f}%, 점수 최대 차이: {score_diff:.4f}")
+    for text, (a, b) in zip(PARITY_TEXTS, pairs):
+        if a["label"] != b["label"]:
+            print(f"  ⚠️ 불일치: {text!r} torch={a} onnx={b}")
+    if agreement < args.min_agreement or score_diff > args.max_score_diff:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
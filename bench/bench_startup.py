@@ -0,0 +1,85 @@
+import os  # 준비 파일 경로 / 환경변수
+import sys  # 현재 파이썬으로 워커 실행
+import json  # 결과 파일 저장
+import time  # 준비 대기 시간 측정
+import argparse  # 실행 옵션 파싱
+import tempfile  # 실행마다 별도 READY_FILE
+import subprocess  # 워커 프로세스 실행
+
+import psutil  # 워커 프로세스 트리 메모리 (RSS / PSS)
+
+# analyzer 워커 기동 → 준비(READY_FILE 생성)까지 시간과 prefork 프로세스 트리 메모리 측정
+# MODEL_PRELOAD=1(부모 1회 로드 후 자식 공유) / 0(자식마다 로드)을 같은 조건으로 비교
+#   python bench/bench_startup.py --concurrency 4 --weights-mb 256         # 가짜 가중치 (모델 없이)
+#   python bench/bench_startup.py --concurrency 4 --real                   # 실제 감정 분석 모델
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICES_DIR = os.path.join(BENCH_DIR, "..", "services")
+
+
+def worker_command(args) -> tuple:
+    if args.real:
+        return ([sys.executable, "-m", "celery", "-A", "analyzer_worker", "worker", "-Q", "analyzer_queue",
+                 "--pool=prefork", f"--concurrency={args.concurrency}", "--loglevel=warning", "-n", "startup@%h"],
+                os.path.join(SERVICES_DIR, "analyzer_worker"))
+    return ([sys.executable, os.path.join(BENCH_DIR, "stub_workers.py"), "analyzer", "--pool=prefork",
+             f"--concurrency={args.concurrency}", f"--weights-mb={args.weights_mb}", "--ms=0"], BENCH_DIR)
+
+
+def tree_memory(process: psutil.Process) -> dict:
+    # PSS는 공유 페이지를 나눠 가진 프로세스 수로 나눠 계산 → 합계가 실제 점유 메모리
+    rss = pss = 0
+    for p in [process] + process.children(recursive=True):
+        try:
+            info = p.memory_full_info()
+        except psutil.Error:
+            continue
+        rss += info.rss
+        pss += getattr(info, "pss", info.rss)
+    return {"rss_mb": rss / 2 ** 20, "pss_mb": pss / 2 ** 20}
+
+
+def measure(args, preload: bool) -> dict:
+    ready_file = os.path.join(tempfile.mkdtemp(prefix="startup-"), "worker-ready")
+    env = dict(os.environ, READY_FILE=ready_file, METRICS_PORT="0", MODEL_PRELOAD="1" if preload else "0")
+    command, cwd = worker_command(args)
+    started = time.perf_counter()
+    worker = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while not os.path.exists(ready_file):
+            if worker.poll() is not None or time.perf_counter() - started > args.timeout:
+                raise SystemExit(f"워커가 준비되지 않음 (preload={preload})")
+            time.sleep(0.05)
+        wall = time.perf_counter() - started
+        time.sleep(1)  # 자식 프리워밍 후 메모리 안정화
+        with open(ready_file) as f:
+            reported = float(f.read())
+        return {"ready_s": wall, "reported_ready_s": reported, **tree_memory(psutil.Process(worker.pid))}
+    finally:
+        worker.terminate()
+        try:
+            worker.wait(10)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 기동 → 준비 시간 / prefork 메모리 공유 측정")
+    parser.add_argument("--concurrency", type=int, default=4, help="prefork 자식 수")
+    parser.add_argument("--weights-mb", type=float, default=256, help="가짜 가중치 크기 (--real 이 아닐 때)")
+    parser.add_argument("--real", action="store_true", help="실제 analyzer_worker (ANALYZER_BACKEND 등 환경변수 그대로)")
+    parser.add_argument("--timeout", type=float, default=300, help="준비 대기 최대 시간")
+    parser.add_argument("--json", help="결과를 JSON으로 저장")
+    args = parser.parse_args()
+
+    results = {"preload": measure(args, True), "per_child": measure(args, False)}
+    print(f"{'mode':<12}{'ready(s)':>10}{'reported(s)':>13}{'RSS(MB)':>10}{'PSS(MB)':>10}")
+    for mode, stats in results.items():
+        print(f"{mode:<12}{stats['ready_s']:>10.2f}{stats['reported_ready_s']:>13.2f}"
+              f"{stats['rss_mb']:>10.0f}{stats['pss_mb']:>10.0f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os  # 서비스 모듈 경로 계산용
+import sys  # 서비스 모듈 import 경로 추가
+import time  # 종단 지연 측정
+import asyncio  # fastapi 쪽 결과 스트림 소비
+import argparse  # 실행 옵션 파싱
+import threading  # 가짜 STT/분석 소비자 스레드
+
+# 회수 테스트를 위해 짧은 idle 기준으로 XAUTOCLAIM 하도록 설정 (모듈 import 전에 지정)
+os.environ.setdefault("STREAM_CLAIM_IDLE_MS", "500")
+os.environ.setdefault("STREAM_CLAIM_INTERVAL", "1")
+os.environ.setdefault("STREAM_BLOCK_MS", "200")
+os.environ["PIPELINE_TRANSPORT"] = "streams"
+ROOT = os.path.join(os.path.dirname(__file__), "..", "services")
+sys.path.insert(0, os.path.join(ROOT, "fastapi_service"))
+sys.path.insert(0, os.path.join(ROOT, "stt_worker"))
+sys.path.insert(0, os.path.join(ROOT, "common"))  # stream_consumer
+
+# 모델 없이 Redis Streams 파이프라인(stream:stt → stream:analyzer → 파드별 결과 스트림)만 검증
+# 로컬 redis-server (Redis 7+) 대상: python bench/bench_streams.py --redis-url redis://localhost:6379/15
+
+
+def stub_stt(client, stt_ms: float):
+    from stream_consumer import STREAM_MAXLEN, text_field
+
+    def handle(entries):
+        for _, fields in entries:
+            time.sleep(stt_ms / 1000)  # whisper 추론 시간 흉내
+            client.xadd("stream:analyzer", {"text": f"문장 {text_field(fields, 'seq')}", "t": fields["t"],
+                                            "session": text_field(fields, "session_id"),
+                                            "reply_to": text_field(fields, "reply_to")},
+                        maxlen=STREAM_MAXLEN, approximate=True)
+    return handle
+
+
+def stub_analyzer(client):
+    from stream_consumer import reply, text_field
+
+    def handle(entries):
+        for _, fields in entries:
+            reply(client, text_field(fields, "reply_to"), {"kind": "result", "session": text_field(fields, "session"),
+                                                            "data": f"👍 긍정 [99%] : {text_field(fields, 'text')}",
+                                                            "t": fields["t"]})
+    return handle
+
+
+async def collect(redis_url: str, count: int, timeout: float) -> list:
+    from redis.asyncio import from_url
+    from stream_transport import consume_results
+
+    client = from_url(redis_url, decode_responses=True)
+    latencies = []
+    done = asyncio.Event()
+
+    async def handler(fields):
+        latencies.append(time.time() - float(fields["t"]))
+        if len(latencies) >= count:
+            done.set()
+
+    task = asyncio.create_task(consume_results(client, handler))
+    try:
+        await asyncio.wait_for(done.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    task.cancel()
+    await asyncio.wait([task], timeout=1)  # 블로킹 XREADGROUP 취소가 늦어도 종료는 진행
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redis Streams 파이프라인 전달/회수/back-pressure 확인")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/15"))
+    parser.add_argument("--count", type=int, default=200, help="보낼 오디오 청크 수")
+    parser.add_argument("--crashed", type=int, default=20, help="읽고 ACK 없이 죽는 소비자가 가져갈 항목 수")
+    parser.add_argument("--consumers", type=int, default=4, help="가짜 STT 소비자 스레드 수")
+    parser.add_argument("--stt-ms", type=float, default=5.0, help="가짜 STT 처리 시간")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    import redis
+    from stream_consumer import StreamConsumer, ensure_group
+    from stream_transport import (BACKPRESSURE_LAG, BACKPRESSURE_POLICY, RESULT_STREAM, STT_GROUP, STT_STREAM,
+                                  BackPressure, StreamTransport)
+
+    client = redis.Redis.from_url(args.redis_url)
+    client.delete(STT_STREAM, "stream:analyzer", RESULT_STREAM)
+    transport = StreamTransport(args.redis_url)
+    ensure_group(client, STT_STREAM, STT_GROUP)
+    for i in range(args.count):
+        transport.send_stt(os.urandom(3200), {"session_id": "bench", "mode": "chunk", "seq": i, "t": time.time()})
+    print(f"전송 {args.count}개 → STT 대기 (lag + pending): {transport.lag()} (Redis 7 미만은 임계값+1에서 잘림)")
+    backpressure, state = BackPressure(transport), {}
+    backpressure.refresh()  # 서버에서는 run() 태스크가 주기적으로 호출
+    admitted = sum(backpressure.admit(state) for _ in range(10))
+    print(f"back-pressure (임계값 {BACKPRESSURE_LAG}, {BACKPRESSURE_POLICY}): 청크 10개 중 {admitted}개 전송")
+
+    # ACK 없이 죽은 소비자: 항목을 읽기만 하고 사라짐 → pending으로 남음
+    client.xreadgroup(STT_GROUP, "crashed-consumer", {STT_STREAM: ">"}, count=args.crashed)
+    print(f"죽은 소비자가 {args.crashed}개 읽고 사라짐 → pending {client.xpending(STT_STREAM, STT_GROUP)['pending']}")
+    time.sleep(int(os.environ["STREAM_CLAIM_IDLE_MS"]) / 1000 + 0.1)  # pending 항목이 회수 대상(idle)이 될 때까지 대기
+
+    consumers = [StreamConsumer(client, STT_STREAM, STT_GROUP, stub_stt(client, args.stt_ms), name=f"bench-stt-{i}")
+                 for i in range(args.consumers)]
+    consumers.append(StreamConsumer(client, "stream:analyzer", "analyzer_workers", stub_analyzer(client),
+                                    count=32, name="bench-analyzer"))
+    started = time.perf_counter()
+    for consumer in consumers:
+        threading.Thread(target=consumer.run, daemon=True).start()
+    latencies = sorted(asyncio.run(collect(args.redis_url, args.count, args.timeout)))
+    elapsed = time.perf_counter() - started
+
+    print(f"결과 수신 {len(latencies)}/{args.count} ({elapsed:.2f}s, {len(latencies) / elapsed:.0f} msg/s)")
+    if latencies:
+        print(f"종단 지연 p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f}ms")
+    print(f"처리 후 STT 대기: {transport.lag()}")
+    client.delete(STT_STREAM, "stream:analyzer", RESULT_STREAM)
+    sys.exit(0 if len(latencies) == args.count else 1)
+
+
+if __name__ == "__main__":
+    main()
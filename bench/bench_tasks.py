@@ -0,0 +1,127 @@
+import os  # 서비스 모듈 경로 계산용
+import sys  # 서비스 모듈 import 경로 추가 / 자식 프로세스 실행
+import json  # 자식 프로세스 결과 전달 / 결과 파일 저장
+import time  # 처리 시간 측정
+import argparse  # 실행 옵션 파싱
+import resource  # 최대 RSS 측정
+import subprocess  # 서비스별 독립 프로세스 실행 (stt_worker / analyzer_worker 모듈 이름 충돌 방지)
+
+# 워커 태스크 단위 마이크로벤치마크: is_repetitive / transcribe_audio / analyzer_text 함수 본문만 반복 실행
+# Celery 브로커와 Redis publish는 빈 객체로 바꿔 태스크 자체 비용만 측정, --real 이면 실제 whisper/감정 모델 사용
+#   python bench/bench_tasks.py --json after.json --compare before.json
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICES_DIR = os.path.join(BENCH_DIR, "..", "services")
+TEXTS = ["오늘 발표 정말 잘 들었습니다 질문 하나 드려도 될까요", "좋아요 좋아요 좋아요 좋아요 좋아요",
+         "this is not what I expected at all", "ㅋㅋㅋㅋㅋ", "스튜디오에 도착한 후 촬영을 시작했습니다"]
+
+
+class NullRedis:  # publish / pipeline / xadd 등 모든 호출을 받아서 버리는 Redis 대역
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return []
+
+
+class NullCelery:
+    def send_task(self, *args, **kwargs):
+        return None
+
+
+def timings(fn, repeat: int) -> dict:
+    fn()  # 워밍업 (엔진/배치 스레드 생성)
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {"ops_per_s": repeat / sum(latencies), "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000}
+
+
+def child_stt(args) -> dict:
+    sys.path.insert(0, os.path.join(SERVICES_DIR, "stt_worker"))
+    sys.path.insert(0, BENCH_DIR)
+    import whisper_engine
+    if not args.real:
+        from stub_workers import StubWhisperEngine
+        whisper_engine._engine = StubWhisperEngine(args.stt_rtf)
+    import stt_worker
+    from bench_audio_codec import synth_pcm
+    stt_worker.celery = NullCelery()
+    stt_worker.r = NullRedis()
+    audio = synth_pcm(args.seconds)
+    results = {"is_repetitive": timings(lambda: [stt_worker.is_repetitive(t) for t in TEXTS], args.repeat * 10)}
+    results["transcribe_audio"] = timings(lambda: stt_worker.transcribe_audio(audio, session_id="bench", mode="chunk"),
+                                          args.repeat)
+    return results
+
+
+def child_analyzer(args) -> dict:
+    sys.path.insert(0, os.path.join(SERVICES_DIR, "analyzer_worker"))
+    sys.path.insert(0, BENCH_DIR)
+    if not args.real:
+        import sentiment_backend
+        from stub_workers import StubSentimentBackend
+        sentiment_backend.load_backend = lambda *a, **k: StubSentimentBackend(args.analyzer_ms)
+    import analyzer_worker
+    analyzer_worker.r = NullRedis()
+    texts = iter(TEXTS * (args.repeat + 1))
+    return {"analyzer_text": timings(lambda: analyzer_worker.analyzer_text(next(texts), session_id="bench"),
+                                     args.repeat)}
+
+
+def run_child(service: str, argv: list) -> dict:
+    # 자식 프로세스 실행 후 마지막 줄(JSON) 파싱, 워커 로그는 버림
+    output = subprocess.run([sys.executable, __file__, "--child", service] + argv, capture_output=True, text=True)
+    lines = output.stdout.strip().splitlines()
+    if output.returncode or not lines:
+        print(output.stderr[-2000:])
+        raise SystemExit(f"{service} 벤치마크 실패")
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 태스크 함수 단위 마이크로벤치마크 (커밋 간 비교용)")
+    parser.add_argument("--repeat", type=int, default=50, help="태스크 반복 횟수")
+    parser.add_argument("--seconds", type=float, default=3.0, help="transcribe_audio 입력 오디오 길이")
+    parser.add_argument("--real", action="store_true", help="실제 whisper.cpp / 감정 분석 모델 사용")
+    parser.add_argument("--stt-rtf", type=float, default=0.0, help="가짜 STT real-time factor (0이면 추론 시간 없음)")
+    parser.add_argument("--analyzer-ms", type=float, default=0.0, help="가짜 analyzer 문장당 시간")
+    parser.add_argument("--json", help="결과를 JSON으로 저장")
+    parser.add_argument("--compare", help="이전 --json 결과와 비교")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        results = (child_stt if args.child == "stt" else child_analyzer)(args)
+        results["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(json.dumps(results))
+        return
+
+    argv = [f"--repeat={args.repeat}", f"--seconds={args.seconds}", f"--stt-rtf={args.stt_rtf}",
+            f"--analyzer-ms={args.analyzer_ms}"] + (["--real"] if args.real else [])
+    results = {"stt": run_child("stt", argv), "analyzer": run_child("analyzer", argv)}
+    before = None
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)
+    print(f"{'task':<20}{'ops/s':>10}{'p50(ms)':>10}{'p95(ms)':>10}" + ("   Δp50" if before else ""))
+    for service, tasks in results.items():
+        for task, stats in tasks.items():
+            if task == "max_rss_mb":
+                continue
+            line = f"{task:<20}{stats['ops_per_s']:>10.1f}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+            old = (before or {}).get(service, {}).get(task)
+            if old:
+                line += f"   {(stats['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100:+.1f}%"
+            print(line)
+    print(f"최대 RSS: stt {results['stt']['max_rss_mb']:.0f}MB, analyzer {results['analyzer']['max_rss_mb']:.0f}MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
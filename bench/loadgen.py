@@ -0,0 +1,331 @@
+import os  # 서비스 경로 / 자식 프로세스 환경변수
+import sys  # 자식 프로세스 실행 (현재 인터프리터)
+import json  # 결과 프레임 파싱 / 결과 파일 저장
+import time  # 벽시계 측정
+import wave  # WAV 입력 읽기
+import asyncio  # 가상 클라이언트 동시 실행
+import argparse  # 실행 옵션 파싱
+import resource  # 부하 생성기 자체 CPU 사용량
+import tempfile  # --spawn 자식 프로세스 로그 위치
+import subprocess  # --spawn: fastapi / 가짜 워커 실행
+import urllib.request  # /metrics 수집
+
+# 파이프라인 전체 부하 테스트: WAV/PCM 파일을 N개의 가상 WebSocket 클라이언트가 실시간 속도(0.5초 청크)로 /ws에 전송
+# 지연 분포는 fastapi가 trace로 기록한 pipeline_end_to_end_seconds / pipeline_stage_seconds를 실행 전후로 수집해 계산
+#   python bench/loadgen.py --spawn --clients 100 --duration 60        # 로컬 Redis + fastapi + 가짜 워커 자동 실행
+#   python bench/loadgen.py --clients 20 --url ws://host:8000/ws ...   # 이미 떠 있는 스택(실제 워커)에 부하
+#   python bench/loadgen.py ... --json out.json --compare before.json  # 커밋 간 비교
+#   python bench/loadgen.py --spawn --fused --compare two-queue.json   # fused_worker(단일 홉)와 2단계 큐 비교
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FASTAPI_DIR = os.path.join(BENCH_DIR, "..", "services", "fastapi_service")
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 0.5  # 브라우저와 같은 전송 주기
+CHUNK_BYTES = int(SAMPLE_RATE * CHUNK_SECONDS) * 2
+QUANTILES = (0.5, 0.95, 0.99)
+DROP_COUNTERS = (  # (표시 이름, 메트릭 이름)
+    ("backpressure", "stt_backpressure_dropped_total"),
+    ("ingest_queue", "stt_ingest_dropped_total"),
+    ("decode_pool", "audio_decode_dropped_total"),
+    ("ws_send_queue", "ws_dropped_messages_total"),
+    ("scheduler", "stt_scheduler_dropped_total"),  # 세션별 큐 overflow + 오래된 청크
+)
+
+
+def load_audio(paths: list) -> list:
+    # 16kHz mono int16 WAV 또는 raw PCM, 파일이 없으면 합성 음성 10초
+    if not paths:
+        from bench_audio_codec import synth_pcm
+        return [synth_pcm(10.0)]
+    clips = []
+    for path in paths:
+        if path.endswith(".wav"):
+            with wave.open(path, "rb") as f:
+                if (f.getframerate(), f.getnchannels(), f.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                    raise SystemExit(f"{path}: 16kHz mono int16 WAV만 지원 (ffmpeg -ar 16000 -ac 1 로 변환)")
+                clips.append(f.readframes(f.getnframes()))
+        else:
+            with open(path, "rb") as f:
+                clips.append(f.read())
+    return clips
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float("nan")
+
+
+def scrape(url: str) -> dict:
+    # Prometheus 텍스트 → {(샘플 이름, 라벨 튜플): 값}, 수집 실패 시 None
+    from prometheus_client.parser import text_string_to_metric_families
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            text = response.read().decode()
+    except OSError:
+        return None
+    samples = {}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+def metric_delta(before: dict, after: dict) -> dict:
+    return {key: value - before.get(key, 0.0) for key, value in after.items()}
+
+
+def metric_sum(samples: dict, name: str, **labels) -> float:
+    return sum(value for (sample, sample_labels), value in samples.items()
+               if sample == name and all(dict(sample_labels).get(k) == v for k, v in labels.items()))
+
+
+def histogram_quantile(samples: dict, name: str, q: float, **labels) -> float:
+    # Prometheus histogram_quantile과 같은 방식 (버킷 안에서 선형 보간)
+    buckets = {}
+    for (sample, sample_labels), value in samples.items():
+        sample_labels = dict(sample_labels)
+        if sample != f"{name}_bucket" or any(sample_labels.get(k) != v for k, v in labels.items()):
+            continue
+        le = float(sample_labels["le"])
+        buckets[le] = buckets.get(le, 0.0) + value
+    bounds = sorted(buckets)
+    if not bounds or buckets[bounds[-1]] <= 0:
+        return float("nan")
+    rank = q * buckets[bounds[-1]]
+    lower, lower_count = 0.0, 0.0
+    for le in bounds:
+        if buckets[le] >= rank:
+            if le == float("inf"):
+                return lower
+            return lower + (le - lower) * (rank - lower_count) / max(buckets[le] - lower_count, 1e-9)
+        lower, lower_count = le, buckets[le]
+    return lower
+
+
+class ClientStats:  # 전체 가상 클라이언트 합산 통계
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.frames = {}
+        self.first_result = []  # 클라이언트별 첫 오디오 전송 → 첫 결과(transcript/sentiment) 수신 (초)
+        self.send_slip = []  # 실시간 전송 일정 대비 지연 (부하 생성기 자체가 밀리는지 확인)
+
+
+async def run_client(index: int, url: str, pcm: bytes, args, stats: ClientStats):
+    import websockets
+    await asyncio.sleep(args.ramp * index / max(1, args.clients))  # 접속을 ramp 초에 걸쳐 분산
+    loop = asyncio.get_running_loop()
+    try:
+        connection = await websockets.connect(url, max_size=None)
+    except Exception as e:
+        stats.failed += 1
+        print(f"[LoadGen] ❌ 클라이언트 {index} 접속 실패: {e}")
+        return
+    stats.connected += 1
+    started = loop.time()
+    first = []
+
+    async def receive():
+        async for frame in connection:
+            message = json.loads(frame)
+            kind = message.get("type")
+            stats.frames[kind] = stats.frames.get(kind, 0) + 1
+            if kind in ("transcript", "sentiment") and not first:
+                first.append(loop.time() - started)
+
+    receiver = asyncio.create_task(receive())
+    sent, offset = 0, (index * CHUNK_BYTES * 3) % max(len(pcm), 1)  # 클라이언트마다 시작 위치를 어긋나게
+    try:
+        while loop.time() - started < args.duration:
+            chunk = pcm[offset:offset + CHUNK_BYTES]
+            if len(chunk) < CHUNK_BYTES:  # 파일 끝이면 처음부터 반복
+                chunk += pcm[:CHUNK_BYTES - len(chunk)]
+            offset = (offset + CHUNK_BYTES) % len(pcm)
+            await connection.send(chunk)
+            stats.audio_seconds += CHUNK_SECONDS
+            sent += 1
+            due = started + sent * CHUNK_SECONDS
+            stats.send_slip.append(max(0.0, loop.time() - due))
+            await asyncio.sleep(max(0.0, due - loop.time()))
+        await asyncio.sleep(args.drain)  # 마지막 청크 결과 대기
+    except Exception as e:
+        print(f"[LoadGen] ⚠️ 클라이언트 {index} 연결 종료: {e}")
+    finally:
+        receiver.cancel()
+        await connection.close()
+    if first:
+        stats.first_result.append(first[0])
+
+
+def spawn_stack(args) -> list:
+    # 로컬 Redis가 떠 있다는 가정 하에 fastapi(uvicorn) + 가짜 stt/analyzer 워커 실행
+    env = dict(os.environ, STREAMING_MODE="1" if args.streaming else "0", PYTHONUNBUFFERED="1")
+    log_path = os.path.join(tempfile.gettempdir(), "loadgen-stack.log")
+    log = open(log_path, "w")
+    print(f"[LoadGen] 🚀 fastapi + 가짜 워커 실행 (로그: {log_path})")
+    stub = [sys.executable, os.path.join(BENCH_DIR, "stub_workers.py")]
+    commands = [
+        ([sys.executable, "-m", "uvicorn", "fastapi_service:app", "--port", str(args.port), "--log-level", "warning"],
+         FASTAPI_DIR),
+    ]
+    if args.fused:  # STT + 감정 분석 한 프로세스 (메트릭은 stt 자리 :9100)
+        commands.append((stub + ["fused", "--rtf", str(args.stt_rtf), "--ms", str(args.analyzer_ms)], BENCH_DIR))
+    else:
+        commands.append((stub + ["stt", "--rtf", str(args.stt_rtf)], BENCH_DIR))
+        commands.append((stub + ["analyzer", "--ms", str(args.analyzer_ms)], BENCH_DIR))
+    processes = [subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+                 for command, cwd in commands]
+    deadline = time.time() + 60
+    while time.time() < deadline and not all(scrape(url) for url in args.components.values()):
+        time.sleep(0.5)
+    return processes
+
+
+def report(args, stats: ClientStats, wall: float, deltas: dict, gauges: dict) -> dict:
+    fastapi = deltas.get("fastapi") or {}
+    stt = deltas.get("stt") or {}
+    result = {"clients": args.clients, "duration": args.duration, "wall_s": wall,
+              "connected": stats.connected, "failed": stats.failed, "frames": stats.frames}
+    print(f"\n클라이언트 {stats.connected}/{args.clients} 접속 (실패 {stats.failed}), 벽시계 {wall:.1f}s")
+    print(f"수신 프레임: {stats.frames}")
+
+    processed = metric_sum(stt, "stt_audio_seconds_total")
+    result["audio_sent_per_s"] = stats.audio_seconds / wall
+    result["audio_processed_per_s"] = processed / wall if stt else None
+    print(f"처리량: 전송 오디오 {stats.audio_seconds / wall:.1f} s/s"
+          + (f", STT 처리 오디오 {processed / wall:.1f} s/s" if stt else " (stt 메트릭 없음)"))
+
+    result["latency"] = {}
+    for kind in ("sentiment", "transcript", "partial"):
+        values = [histogram_quantile(fastapi, "pipeline_end_to_end_seconds", q, type=kind) for q in QUANTILES]
+        if all(v != v for v in values):  # 모두 NaN이면 해당 타입 결과 없음
+            continue
+        result["latency"][kind] = dict(zip(("p50", "p95", "p99"), values))
+        print(f"end-to-end {kind:<10} p50 {values[0]:.2f}s  p95 {values[1]:.2f}s  p99 {values[2]:.2f}s")
+    ttfr = [percentile(stats.first_result, q) for q in QUANTILES]
+    result["time_to_first_result"] = dict(zip(("p50", "p95", "p99"), ttfr))
+    print(f"첫 결과까지 (클라이언트 측) p50 {ttfr[0]:.2f}s  p95 {ttfr[1]:.2f}s  p99 {ttfr[2]:.2f}s")
+
+    result["stages"] = {}
+    print(f"\n{'stage':<16}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for stage in ("buffer", "schedule", "ingest", "stt_queue", "stt", "analyzer_queue", "analyzer", "publish", "fanout"):
+        values = [histogram_quantile(fastapi, "pipeline_stage_seconds", q, stage=stage) for q in QUANTILES]
+        if all(v != v for v in values):
+            continue
+        result["stages"][stage] = dict(zip(("p50", "p95", "p99"), values))
+        print(f"{stage:<16}" + "".join(f"{v * 1000:>10.0f}" for v in values))
+
+    dropped = {name: metric_sum(fastapi, metric) for name, metric in DROP_COUNTERS}
+    tasks = metric_sum(stt, "worker_stage_seconds_count", stage="load")
+    dropped["stale_worker"] = metric_sum(stt, "stt_stale_dropped_total")  # 워커가 꺼낸 뒤 만료로 버린 청크
+    chunk_drops = (dropped["backpressure"] + dropped["ingest_queue"] + dropped["decode_pool"]
+                   + dropped["scheduler"] + dropped["stale_worker"])
+    result["dropped"] = dropped
+    result["chunk_drop_rate"] = chunk_drops / (tasks + chunk_drops) if tasks + chunk_drops else 0.0
+    print(f"\n드롭: {dropped}, STT 작업 {tasks:.0f}개 → 청크 드롭률 {result['chunk_drop_rate'] * 100:.1f}%")
+    admission = {decision: metric_sum(fastapi, "admission_decisions_total", decision=decision)
+                 for decision in ("accept", "degrade", "reject")}
+    result["admission"] = admission
+    print(f"입장 제어: {admission}")
+    slip = [percentile(stats.send_slip, q) * 1000 for q in (0.5, 0.99)]
+    print(f"전송 일정 지연 (부하 생성기): p50 {slip[0]:.0f}ms p99 {slip[1]:.0f}ms")
+    analyzer = deltas.get("analyzer") or stt  # --fused 면 캐시 메트릭도 stt 자리(:9100)
+    hits = metric_sum(analyzer, "analyzer_cache_requests_total", tier="memory", result="hit")
+    lookups = hits + metric_sum(analyzer, "analyzer_cache_requests_total", tier="memory", result="miss")
+    if lookups:
+        hits += metric_sum(analyzer, "analyzer_cache_requests_total", tier="redis", result="hit")
+        result["cache_hit_rate"] = hits / lookups
+        print(f"감정 분석 캐시 적중률: {hits / lookups * 100:.1f}% ({hits:.0f}/{lookups:.0f})")
+
+    result["components"] = {}
+    print(f"\n{'component':<12}{'CPU%':>8}{'RSS(MB)':>10}")
+    for name, samples in deltas.items():
+        if samples is None:
+            print(f"{name:<12}{'-':>8}{'-':>10}  (메트릭 수집 실패)")
+            continue
+        cpu = metric_sum(samples, "process_cpu_seconds_total") / wall * 100
+        rss = metric_sum(gauges[name], "process_resident_memory_bytes") / 1024 / 1024
+        result["components"][name] = {"cpu_percent": cpu, "rss_mb": rss}
+        print(f"{name:<12}{cpu:>8.1f}{rss:>10.0f}")
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    print(f"{'loadgen':<12}{(usage.ru_utime + usage.ru_stime) / wall * 100:>8.1f}{usage.ru_maxrss / 1024:>10.0f}")
+    return result
+
+
+def compare(result: dict, path: str):
+    # 이전 실행 결과(--json)와 주요 지표 비교
+    with open(path) as f:
+        before = json.load(f)
+    print(f"\n비교 ({path} → 현재)")
+    rows = [("audio_processed_per_s", before.get("audio_processed_per_s"), result.get("audio_processed_per_s")),
+            ("chunk_drop_rate", before.get("chunk_drop_rate"), result.get("chunk_drop_rate"))]
+    for kind, values in result["latency"].items():
+        for q, value in values.items():
+            rows.append((f"{kind} {q}", before.get("latency", {}).get(kind, {}).get(q), value))
+    for name, old, new in rows:
+        if old is None or new is None:
+            continue
+        change = (new - old) / old * 100 if old else (0.0 if new == old else float("inf"))
+        print(f"  {name:<24}{old:>10.3f} → {new:>10.3f} ({change:+.1f}%)")
+
+
+async def run(args, clips: list) -> tuple:
+    stats = ClientStats()
+    before = {name: scrape(url) for name, url in args.components.items()}
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(i, args.url, clips[i % len(clips)], args, stats) for i in range(args.clients)))
+    wall = time.perf_counter() - started
+    after = {name: scrape(url) for name, url in args.components.items()}
+    deltas = {name: metric_delta(before[name], after[name]) if before[name] and after[name] else None
+              for name in args.components}
+    return stats, wall, deltas, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket 가상 클라이언트로 파이프라인 전체 부하 테스트")
+    parser.add_argument("--clients", type=int, default=20, help="동시 가상 클라이언트 수")
+    parser.add_argument("--duration", type=float, default=30.0, help="클라이언트당 오디오 전송 시간 (초)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="접속을 분산할 시간 (초)")
+    parser.add_argument("--drain", type=float, default=5.0, help="전송 종료 후 남은 결과를 기다리는 시간 (초)")
+    parser.add_argument("--audio", nargs="*", default=[], help="16kHz mono int16 WAV 또는 raw PCM (없으면 합성 음성)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--url", help="기본 ws://localhost:<port>/ws?codec=pcm")
+    parser.add_argument("--component", action="append", default=[], metavar="NAME=URL",
+                        help="CPU/RSS/지연 메트릭 수집 대상 (기본 fastapi, stt:9100, analyzer:9101)")
+    parser.add_argument("--spawn", action="store_true", help="fastapi + 가짜 워커를 직접 실행 (로컬 Redis 필요)")
+    parser.add_argument("--streaming", action="store_true", help="--spawn 시 STREAMING_MODE=1")
+    parser.add_argument("--stt-rtf", type=float, default=0.1, help="--spawn 가짜 STT real-time factor")
+    parser.add_argument("--analyzer-ms", type=float, default=5.0, help="--spawn 가짜 analyzer 문장당 시간")
+    parser.add_argument("--fused", action="store_true", help="--spawn 시 stt/analyzer 대신 fused_worker 하나 실행")
+    parser.add_argument("--json", help="결과를 JSON으로 저장")
+    parser.add_argument("--compare", help="이전 --json 결과와 비교")
+    args = parser.parse_args()
+
+    args.url = args.url or f"ws://localhost:{args.port}/ws?codec=pcm"
+    args.components = {"fastapi": f"http://localhost:{args.port}/metrics", "stt": "http://localhost:9100/metrics",
+                       "analyzer": "http://localhost:9101/metrics"}
+    if args.fused:
+        del args.components["analyzer"]
+    args.components.update(dict(item.split("=", 1) for item in args.component))
+    clips = load_audio(args.audio)
+    processes = spawn_stack(args) if args.spawn else []
+    try:
+        stats, wall, deltas, gauges = asyncio.run(run(args, clips))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:  # 과부하 테스트 후 celery warm shutdown이 남은 작업을 기다리는 경우
+                process.kill()
+    result = report(args, stats, wall, deltas, gauges)
+    if args.compare:
+        compare(result, args.compare)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
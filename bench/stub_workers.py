@@ -0,0 +1,125 @@
+import os  # 서비스 모듈 경로 계산 / 메트릭 포트 환경변수
+import sys  # 서비스 모듈 import 경로 추가
+import time  # 가짜 추론 시간
+import argparse  # 실행 옵션 파싱
+import threading  # whisper 컨텍스트 직렬화 흉내
+
+# 모델 없이 파이프라인 전체(fastapi → stt_worker → analyzer_worker → fastapi)를 측정하기 위한 가짜 워커
+# 실제 워커 모듈(stt_worker.py / analyzer_worker.py)을 그대로 띄우고 추론 엔진만 바꿔 끼움
+#   python bench/stub_workers.py stt --rtf 0.1          # 오디오 1초당 0.1초 "추론"
+#   python bench/stub_workers.py analyzer --ms 5        # 문장당 5ms
+#   python bench/stub_workers.py fused --rtf 0.1 --ms 5  # fused_worker (STT + 감정 분석 한 프로세스)
+# PIPELINE_TRANSPORT=streams 면 Celery 대신 stream_worker.py 소비자로 실행
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services")
+sys.path.insert(0, os.path.join(SERVICES_DIR, "common"))  # worker_metrics / stream_consumer
+SAMPLE_RATE = 16000
+STUB_TEXTS = ["오늘 발표 정말 잘 들었습니다", "this is not what I expected", "좋은 질문 감사합니다",
+              "the sound quality was great", "조금 아쉬웠어요"]
+
+
+class StubWhisperEngine:  # 오디오 길이 × RTF 만큼 잠들고 고정 문장 반환 (whisper 컨텍스트처럼 한 번에 하나만)
+    def __init__(self, rtf: float):
+        self.rtf = rtf
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def _text(self) -> str:
+        self.count += 1
+        return STUB_TEXTS[self.count % len(STUB_TEXTS)]
+
+    def transcribe(self, audio, prompt=None) -> str:
+        with self.lock:
+            time.sleep(len(audio) / SAMPLE_RATE * self.rtf)
+            return self._text()
+
+
+class StubSentimentBackend:  # 문장당 고정 시간 "추론", 라벨은 번갈아 반환
+    name = "stub"
+
+    def __init__(self, ms: float, weights_mb: float = 0):
+        self.seconds = ms / 1000
+        self.weights = b"\x01" * int(weights_mb * 2 ** 20)  # 가짜 가중치 (페이지가 실제로 할당되도록 채움)
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def classify(self, text: str) -> dict:
+        return self.classify_batch([text])[0]
+
+    def classify_batch(self, texts: list) -> list:
+        with self.lock:
+            time.sleep(self.seconds * len(texts))
+            results = []
+            for _ in texts:
+                self.count += 1
+                results.append({"label": "POSITIVE" if self.count % 3 else "NEGATIVE", "score": 0.9})
+            return results
+
+
+def pool_options(args) -> list:
+    # WORKER_RUNTIME=auto면 풀 / 크기는 worker_runtime.py가 정함 (명령줄 값이 있으면 그쪽이 우선이라 넘기지 않음)
+    if os.getenv("WORKER_RUNTIME") == "auto":
+        return []
+    return [f"--pool={args.pool}", f"--concurrency={args.concurrency}"]
+
+
+def run_stt(args):
+    sys.path.insert(0, os.path.join(SERVICES_DIR, "stt_worker"))
+    os.environ.setdefault("METRICS_PORT", "9100")
+    import whisper_engine
+    whisper_engine._engine = StubWhisperEngine(args.rtf)  # get_engine()이 모델 대신 이 객체를 반환
+    if os.getenv("PIPELINE_TRANSPORT") == "streams":
+        import worker_metrics
+        from stream_consumer import run_consumers
+        from stream_worker import STT_GROUP, STT_STREAM, handle, r
+        worker_metrics.start(r, [(STT_STREAM, STT_GROUP)])
+        run_consumers(r, STT_STREAM, STT_GROUP, handle, count=1)
+        return
+    from stt_worker import celery
+    celery.worker_main(["worker", "-Q", "stt_queue,stt_job_queue", *pool_options(args), "--loglevel=warning",
+                        "-n", "stub-stt@%h"])
+
+
+def run_analyzer(args):
+    sys.path.insert(0, os.path.join(SERVICES_DIR, "analyzer_worker"))
+    os.environ.setdefault("METRICS_PORT", "9101")
+    import sentiment_backend
+    sentiment_backend.load_backend = lambda *a, **k: StubSentimentBackend(args.ms, args.weights_mb)  # import 전에 교체
+    if os.getenv("PIPELINE_TRANSPORT") == "streams":
+        import worker_metrics
+        from stream_consumer import run_consumers
+        from stream_worker import ANALYZER_BATCH_MAX_SIZE, ANALYZER_GROUP, ANALYZER_STREAM, handle, r
+        worker_metrics.start(r, [(ANALYZER_STREAM, ANALYZER_GROUP)])
+        run_consumers(r, ANALYZER_STREAM, ANALYZER_GROUP, handle, count=ANALYZER_BATCH_MAX_SIZE)
+        return
+    from analyzer_worker import celery
+    celery.worker_main(["worker", "-Q", "analyzer_queue,analyzer_job_queue", *pool_options(args), "--loglevel=warning",
+                        "-n", "stub-analyzer@%h"])
+
+
+def run_fused(args):
+    for service in ("fused_worker", "analyzer_worker", "stt_worker"):
+        sys.path.insert(0, os.path.join(SERVICES_DIR, service))
+    os.environ.setdefault("METRICS_PORT", "9100")
+    import whisper_engine
+    import sentiment_backend
+    whisper_engine._engine = StubWhisperEngine(args.rtf)
+    sentiment_backend.load_backend = lambda *a, **k: StubSentimentBackend(args.ms, args.weights_mb)
+    from fused_worker import celery
+    celery.worker_main(["worker", "-Q", "stt_queue,stt_job_queue,analyzer_job_queue", *pool_options(args), "--loglevel=warning",
+                        "-n", "stub-fused@%h"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모델 없이 실행하는 가짜 stt/analyzer 워커 (부하 테스트용)")
+    parser.add_argument("service", choices=["stt", "analyzer", "fused"])
+    parser.add_argument("--rtf", type=float, default=0.1, help="stt: 오디오 1초당 추론 시간 (real-time factor)")
+    parser.add_argument("--ms", type=float, default=5.0, help="analyzer: 문장당 추론 시간")
+    parser.add_argument("--weights-mb", type=float, default=0, help="analyzer: 가짜 가중치 크기 (prefork 메모리 공유 측정용)")
+    parser.add_argument("--pool", default="threads", help="Celery 풀 (threads | prefork | solo)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Celery 풀 크기")
+    args = parser.parse_args()
+    {"stt": run_stt, "analyzer": run_analyzer, "fused": run_fused}[args.service](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,17 @@ services=(
   fastapi_service
   stt_worker
   analyzer_worker
-  listener_service
+  fused_worker
 )
 
 
 for  svc in "${services[@]}"; do
     echo "Building: $svc"
-    docker build -t ajh9789/$svc:latest ./$svc
+    context=./$svc
+    if [ "$svc" != fastapi_service ]; then
+        context=.  # 워커는 services/common 공용 모듈을 함께 복사 (services/ 를 컨텍스트로)
+    fi
+    docker build -t ajh9789/$svc:latest -f ./$svc/Dockerfile $context
 
     echo "Pushing: $svc"
     docker push ajh9789/$svc:latest
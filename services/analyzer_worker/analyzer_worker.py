@@ -1,36 +1,169 @@
 import os  # 환경변수 접근을 위한 모듈
+import sys  # services/common import 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))  # services/common 공용 모듈
+from worker_runtime import Runtime  # WORKER_RUNTIME=auto: cgroup CPU 할당량으로 프로세스 수 / 프로세스당 스레드 수 결정
+runtime = Runtime(default_threads=1)
+runtime.pin_threads("ONNX_INTRA_OP_THREADS")  # sentiment_backend / torch import 전에 스레드 수 고정
+import json  # 구조화된 결과 메시지 직렬화
+import time  # 결과 타임스탬프
+import threading  # 배치 스케줄러 싱글톤 생성용 락
 import redis  # Redis에 직접 publish 하기 위한 모듈
 from celery import Celery  # Celery 비동기 작업을 위한 모듈
-from transformers import pipeline  # Huggingface의 사전 학습 모델 파이프라인 모듈
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_ready  # 모델 선로딩 / 프리워밍 / 메트릭 서버 시작
+from batcher import MicroBatcher  # 문장 배치 분류 스케줄러
+# 감정 분석 추론 백엔드 (torch pipeline | onnx int8)
+from sentiment_backend import ANALYZER_BACKEND, ONNX_INTRA_OP_THREADS, SENTIMENT_MODEL, load_backend
+from result_cache import ANALYZER_CACHE_REDIS, ResultCache  # 반복 문장 결과 캐시 (LRU + 선택적 Redis)
+from model_loader import ModelLoader, clear_ready, mark_child_ready, mark_ready, prefork_children  # 모델 1회 로드 + 프리워밍 + 준비 신호
+import stats_store  # Redis 감정 통계 집계 (전체 누적 + 시간 버킷)
+import job_store  # 오프라인 작업 (/jobs) 구간 결과 기록
+import worker_metrics  # 단계별 처리 시간 / 대기열 길이 Prometheus 메트릭 (METRICS_PORT)
 
 REDIS_HOST = os.getenv("REDIS_HOST", "redis" if os.getenv("DOCKER") else "localhost")  # Redis 주소 환경변수에서 읽기 (도커 여부 고려)
 REDIS_PORT = 6379  # Redis 포트 설정 (기본 6379)
 celery = Celery("analyzer_worker", broker=f"redis://{REDIS_HOST}:{REDIS_PORT}/0")  # Celery 앱 인스턴스 생성 (Redis를 브로커로 사용)
 r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)  # Redis publish용 동기 클라이언트 인스턴스 생성
+runtime.configure(celery)  # auto면 prefork 풀 크기 / prefetch 1
 
-# 감정 분석용 Transformers 파이프라인 모델 초기화
-classifier = pipeline("sentiment-analysis", model="distilbert/distilbert-base-uncased-finetuned-sst-2-english", )
+# 결과 라우팅: session이면 요청한 세션 채널(result:<session>)로만, broadcast면 기존처럼 result_channel 전체 전송
+RESULT_ROUTING = os.getenv("RESULT_ROUTING", "session")
+
+# 배치 분류 설정 (--pool=threads 로 여러 태스크가 동시에 문장을 제출해야 배치가 채워짐)
+# WORKER_RUNTIME=auto면 프로세스당 작업이 하나라 배치가 차지 않으므로 끔 (대신 프로세스 수만큼 병렬 분류)
+ANALYZER_BATCHING = os.getenv("ANALYZER_BATCHING", "0") == "1" and not runtime.auto
+ANALYZER_BATCH_MAX_SIZE = int(os.getenv("ANALYZER_BATCH_MAX_SIZE", "32"))  # 한 번에 모을 최대 문장 수
+ANALYZER_BATCH_MAX_WAIT_MS = float(os.getenv("ANALYZER_BATCH_MAX_WAIT_MS", "50"))  # 배치를 채우기 위한 최대 대기
+_batcher = None
+_batcher_lock = threading.Lock()
+
+# 감정 분석 백엔드 (ANALYZER_BACKEND=onnx 이면 torch/transformers를 import하지 않음)
+# import 시점이 아니라 worker_init(부모 프로세스)에서 로드 → prefork 자식은 가중치를 copy-on-write로 공유
+# onnxruntime 세션은 intra-op 스레드 풀이 없을 때(ONNX_INTRA_OP_THREADS=1)만 fork 후 그대로 사용, 아니면 자식에서 다시 로드
+PREWARM_TEXTS = ["warming up the sentiment model", "모델 프리워밍 문장입니다"]
+sentiment_model = ModelLoader(
+    "sentiment", load_backend, prewarm=lambda backend: backend.classify_batch(PREWARM_TEXTS),
+    fork_safe=lambda backend: getattr(backend, "name", "") != "onnx" or ONNX_INTRA_OP_THREADS <= 1,
+)
+_prefork_children = 0  # prefork 자식 수 (0이면 이 프로세스에서 직접 프리워밍)
+_own_worker = False  # 이 모듈의 Celery 앱으로 띄운 워커인지 (worker_init에서 결정, prefork 자식은 fork로 물려받음)
+
+# 반복 발화 결과 캐시: 캐시에 있으면 배치 대기/추론 없이 바로 publish
+sentiment_cache = ResultCache(client=r if ANALYZER_CACHE_REDIS else None,
+                              namespace=f"{ANALYZER_BACKEND}:{SENTIMENT_MODEL}")
+
+
+def get_backend():
+    return sentiment_model.get()
+
+
+def get_batcher() -> MicroBatcher:
+    # 워커 프로세스당 하나의 배치 스케줄러 (첫 호출 시 생성)
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(get_backend().classify_batch, ANALYZER_BATCH_MAX_SIZE,
+                                        ANALYZER_BATCH_MAX_WAIT_MS, name="Analyzer")
+    return _batcher
+
+
+def result_channel(session_id=None) -> str:
+    # 세션 id가 없는 기존 호출(args=[text])은 항상 result_channel로 전송
+    if RESULT_ROUTING == "session" and session_id:
+        return f"result:{session_id}"
+    return "result_channel"
+
+
+def format_result(text, result) -> str:  # 분류 결과 → 로그 출력용 문자열
+    emotion = ("긍정" if result["label"] == "POSITIVE" else "부정")  # 분류 결과를 바탕으로 긍정/부정 레이블 결정
+    icon = ("👍" if result["label"] == "POSITIVE" else "👎")  # 이모지 아이콘 설정 (👍 또는 👎)
+    score = result["score"]
+    return f"{icon} {emotion} [{score * 100:.0f}%] : {text}"  # 출력 문자열 구성 (예: 긍정/부정 + 점수 + 원문)
+
+
+def build_result(text, result, session_id=None, trace=None) -> str:  # sentiment 타입 메시지 (fastapi_service/protocol.py 스키마)
+    message = {"type": "sentiment", "session": session_id, "label": result["label"],
+               "score": float(result["score"]), "text": text, "ts": time.time()}
+    if trace:  # 단계별 타임스탬프 (fastapi가 전달 시점에 구간별 히스토그램으로 기록)
+        message["trace"] = worker_metrics.stamp(trace, "publish")
+    return json.dumps(message, ensure_ascii=False)
+
+
+def record_stats(result):  # 통계는 결과마다 analyzer에서 한 번만 집계 (fastapi 파드마다 세지 않음)
+    try:
+        stats_store.record(r, result["label"])
+    except Exception as e:
+        print(f"[Analyzer] Redis stats error: {e}")
+
+
+def publish_result(text, result, session_id=None, trace=None):  # 분류 결과를 구조화된 메시지로 세션/전체 채널에 전송
+    record_stats(result)
+    try:
+        with worker_metrics.timed("publish"):  # 결과를 Redis PubSub 채널로 전송
+            r.publish(result_channel(session_id), build_result(text, result, session_id, trace))
+    except Exception as e:
+        print(f"[Analyzer] Redis publish error: {e}")
+        return
+    print(f"[Analyzer] ✅ publish 완료: {format_result(text, result)}")  # 전송 완료 로그 출력
 
 
 @celery.task(name="analyzer_worker.analyzer_text", queue="analyzer_queue")  # Celery 태스크로 analyzer_texS 등록
-def analyzer_text(text):  # 텍스트 감정 분석 및 Redis 전송 함수 정의
+def analyzer_text(text, session_id=None, trace=None, job=None):  # 텍스트 감정 분석 및 Redis 전송 함수 정의
+    # job: 오프라인 작업 구간이면 publish / 통계 대신 구간 결과로 기록 (분석 실패 시에도 텍스트만 기록)
     print("[STT] → [Analyzer] Celery 전달 text 수신")
+    trace = worker_metrics.stamp(trace, "analyzer_start")
+    worker_metrics.observe_queue_wait(trace)
     try:
         decoded_text = text  # 받은 텍스트를 처리용 변수에 저장 (디코딩 생략됨)
         print(f"[Analyzer] 🎙️ 텍스트 수신: {decoded_text}")
-        result = classifier(decoded_text)[0]  # 감정 분석 모델을 사용해 텍스트 분류 수행
+        result = sentiment_cache.get(decoded_text)
+        if result is None:
+            with worker_metrics.timed("inference"):  # 배칭 시 배치 대기 시간 포함
+                if ANALYZER_BATCHING:  # 다른 태스크의 문장과 함께 배치 분류 후 내 결과만 받아옴
+                    result = get_batcher().submit(decoded_text).result()
+                else:
+                    result = get_backend().classify(decoded_text)  # 감정 분석 모델을 사용해 텍스트 분류 수행
+            sentiment_cache.put(decoded_text, result)
     except Exception as e:
         print(f"[Analyzer] Sentiment analysis error: {e}")
+        if job:
+            job_store.record_segment(r, job, text)
+        return
+    if job:
+        job_store.record_segment(r, job, decoded_text, result)
         return
+    trace = worker_metrics.stamp(trace, "analyzer_end")
 
-    emotion = ("긍정" if result["label"] == "POSITIVE" else "부정")  # 분류 결과를 바탕으로 긍정/부정 레이블 결정
-    icon = ("👍" if result["label"] == "POSITIVE" else "👎")  # 이모지 아이콘 설정 (👍 또는 👎)
-    score = result["score"]
+    publish_result(decoded_text, result, session_id, trace)  # 결과는 배치 여부와 관계없이 문장마다 하나씩 publish
 
-    output = f"{icon} {emotion} [{score * 100:.0f}%] : {decoded_text}"  # 출력 문자열 구성 (예: 긍정/부정 + 점수 + 원문)
-    try:
-        r.publish("result_channel", output)  # 결과를 Redis PubSub 채널로 전송
-    except Exception as e:
-        print(f"[Analyzer] Redis publish error: {e}")
+
+@worker_init.connect
+def preload_model(sender=None, **kwargs):  # 부모 프로세스: 풀(자식) 생성 전에 모델 로드
+    global _prefork_children, _own_worker
+    _own_worker = sender.app is celery  # fused_worker가 라이브러리로 import한 경우엔 아래 핸들러 모두 건너뜀
+    if not _own_worker:
+        return
+    clear_ready()
+    _prefork_children = prefork_children(sender)
+    sentiment_model.preload()
+
+
+@worker_process_init.connect
+def init_child(**kwargs):  # prefork 자식: 필요 시 다시 로드 + 자식마다 프리워밍
+    if not _own_worker:
+        return
+    runtime.after_fork()
+    sentiment_model.after_fork()
+    mark_child_ready()
+
+
+worker_process_shutdown.connect(worker_metrics.mark_process_dead)  # 종료한 자식의 캐시 항목 수를 합계에서 제외
+
+
+@worker_ready.connect
+def start_metrics(**kwargs):  # Celery 워커 기동 시 메트릭 서버 시작 + 프리워밍 후 준비 신호
+    if not _own_worker:
         return
-    print(f"[Analyzer] ✅ publish 완료: {output}")  # 전송 완료 로그 출력
+    worker_metrics.start(r, [("analyzer_queue", None)])
+    sentiment_model.startup(_prefork_children > 0)
+    mark_ready(_prefork_children)  # prefork면 자식이 모두 프리워밍을 끝낸 뒤 준비 신호
@@ -0,0 +1,80 @@
+import time  # 대기 시간 측정용
+import queue  # 태스크 스레드 → 배치 스레드 전달용 큐
+import threading  # 배치 수집/실행 전용 스레드
+from concurrent.futures import Future  # 항목별 결과를 돌려주기 위한 Future
+from typing import Any, Callable, List
+
+
+class MicroBatcher:  # 여러 태스크에서 들어온 항목을 모아 한 번에 추론하고 결과를 다시 나눠주는 스케줄러
+    def __init__(self, run_batch: Callable[[List[Any]], List[Any]], max_batch_size: int, max_wait_ms: float,
+                 name: str = "Batch"):
+        self.run_batch = run_batch  # 입력 리스트 → 같은 순서의 결과 리스트
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.pending = queue.Queue()
+        # 누적 통계 (배치 채움률, 큐 대기 시간)
+        self.batches = 0
+        self.items = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self.stats_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._loop, name=f"{name}-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, item: Any) -> Future:
+        future = Future()
+        self.pending.put((item, future, time.monotonic()))
+        return future
+
+    def _collect(self) -> list:
+        # 첫 항목이 올 때까지 블로킹 대기 → 배치가 차거나 대기 창이 끝날 때까지 추가 수집
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            waits = [started - enqueued_at for _, _, enqueued_at in batch]
+            self._record(len(batch), waits)
+            try:
+                results = self.run_batch([item for item, _, _ in batch])
+            except Exception as e:  # 배치 전체 실패 시 모든 항목에 예외 전달
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            print(f"[{self.name}] 📦 배치 {len(batch)}/{self.max_batch_size} "
+                  f"(채움 {len(batch) / self.max_batch_size * 100:.0f}%), "
+                  f"대기 평균 {sum(waits) / len(waits) * 1000:.0f}ms / 최대 {max(waits) * 1000:.0f}ms, "
+                  f"추론 {(time.monotonic() - started) * 1000:.0f}ms")
+
+    def _record(self, size: int, waits: List[float]):
+        with self.stats_lock:
+            self.batches += 1
+            self.items += size
+            self.total_wait += sum(waits)
+            self.max_wait_seen = max(self.max_wait_seen, max(waits))
+
+    def stats(self) -> dict:
+        with self.stats_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+                "avg_fill_ratio": self.items / (self.batches * self.max_batch_size) if self.batches else 0.0,
+                "avg_queue_wait_ms": self.total_wait / self.items * 1000 if self.items else 0.0,
+                "max_queue_wait_ms": self.max_wait_seen * 1000,
+                "pending": self.pending.qsize(),
+            }
@@ -0,0 +1,47 @@
+import os  # 출력 경로 처리
+import argparse  # 실행 옵션 파싱
+
+from sentiment_backend import SENTIMENT_MODEL, ONNX_MODEL_DIR, ONNX_MODEL_FILE
+
+
+# DistilBERT 감정 분석 모델을 ONNX로 export 후 int8 동적 양자화 (Docker 빌드 시 1회 실행)
+def export(model_name: str, output_dir: str):
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(output_dir)  # tokenizer.json → 런타임은 tokenizers 라이브러리만 사용
+    model.config.save_pretrained(output_dir)  # config.json → id2label
+
+    fp32_path = os.path.join(output_dir, "model-fp32.onnx")
+    dummy = tokenizer(["export sample"], return_tensors="pt")
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={  # 배치 크기 / 문장 길이는 동적 (동적 패딩 배치 지원)
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=14,
+        )
+    int8_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)  # Linear 가중치 int8, 활성값은 실행 시 양자화
+    print(f"[Export] ✅ {model_name} → {int8_path} "
+          f"(fp32 {os.path.getsize(fp32_path) / 2**20:.0f}MB → int8 {os.path.getsize(int8_path) / 2**20:.0f}MB)")
+    os.remove(fp32_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="감정 분석 모델 ONNX int8 export")
+    parser.add_argument("--model", default=SENTIMENT_MODEL)
+    parser.add_argument("--output", default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+    export(args.model, args.output)
@@ -0,0 +1,149 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from prometheus_client import Counter, Gauge
+
+# 감정 분석 결과 캐시: "네", "감사합니다" 같은 짧은 반복 발화는 모델을 다시 돌리지 않고 이전 결과를 재사용
+# 1단계: 워커 프로세스 내 LRU (ANALYZER_CACHE_SIZE개, 0이면 캐시 끔)
+# 2단계(선택): Redis 공유 캐시 (ANALYZER_CACHE_REDIS=1, TTL ANALYZER_CACHE_TTL초) → 워커/파드 간 공유
+ANALYZER_CACHE_SIZE = int(os.getenv("ANALYZER_CACHE_SIZE", "4096"))
+ANALYZER_CACHE_REDIS = os.getenv("ANALYZER_CACHE_REDIS", "0") == "1"
+ANALYZER_CACHE_TTL = int(os.getenv("ANALYZER_CACHE_TTL", "3600"))
+ANALYZER_CACHE_MAX_CHARS = int(os.getenv("ANALYZER_CACHE_MAX_CHARS", "128"))  # 긴 문장은 반복될 일이 적어 캐시하지 않음
+CACHE_KEY_PREFIX = "sentiment_cache:"
+
+cache_requests = Counter("analyzer_cache_requests_total", "감정 분석 캐시 조회 (tier: memory | redis)",
+                         ["tier", "result"])
+cache_evictions = Counter("analyzer_cache_evictions_total", "LRU 용량 초과로 밀려난 항목 수")
+cache_entries = Gauge("analyzer_cache_entries", "프로세스 내 LRU 항목 수 (prefork면 살아 있는 자식 합계)",
+                      multiprocess_mode="livesum")
+
+_PUNCTUATION = re.compile(r"[\s.,!?~…·\"'()\[\]-]+")
+
+
+def normalize(text: str) -> str:
+    # 전각/반각, 대소문자, 공백, 문장부호 차이는 같은 문장으로 취급 ("네." == "네" == " 네 !")
+    text = unicodedata.normalize("NFKC", text).lower()
+    return " ".join(part for part in _PUNCTUATION.split(text) if part)
+
+
+class ResultCache:  # 정규화한 텍스트 → {"label", "score"}
+    def __init__(self, size: int = ANALYZER_CACHE_SIZE, client=None, namespace: str = "",
+                 ttl: int = ANALYZER_CACHE_TTL, max_chars: int = ANALYZER_CACHE_MAX_CHARS):
+        self.size = size
+        self.client = client  # None이면 Redis 단계 없이 LRU만
+        self.namespace = namespace  # 백엔드/모델이 바뀌면 Redis의 이전 결과를 쓰지 않도록 키에 포함
+        self.ttl = ttl
+        self.max_chars = max_chars
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, text: str) -> Optional[str]:
+        if self.size <= 0 or not text or len(text) > self.max_chars:
+            return None
+        return normalize(text) or None
+
+    def redis_key(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"{CACHE_KEY_PREFIX}{self.namespace}:{digest}"
+
+    def _remember(self, key: str, result: dict):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            evicted = 0
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                evicted += 1
+            cache_entries.set(len(self.entries))
+        if evicted:
+            cache_evictions.inc(evicted)
+
+    def get_many(self, texts: List[str]) -> List[Optional[dict]]:
+        keys = [self.key(text) for text in texts]
+        results = [None] * len(texts)
+        missing = []
+        with self.lock:
+            for i, key in enumerate(keys):
+                if key is None:
+                    continue
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    results[i] = self.entries[key]
+                else:
+                    missing.append(i)
+        hits = sum(result is not None for result in results)
+        if hits:
+            cache_requests.labels(tier="memory", result="hit").inc(hits)
+        if missing:
+            cache_requests.labels(tier="memory", result="miss").inc(len(missing))
+        if missing and self.client is not None:
+            self._get_shared(keys, missing, results)
+        return results
+
+    def _get_shared(self, keys: list, missing: list, results: list):
+        # LRU에 없는 문장만 MGET 한 번으로 조회, 찾으면 LRU에도 넣음
+        try:
+            values = self.client.mget([self.redis_key(keys[i]) for i in missing])
+        except Exception as e:
+            print(f"[Cache] ⚠️ Redis 캐시 조회 실패: {e}")
+            cache_requests.labels(tier="redis", result="error").inc(len(missing))
+            return
+        hits = 0
+        for i, value in zip(missing, values):
+            if value is None:
+                continue
+            results[i] = json.loads(value)
+            self._remember(keys[i], results[i])
+            hits += 1
+        if hits:
+            cache_requests.labels(tier="redis", result="hit").inc(hits)
+        if len(missing) - hits:
+            cache_requests.labels(tier="redis", result="miss").inc(len(missing) - hits)
+
+    def put_many(self, texts: List[str], results: List[dict]):
+        stored = []
+        for text, result in zip(texts, results):
+            key = self.key(text)
+            if key is None or result is None:
+                continue
+            result = {"label": result["label"], "score": float(result["score"])}
+            self._remember(key, result)
+            stored.append((key, result))
+        if not stored or self.client is None:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, result in stored:
+                pipe.set(self.redis_key(key), json.dumps(result), ex=self.ttl)
+            pipe.execute()
+        except Exception as e:
+            print(f"[Cache] ⚠️ Redis 캐시 저장 실패: {e}")
+
+    def get(self, text: str) -> Optional[dict]:
+        return self.get_many([text])[0]
+
+    def put(self, text: str, result: dict):
+        self.put_many([text], [result])
+
+    def classify_batch(self, texts: List[str], classify_batch: Callable[[List[str]], List[dict]]) -> List[dict]:
+        # 캐시에 없는 문장만 모델로 분류 (같은 배치 안의 중복 문장도 한 번만 분류)
+        results = self.get_many(texts)
+        pending = {}
+        for i, result in enumerate(results):
+            if result is None:
+                pending.setdefault(self.key(texts[i]) or i, []).append(i)  # 캐시 대상이 아니면 문장마다 따로
+        if pending:
+            indexes = list(pending.values())
+            classified = classify_batch([texts[group[0]] for group in indexes])
+            for group, result in zip(indexes, classified):
+                for i in group:
+                    results[i] = result
+            self.put_many([texts[group[0]] for group in indexes], classified)
+        return results
@@ -0,0 +1,117 @@
+import os  # 환경변수 접근을 위한 모듈
+import json  # ONNX export 디렉토리의 config.json(id2label) 읽기
+import time  # 모델 로드 시간 측정용
+from typing import List
+
+import numpy as np  # ONNX 입력 패딩 / softmax 계산
+
+# 감정 분석 백엔드 설정
+SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL", "distilbert/distilbert-base-uncased-finetuned-sst-2-english")
+ANALYZER_BACKEND = os.getenv("ANALYZER_BACKEND", "torch")  # torch(기존 pipeline) | onnx(int8 양자화 + onnxruntime)
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "/app/onnx")  # export_onnx.py 결과 디렉토리 (model-int8.onnx + tokenizer)
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "model-int8.onnx")
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "1"))  # onnxruntime 연산 내부 병렬 스레드 수
+ANALYZER_BUCKET_SIZE = int(os.getenv("ANALYZER_BUCKET_SIZE", "16"))  # 길이순 정렬 후 한 번에 패딩할 문장 수
+MAX_LENGTH = 512  # DistilBERT 최대 토큰 길이
+
+
+def length_buckets(lengths: List[int], bucket_size: int = ANALYZER_BUCKET_SIZE) -> List[List[int]]:
+    # 길이가 비슷한 문장끼리 묶어 패딩 낭비 최소화 (원래 인덱스 목록으로 반환)
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    return [order[i:i + bucket_size] for i in range(0, len(order), bucket_size)]
+
+
+class TorchSentimentBackend:  # 기존 transformers pipeline (fp32 PyTorch)
+    name = "torch"
+
+    def __init__(self, model_name: str = SENTIMENT_MODEL):
+        import torch  # torch 백엔드에서만 무거운 import 수행
+        from transformers import pipeline
+
+        self.torch = torch
+        self.classifier = pipeline("sentiment-analysis", model=model_name, )
+
+    def classify(self, text: str) -> dict:
+        return self.classifier(text)[0]
+
+    def classify_batch(self, texts: List[str]) -> List[dict]:  # 길이 버킷 + 동적 패딩으로 한 번에 분류
+        tokenizer, model = self.classifier.tokenizer, self.classifier.model
+        encoded = tokenizer(texts, truncation=True)  # 패딩 없이 토큰화 → 문장별 실제 길이 확보
+        ids, masks = encoded["input_ids"], encoded["attention_mask"]
+        results = [None] * len(texts)
+        for bucket in length_buckets([len(x) for x in ids]):
+            # 버킷 내 최장 문장 길이까지만 패딩 (고정 max_length 패딩 대신)
+            batch = tokenizer.pad({"input_ids": [ids[i] for i in bucket],
+                                   "attention_mask": [masks[i] for i in bucket]}, return_tensors="pt")
+            with self.torch.inference_mode():
+                probs = model(**batch).logits.softmax(dim=-1)
+            scores, labels = probs.max(dim=-1)
+            for i, score, label in zip(bucket, scores.tolist(), labels.tolist()):
+                results[i] = {"label": model.config.id2label[label], "score": score}
+        return results
+
+
+class OnnxSentimentBackend:  # export_onnx.py로 만든 int8 동적 양자화 모델을 onnxruntime으로 실행
+    name = "onnx"
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, intra_op_threads: int = ONNX_INTRA_OP_THREADS):
+        import onnxruntime as ort  # torch/transformers 없이 추론 (빠른 기동, 낮은 RSS)
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(os.path.join(model_dir, ONNX_MODEL_FILE), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(MAX_LENGTH)
+        self.tokenizer.no_padding()  # 패딩은 버킷 단위로 직접 수행
+        with open(os.path.join(model_dir, "config.json"), encoding="utf-8") as f:
+            self.id2label = {int(k): v for k, v in json.load(f)["id2label"].items()}
+
+    def classify(self, text: str) -> dict:
+        return self.classify_batch([text])[0]
+
+    def classify_batch(self, texts: List[str]) -> List[dict]:
+        encodings = self.tokenizer.encode_batch(texts)
+        results = [None] * len(texts)
+        for bucket in length_buckets([len(e.ids) for e in encodings]):
+            width = max(len(encodings[i].ids) for i in bucket)
+            input_ids = np.zeros((len(bucket), width), dtype=np.int64)  # [PAD] id = 0
+            attention_mask = np.zeros((len(bucket), width), dtype=np.int64)
+            for row, i in enumerate(bucket):
+                n = len(encodings[i].ids)
+                input_ids[row, :n] = encodings[i].ids
+                attention_mask[row, :n] = 1
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            logits = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+            logits = logits - logits.max(axis=-1, keepdims=True)  # 수치 안정화된 softmax
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=-1, keepdims=True)
+            for row, i in enumerate(bucket):
+                label = int(probs[row].argmax())
+                results[i] = {"label": self.id2label[label], "score": float(probs[row, label])}
+        return results
+
+
+BACKENDS = {
+    TorchSentimentBackend.name: TorchSentimentBackend,
+    OnnxSentimentBackend.name: OnnxSentimentBackend,
+}
+
+
+def load_backend(name: str = ANALYZER_BACKEND):
+    # 선택한 백엔드 로드, 실패 시 기존 torch pipeline으로 폴백
+    started = time.perf_counter()
+    if name != TorchSentimentBackend.name:
+        try:
+            backend = BACKENDS[name]()
+            print(f"[Analyzer] 🧠 {name} 백엔드 로드 완료 ({time.perf_counter() - started:.2f}s)")
+            return backend
+        except Exception as e:
+            print(f"[Analyzer] ⚠️ {name} 백엔드 로드 실패 → torch pipeline으로 폴백: {e}")
+    backend = TorchSentimentBackend()
+    print(f"[Analyzer] 🧠 torch 백엔드 로드 완료 ({time.perf_counter() - started:.2f}s)")
+    return backend
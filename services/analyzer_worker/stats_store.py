@@ -0,0 +1,25 @@
+import os
+import time
+
+import redis
+
+# 감정 통계 집계: 분석 결과 하나당 analyzer에서 한 번만 Redis 원자 증가 (fastapi 파드 수와 무관)
+STATS_TOTAL_KEY = "stats:total"  # 전체 누적 해시 {positive, negative}
+STATS_BUCKET_PREFIX = "stats:bucket:"  # 시간 버킷 해시 stats:bucket:<epoch // STATS_BUCKET_SECONDS>
+STATS_BUCKET_SECONDS = int(os.getenv("STATS_BUCKET_SECONDS", "10"))  # 버킷 크기 (1분/10분 창을 이 단위로 합산)
+STATS_BUCKET_TTL = int(os.getenv("STATS_BUCKET_TTL", "660"))  # 가장 긴 창(10분)보다 조금 길게 보관
+
+
+def label_field(label: str) -> str:
+    return "positive" if label == "POSITIVE" else "negative"
+
+
+def record(client: redis.Redis, label: str, ts: float = None):
+    # 전체 누적 + 현재 시간 버킷을 한 번의 왕복으로 HINCRBY (MULTI 없이 각 명령이 원자적)
+    field = label_field(label)
+    bucket = f"{STATS_BUCKET_PREFIX}{int((ts or time.time()) // STATS_BUCKET_SECONDS)}"
+    pipe = client.pipeline(transaction=False)
+    pipe.hincrby(STATS_TOTAL_KEY, field, 1)
+    pipe.hincrby(bucket, field, 1)
+    pipe.expire(bucket, STATS_BUCKET_TTL)
+    pipe.execute()
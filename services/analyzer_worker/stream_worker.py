@@ -0,0 +1,42 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))  # services/common 공용 모듈
+
+import worker_metrics
+from model_loader import mark_ready
+from stream_consumer import reply, run_consumers, text_field
+from analyzer_worker import (ANALYZER_BATCH_MAX_SIZE, build_result, format_result, get_backend, r, record_stats,
+                             sentiment_cache, sentiment_model)
+
+# Redis Streams 전송 모드 감정 분석 소비자: stream:analyzer → 분류 → 파드별 결과 스트림
+# 실행: python stream_worker.py (Celery 워커 대신)
+ANALYZER_STREAM = "stream:analyzer"
+ANALYZER_GROUP = "analyzer_workers"
+
+
+def handle(entries: list):
+    # XREADGROUP COUNT=ANALYZER_BATCH_MAX_SIZE 로 읽은 문장을 그대로 한 번에 배치 분류
+    texts = [text_field(fields, "text", "") for _, fields in entries]
+    traces = [worker_metrics.stamp(text_field(fields, "trace"), "analyzer_start") for _, fields in entries]
+    for trace in traces:
+        worker_metrics.observe_queue_wait(trace)
+    print(f"[Analyzer] 🎙️ 스트림 텍스트 {len(texts)}개 수신")
+    with worker_metrics.timed("inference"):  # 캐시에 없는 문장만 분류
+        results = sentiment_cache.classify_batch(texts, get_backend().classify_batch)
+    for (_, fields), text, result, trace in zip(entries, texts, results, traces):
+        record_stats(result)
+        reply_to = text_field(fields, "reply_to")
+        if not reply_to:
+            continue
+        session_id = text_field(fields, "session", "")
+        trace = worker_metrics.stamp(trace, "analyzer_end")
+        reply(r, reply_to, {"kind": "result", "session": session_id,
+                            "data": build_result(text, result, session_id, trace)})
+        print(f"[Analyzer] ✅ 결과 전송 완료: {format_result(text, result)}")
+
+
+if __name__ == "__main__":
+    sentiment_model.warm_up()  # 모델 로드 + 더미 추론 후 소비 시작
+    mark_ready()
+    worker_metrics.start(r, [(ANALYZER_STREAM, ANALYZER_GROUP)])
+    run_consumers(r, ANALYZER_STREAM, ANALYZER_GROUP, handle, count=ANALYZER_BATCH_MAX_SIZE)
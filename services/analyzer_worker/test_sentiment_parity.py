@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+# torch pipeline(기존) vs int8 ONNX(export_onnx.py) 감정 분석 결과 일치 검사
+# export 결과(ONNX_MODEL_DIR/model-int8.onnx)나 torch 모델을 받을 수 없으면 건너뜀
+#   python export_onnx.py --output /tmp/onnx && ONNX_MODEL_DIR=/tmp/onnx python -m pytest -q test_sentiment_parity.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MIN_AGREEMENT = 0.95  # 라벨 일치율 하한
+MAX_SCORE_DIFF = 0.05  # 라벨이 같은 문장의 점수 차이 상한
+
+# 긍정/부정/애매한 문장 혼합 (bench/bench_sentiment_backends.py도 같은 목록 사용)
+PARITY_TEXTS = [
+    "yes",
+    "thank you so much",
+    "great",
+    "this is terrible",
+    "I really enjoyed the presentation today",
+    "this is not what I expected at all and I am quite disappointed",
+    "the studio arrived late but the sound quality was great",
+    "could you please repeat the last part of the question",
+    "honestly the whole experience was frustrating from start to finish",
+    "I love it",
+    "I hate waiting in line",
+    "it was fine I guess",
+    "nobody answered my question",
+    "best concert of the year",
+    "the microphone keeps cutting out",
+    "okay",
+]
+
+
+@pytest.fixture(scope="module")
+def backends():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    pytest.importorskip("transformers")
+    import sentiment_backend
+    if not os.path.exists(os.path.join(sentiment_backend.ONNX_MODEL_DIR, sentiment_backend.ONNX_MODEL_FILE)):
+        pytest.skip(f"ONNX export 없음 ({sentiment_backend.ONNX_MODEL_DIR}, export_onnx.py로 생성)")
+    try:
+        torch_backend = sentiment_backend.TorchSentimentBackend()
+    except OSError as e:  # 모델 캐시도 네트워크도 없음
+        pytest.skip(f"torch 모델 로드 불가: {e}")
+    return torch_backend, sentiment_backend.OnnxSentimentBackend()
+
+
+def test_onnx_matches_torch(backends):
+    torch_backend, onnx_backend = backends
+    pairs = list(zip(torch_backend.classify_batch(PARITY_TEXTS), onnx_backend.classify_batch(PARITY_TEXTS)))
+    mismatches = [(text, a, b) for text, (a, b) in zip(PARITY_TEXTS, pairs) if a["label"] != b["label"]]
+    assert 1 - len(mismatches) / len(pairs) >= MIN_AGREEMENT, mismatches
+    score_diff = max((abs(a["score"] - b["score"]) for a, b in pairs if a["label"] == b["label"]), default=0.0)
+    assert score_diff <= MAX_SCORE_DIFF
+
+
+def test_batch_matches_single(backends):
+    # 길이 버킷 + 동적 패딩 배치 분류가 문장별 분류와 같은 결과인지 (두 백엔드 모두)
+    for backend in backends:
+        batch = backend.classify_batch(PARITY_TEXTS)
+        for text, result in zip(PARITY_TEXTS, batch):
+            single = backend.classify(text)
+            assert single["label"] == result["label"]
+            assert single["score"] == pytest.approx(result["score"], abs=1e-3)
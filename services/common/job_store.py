@@ -0,0 +1,23 @@
+import os
+import json
+
+# 오프라인 작업 (/jobs) 구간 결과 기록 (stt_worker / analyzer_worker 공용, services/common)
+# job:<id>:segments 해시에 구간 번호 → 결과 JSON (재시도로 같은 구간이 두 번 와도 덮어써서 한 번만 셈)
+# fastapi(jobs.py)는 HLEN으로 진행률을 보고, 음성이 없거나 필터링된 구간도 빈 텍스트로 기록해 작업이 끝나도록 함
+JOB_TTL = int(os.getenv("JOB_TTL", "86400"))  # fastapi jobs.py와 같은 값
+JOB_KEY_PREFIX = "job:"
+
+
+def record_segment(client, job: dict, text: str = "", result: dict = None):
+    # client: 동기 redis 클라이언트, job: {"id", "index", "start", "end"} (fastapi가 구간마다 붙여 보냄)
+    segment = {"index": job["index"], "start": job["start"], "end": job["end"], "text": text or ""}
+    if result:
+        segment["label"], segment["score"] = result["label"], float(result["score"])
+    key = f"{JOB_KEY_PREFIX}{job['id']}:segments"
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.hset(key, str(job["index"]), json.dumps(segment, ensure_ascii=False))
+        pipe.expire(key, JOB_TTL)
+        pipe.execute()
+    except Exception as e:
+        print(f"[Job] ❌ 구간 결과 기록 실패 ({job['id']} #{job['index']}): {e}")
@@ -0,0 +1,155 @@
+import gc
+import os
+import time
+import threading
+
+from prometheus_client import Gauge
+
+# 워커 모델 로딩 (stt_worker / analyzer_worker 공용, services/common)
+# - import 시점이 아니라 워커 기동(worker_init) 시 부모 프로세스에서 한 번 로드
+# - prefork 자식은 fork 시점의 가중치 페이지를 copy-on-write로 공유 (로드 직후 gc.freeze로 GC가 페이지를 건드리지 않게)
+# - 작업을 받기 전에 더미 추론으로 프리워밍, 끝나면 READY_FILE 생성 (readinessProbe가 확인)
+# - prefork면 자식마다 프리워밍이 끝날 때 CHILD_READY_DIR에 pid 파일을 남기고, 부모는 풀 크기만큼 모이면 READY_FILE 생성
+READY_FILE = os.getenv("READY_FILE", "/tmp/worker-ready")
+CHILD_READY_DIR = f"{READY_FILE}.children"
+MODEL_PREWARM = os.getenv("MODEL_PREWARM", "1") == "1"
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "1") == "1"  # 0이면 prefork 자식마다 따로 로드 (비교용)
+
+startup_seconds = Gauge("worker_startup_seconds", "프로세스 시작 → 단계 완료까지 걸린 시간 (load, prewarm, ready)",
+                        ["phase"], multiprocess_mode="max")  # prefork: 가장 늦게 끝난 자식 기준
+_imported_at = time.time()
+_loaders = []  # 이 프로세스의 모든 모델 (fused_worker는 whisper + 감정 분석 두 개)
+
+
+def process_started_at() -> float:
+    # /proc/self/stat의 starttime(부팅 후 clock tick)과 /proc/uptime의 차이 = 프로세스 나이, 읽을 수 없으면 이 모듈 import 시각
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return _imported_at
+
+
+STARTED_AT = process_started_at()  # 모듈 전역이라 prefork 자식도 부모(워커) 시작 시각 기준으로 기록
+
+
+def prefork_children(worker) -> int:
+    # worker_init sender(WorkController): prefork면 준비 신호 전에 프리워밍을 기다릴 자식 수, 아니면 0
+    pool = getattr(worker, "pool_cls", None)
+    if "prefork" not in (getattr(pool, "__module__", None) or str(pool)):
+        return 0
+    autoscale = getattr(worker, "autoscale", None)  # (max, min): 시작 시 min개만 fork
+    return (autoscale[1] if autoscale else getattr(worker, "concurrency", 0)) or 1
+
+
+def record(phase: str):
+    elapsed = time.time() - STARTED_AT
+    startup_seconds.labels(phase=phase).set(elapsed)
+    return elapsed
+
+
+class ModelLoader:  # 모델 하나의 로드 / 프리워밍 상태 (get()은 스크립트·벤치용 지연 로드 경로도 겸함)
+    def __init__(self, name: str, load, prewarm=None, fork_safe=True):
+        self.name = name
+        self.load = load  # () → 모델
+        self.prewarm = prewarm  # 모델 → None (더미 추론)
+        self.fork_safe = fork_safe  # bool 또는 모델 → bool (False면 prefork 자식에서 다시 로드)
+        self.model = None
+        self.warm = False
+        self.ready = False
+        self.lock = threading.Lock()
+        _loaders.append(self)
+
+    def get(self):
+        if self.model is None:
+            with self.lock:
+                if self.model is None:
+                    started = time.perf_counter()
+                    self.model = self.load()
+                    elapsed = record("load")
+                    print(f"[Model] 📦 {self.name} 로드 {time.perf_counter() - started:.2f}s (시작 후 {elapsed:.1f}s)")
+        return self.model
+
+    def preload(self):
+        # 부모 프로세스에서 fork 전에 호출: 로드 중 생긴 객체를 영구 세대로 옮겨 자식 GC가 공유 페이지를 복사하지 않게 함
+        # 부모에서는 추론하지 않음 (torch/OpenMP 스레드 풀이 fork 전에 생기지 않도록 프리워밍은 자식에서)
+        if not MODEL_PRELOAD:
+            return
+        self.get()
+        gc.collect()
+        gc.freeze()
+
+    def after_fork(self):
+        # prefork 자식(worker_process_init): fork 후 쓸 수 없는 모델이면 다시 로드, 그 다음 자식마다 프리워밍
+        fork_safe = self.fork_safe(self.model) if callable(self.fork_safe) else self.fork_safe
+        if not fork_safe:
+            self.model = None
+        self.warm = False
+        self.warm_up()
+
+    def warm_up(self):
+        model = self.get()  # 프리워밍을 끄더라도 준비 신호 전에 로드는 끝냄
+        if not self.warm and MODEL_PREWARM and self.prewarm:
+            started = time.perf_counter()
+            self.prewarm(model)
+            self.warm = True
+            elapsed = record("prewarm")
+            print(f"[Model] 🔥 {self.name} 프리워밍 {time.perf_counter() - started:.2f}s (시작 후 {elapsed:.1f}s)")
+        self.ready = True
+
+    def startup(self, prefork: bool = False):
+        # worker_ready(부모 프로세스): prefork면 프리워밍은 자식의 worker_process_init에서 (완료 여부는 mark_ready가 확인)
+        if not prefork:
+            self.warm_up()
+        self.ready = True
+
+
+def clear_ready():
+    try:
+        os.remove(READY_FILE)
+    except FileNotFoundError:
+        pass
+    os.makedirs(CHILD_READY_DIR, exist_ok=True)
+    for name in os.listdir(CHILD_READY_DIR):  # 이전 실행의 자식 기록 정리
+        try:
+            os.remove(os.path.join(CHILD_READY_DIR, name))
+        except FileNotFoundError:
+            pass
+
+
+def mark_child_ready():
+    # prefork 자식(worker_process_init): 이 프로세스의 모든 모델 프리워밍이 끝나면 pid 파일로 부모에게 알림
+    if not all(loader.ready for loader in _loaders):
+        return
+    os.makedirs(CHILD_READY_DIR, exist_ok=True)
+    with open(os.path.join(CHILD_READY_DIR, str(os.getpid())), "w") as f:
+        f.write(f"{record('prewarm'):.3f}\n")
+
+
+def mark_ready(children: int = 0):
+    # children: prefork 자식 수 → 자식이 모두 프리워밍을 끝낼 때까지 백그라운드에서 기다린 뒤 준비 신호
+    if not all(loader.ready for loader in _loaders):  # 같은 프로세스의 다른 모델이 아직 준비 전
+        return
+    if children:
+        threading.Thread(target=_wait_children, args=(children,), name="ready-wait", daemon=True).start()
+        return
+    _write_ready()
+
+
+def _wait_children(children: int):
+    reported = 0
+    while reported < children:
+        time.sleep(0.2)
+        reported = len(os.listdir(CHILD_READY_DIR)) if os.path.isdir(CHILD_READY_DIR) else 0
+    print(f"[Model] 🔥 prefork 자식 {reported}/{children}개 프리워밍 완료")
+    _write_ready()
+
+
+def _write_ready():
+    elapsed = record("ready")
+    with open(READY_FILE, "w") as f:
+        f.write(f"{elapsed:.3f}\n")
+    print(f"[Model] ✅ 작업 수신 준비 완료 (시작 후 {elapsed:.1f}s, {READY_FILE})")
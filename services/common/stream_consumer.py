@@ -0,0 +1,115 @@
+import os
+import time
+import socket
+import threading
+
+import redis
+
+# Redis Streams 소비자 설정 (PIPELINE_TRANSPORT=streams 일 때 Celery 대신 사용, stt_worker / analyzer_worker 공용)
+STREAM_MAXLEN = int(os.getenv("STREAM_MAXLEN", "10000"))  # XADD 시 스트림 최대 길이 (근사 트리밍)
+STREAM_BLOCK_MS = int(os.getenv("STREAM_BLOCK_MS", "5000"))  # XREADGROUP 대기 시간
+STREAM_CLAIM_IDLE_MS = int(os.getenv("STREAM_CLAIM_IDLE_MS", "60000"))  # 이 시간 넘게 ACK 안 된 항목은 죽은 소비자 것으로 보고 회수
+STREAM_CLAIM_INTERVAL = float(os.getenv("STREAM_CLAIM_INTERVAL", "30"))  # XAUTOCLAIM 주기 (초)
+STREAM_RESULT_TTL = int(os.getenv("STREAM_RESULT_TTL", "3600"))  # 파드별 결과 스트림 만료 (파드가 사라져도 정리)
+STREAM_RETRY_MAX_SECONDS = float(os.getenv("STREAM_RETRY_MAX_SECONDS", "30"))  # Redis 오류 시 재시도 간격 상한 (1초부터 두 배씩)
+
+
+def ensure_group(client: redis.Redis, stream: str, group: str):
+    # 소비자 그룹 생성 (이미 있으면 무시, 스트림이 없으면 같이 생성)
+    try:
+        client.xgroup_create(stream, group, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def decode_fields(fields: dict) -> dict:
+    # 필드 이름만 str로 변환 (값은 오디오 bytes일 수 있어 그대로 둠)
+    return {(k.decode() if isinstance(k, bytes) else k): v for k, v in fields.items()}
+
+
+def text_field(fields: dict, name: str, default=None):
+    value = fields.get(name)
+    if value is None:
+        return default
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def reply(client: redis.Redis, stream: str, fields: dict):
+    # fastapi 파드별 결과 스트림에 추가 (길이 제한 + 만료 갱신)
+    pipe = client.pipeline(transaction=False)
+    pipe.xadd(stream, fields, maxlen=STREAM_MAXLEN, approximate=True)
+    pipe.expire(stream, STREAM_RESULT_TTL)
+    pipe.execute()
+
+
+class StreamConsumer:  # XREADGROUP → handler → XACK 루프 + 주기적 XAUTOCLAIM으로 미처리 항목 회수
+    def __init__(self, client: redis.Redis, stream: str, group: str, handler, count: int = 1, name: str = None):
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.handler = handler  # handler(entries) — entries: [(entry_id, fields)]
+        self.count = count
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.last_claim = 0.0
+        self.group_ready = False
+
+    def _handle(self, entries: list):
+        if not entries:
+            return
+        try:
+            self.handler([(entry_id, decode_fields(fields)) for entry_id, fields in entries])
+        except Exception as e:  # 처리 실패 항목도 ACK (같은 항목이 무한 재시도되는 것 방지)
+            print(f"[Stream] ❌ {self.stream} 처리 실패: {e}")
+        self.client.xack(self.stream, self.group, *[entry_id for entry_id, _ in entries])
+
+    def _claim(self):
+        # 다른(죽은) 소비자가 읽고 ACK하지 못한 항목을 가져와 다시 처리
+        self.last_claim = time.monotonic()
+        start = "0-0"
+        while True:
+            response = self.client.xautoclaim(self.stream, self.group, self.name, STREAM_CLAIM_IDLE_MS,
+                                              start_id=start, count=self.count)
+            start, entries = response[0], [e for e in response[1] if e[1]]  # 삭제(트리밍)된 항목은 fields가 비어 있음
+            if entries:
+                print(f"[Stream] ♻️ {self.stream} 미처리 항목 {len(entries)}개 회수")
+                self._handle(entries)
+            if start in (b"0-0", "0-0"):
+                return
+
+    def _poll(self):
+        if not self.group_ready:  # 처음 시작 / Redis 재시작으로 그룹이 사라졌을 때 다시 생성
+            ensure_group(self.client, self.stream, self.group)
+            self.group_ready = True
+            print(f"[Stream] ✅ {self.stream} 소비 시작 (group={self.group}, consumer={self.name})")
+        if time.monotonic() - self.last_claim >= STREAM_CLAIM_INTERVAL:
+            self._claim()
+        response = self.client.xreadgroup(self.group, self.name, {self.stream: ">"},
+                                          count=self.count, block=STREAM_BLOCK_MS)
+        for _, entries in response or []:
+            self._handle(entries)
+
+    def run(self):
+        # Redis 연결 끊김 / 타임아웃이 나도 소비를 멈추지 않고 간격을 늘려가며 재시도
+        # (XACK 전에 실패한 항목은 pending으로 남아 STREAM_CLAIM_IDLE_MS 뒤 XAUTOCLAIM으로 다시 처리)
+        backoff = 0.0
+        while True:
+            try:
+                self._poll()
+                backoff = 0.0
+            except redis.RedisError as e:
+                self.group_ready = False
+                backoff = min(max(backoff * 2, 1.0), STREAM_RETRY_MAX_SECONDS)
+                print(f"[Stream] ⚠️ {self.stream} Redis 오류: {e} → {backoff:.0f}초 후 재시도")
+                time.sleep(backoff)
+
+
+def run_consumers(client: redis.Redis, stream: str, group: str, handler, count: int = 1, threads: int = 1):
+    # 소비자 스레드 여러 개 실행 (스레드마다 이름이 다른 그룹 소비자)
+    base = f"{socket.gethostname()}-{os.getpid()}"
+    workers = [threading.Thread(target=StreamConsumer(client, stream, group, handler, count, f"{base}-{i}").run,
+                                daemon=True) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
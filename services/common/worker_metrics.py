@@ -0,0 +1,112 @@
+import os
+import glob
+import time
+import json
+import threading
+from contextlib import contextmanager
+
+from prometheus_client import CollectorRegistry, Gauge, Histogram, ProcessCollector, multiprocess, start_http_server
+
+# 워커 Prometheus 메트릭 (stt_worker / analyzer_worker 공용, services/common)
+# Celery 워커에는 HTTP 서버가 없으므로 prometheus_client 내장 서버를 METRICS_PORT로 띄움
+# prefork 풀(기본 prefork / WORKER_RUNTIME=auto)이면 추론은 자식 프로세스에서 일어나 부모의 서버가 그 값을 볼 수 없음
+# → PROMETHEUS_MULTIPROC_DIR 설정 시 멀티프로세스 모드: 프로세스마다 이 디렉토리의 mmap 파일에 기록하고 /metrics에서 합산
+#   (prometheus_client import 전에 정해져야 해서 환경변수로만 켬, 워커 이미지 Dockerfile에서 설정 / 디렉토리 생성, 워커마다 별도 디렉토리)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))  # 0이면 비활성
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+QUEUE_DEPTH_INTERVAL = float(os.getenv("QUEUE_DEPTH_INTERVAL", "5"))  # 대기열 길이 조회 주기 (초)
+
+stage_seconds = Histogram(
+    "worker_stage_seconds", "워커 단계별 처리 시간 (queue_wait, load, vad, inference, filter, publish)", ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+queue_depth = Gauge("worker_queue_depth", "처리 대기 작업 수 (celery: LLEN, streams: lag + pending)", ["queue"],
+                    multiprocess_mode="max")  # 부모 프로세스만 기록
+_started = False
+_lock = threading.Lock()
+
+
+def _clear_multiproc_dir():
+    # 워커 부모 프로세스 import 시점(fork 전): 이전 실행이 남긴 파일 정리 (이 프로세스가 이미 만든 파일은 유지)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(PROMETHEUS_MULTIPROC_DIR, "*.db")):
+        if not path.endswith(f"_{os.getpid()}.db"):
+            os.remove(path)
+
+
+if PROMETHEUS_MULTIPROC_DIR:
+    _clear_multiproc_dir()
+
+
+@contextmanager
+def timed(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.labels(stage=stage).observe(time.perf_counter() - started)
+
+
+def stamp(trace, name: str) -> dict:
+    # 파이프라인 추적 타임스탬프 (epoch 초) 기록, streams 필드로 온 JSON 문자열도 허용
+    if isinstance(trace, (str, bytes)):
+        try:
+            trace = json.loads(trace)
+        except ValueError:
+            trace = None
+    trace = dict(trace or {})
+    trace[name] = time.time()
+    return trace
+
+
+def observe_queue_wait(trace: dict):
+    # 직전 단계(fastapi 전송 / stt 종료) → 이 워커가 꺼낸 시각 (노드 간 시계 차이만큼 오차)
+    sent = trace.get("stt_end") or trace.get("send")
+    started = trace.get("analyzer_start") or trace.get("stt_start")
+    if sent and started:
+        stage_seconds.labels(stage="queue_wait").observe(max(0.0, started - sent))
+
+
+def queue_length(client, name: str, group: str = None) -> int:
+    if not group:  # Celery 리스트 큐
+        return client.llen(name)
+    for info in client.xinfo_groups(name):
+        group_name = info["name"].decode() if isinstance(info["name"], bytes) else info["name"]
+        if group_name == group:
+            lag = info.get("lag")  # Redis < 7 에는 lag 필드가 없음 → pending만
+            return int(lag or 0) + int(info["pending"])
+    return client.xlen(name)
+
+
+def _poll_queues(client, queues: list):
+    while True:
+        for name, group in queues:
+            try:
+                queue_depth.labels(queue=name).set(queue_length(client, name, group))
+            except Exception as e:
+                print(f"[Metrics] ⚠️ {name} 대기열 조회 실패: {e}")
+        time.sleep(QUEUE_DEPTH_INTERVAL)
+
+
+def start(client, queues: list):
+    # 메트릭 HTTP 서버 + 대기열 길이 조회 스레드 (프로세스당 한 번), queues: [(이름, 소비자 그룹 또는 None)]
+    global _started
+    with _lock:
+        if _started or METRICS_PORT <= 0:
+            return
+        _started = True
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # 부모 + 모든 자식 프로세스 값 합산
+        ProcessCollector(registry=registry)  # CPU / RSS는 부모 프로세스 기준 (멀티프로세스 모드에는 기본 수집기가 없음)
+        start_http_server(METRICS_PORT, registry=registry)
+    else:
+        start_http_server(METRICS_PORT)
+    threading.Thread(target=_poll_queues, args=(client, queues), name="queue-depth", daemon=True).start()
+    print(f"[Metrics] 📈 :{METRICS_PORT}/metrics 노출 (대기열 {', '.join(name for name, _ in queues)})")
+
+
+def mark_process_dead(**kwargs):
+    # prefork 자식 종료 시(worker_process_shutdown): live* 모드 게이지 파일 정리 → 죽은 자식 값이 합산에서 빠짐
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
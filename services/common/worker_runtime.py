@@ -0,0 +1,85 @@
+import os
+import sys
+import math
+
+from prometheus_client import Gauge
+
+# 워커 런타임 크기 결정 (stt_worker / analyzer_worker 공용, services/common)
+# WORKER_RUNTIME=auto 면 컨테이너 CPU 할당량(cgroup)으로 프로세스 수와 프로세스당 추론 스레드 수를 정함
+#   processes = floor(cpus / threads)  → prefork 풀 --concurrency (명령줄에 --pool/--concurrency를 주지 않아야 적용)
+#   threads   = WORKER_THREADS_PER_PROCESS (whisper.cpp / torch / onnxruntime / OpenMP 스레드를 모두 이 값으로 고정)
+# 파드 여러 개가 한 노드에 있어도 각자 할당량만큼만 스레드를 띄워 코어를 과점유하지 않음
+# manual(기본)이면 기존처럼 명령줄 설정 그대로, 스레드 수만 환경변수(WHISPER_THREADS 등)를 따름
+WORKER_RUNTIME = os.getenv("WORKER_RUNTIME", "manual")  # manual | auto
+WORKER_THREADS_PER_PROCESS = os.getenv("WORKER_THREADS_PER_PROCESS")  # 없으면 서비스별 기본값
+WORKER_PROCESSES = os.getenv("WORKER_PROCESSES")  # auto에서도 프로세스 수를 직접 지정하고 싶을 때
+THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")  # numpy / torch / onnxruntime 내부 풀
+
+runtime_setting = Gauge("worker_runtime", "워커 런타임 크기 (setting: cpus | processes | threads)", ["setting"],
+                        multiprocess_mode="max")
+
+
+def cgroup_cpus() -> float:
+    # 컨테이너 CPU 할당량 (limits.cpu), 제한이 없으면 이 프로세스가 쓸 수 있는 코어 수
+    cpus = float(len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1)
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:  # cgroup v2: "<quota> <period>" 또는 "max <period>"
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, int(quota) / int(period))
+    except (OSError, ValueError):
+        try:  # cgroup v1
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if quota > 0:
+                cpus = min(cpus, quota / period)
+        except (OSError, ValueError):
+            pass
+    return cpus
+
+
+def plan(cpus: float, threads: int, processes: int = None) -> tuple:
+    # (processes, threads): 할당량이 스레드 수보다 작으면 스레드를 줄이고 프로세스 하나로
+    threads = max(1, min(threads, math.floor(cpus) or 1))
+    if processes is None:
+        processes = max(1, math.floor(cpus / threads))
+    return processes, threads
+
+
+class Runtime:
+    def __init__(self, default_threads: int):
+        self.auto = WORKER_RUNTIME == "auto"
+        self.cpus = cgroup_cpus()
+        self.processes, self.threads = plan(
+            self.cpus, int(WORKER_THREADS_PER_PROCESS or default_threads),
+            int(WORKER_PROCESSES) if WORKER_PROCESSES else None)
+
+    def pin_threads(self, *names: str):
+        # 추론 라이브러리 import 전에 호출: 프로세스당 스레드 수 고정 (names: 서비스별 스레드 환경변수)
+        if not self.auto:
+            return
+        for name in THREAD_ENV + names:
+            os.environ[name] = str(self.threads)
+
+    def configure(self, celery):
+        # auto: prefork 풀, 슬롯(프로세스)마다 작업 하나씩만 미리 가져옴 (실행 중 1 + 대기 1)
+        # → 빈 슬롯 없이 돌면서 다른 워커 파드가 가져갈 작업을 붙잡아 두지 않음
+        runtime_setting.labels(setting="cpus").set(self.cpus)
+        if not self.auto:
+            return
+        celery.conf.update(worker_pool="prefork", worker_concurrency=self.processes, worker_prefetch_multiplier=1)
+        runtime_setting.labels(setting="processes").set(self.processes)
+        runtime_setting.labels(setting="threads").set(self.threads)
+        print(f"[Runtime] 🧮 CPU {self.cpus:g}개 → 프로세스 {self.processes} × 스레드 {self.threads}")
+        if self.processes > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            print("[Runtime] ⚠️ PROMETHEUS_MULTIPROC_DIR 없음 → prefork 자식의 메트릭은 /metrics에 나오지 않음 (worker_metrics.py)")
+
+    def after_fork(self):
+        # prefork 자식: 부모에서 이미 만든 torch 스레드 풀 크기를 다시 고정 (torch를 쓰는 경우만)
+        if not self.auto:
+            return
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            torch.set_num_threads(self.threads)
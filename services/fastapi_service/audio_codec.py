@@ -0,0 +1,75 @@
+import os
+import time
+import struct
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Counter, Histogram
+
+# 오디오 업링크 코덱: pcm(기존 16kHz int16 그대로) | opus(브라우저 WebCodecs 인코딩, 서버에서 디코딩)
+AUDIO_CODECS = ("pcm", "opus")
+SAMPLE_RATE = 16000
+OPUS_MAX_FRAME = SAMPLE_RATE * 120 // 1000  # opus 패킷 하나의 최대 길이 (120ms) → 디코딩 버퍼 크기
+OPUS_DECODE_WORKERS = int(os.getenv("OPUS_DECODE_WORKERS", "4"))  # 디코딩 스레드 수 (libopus 호출 중에는 GIL 해제)
+OPUS_MAX_PENDING = int(os.getenv("OPUS_MAX_PENDING", "64"))  # 대기 중인 디코딩 작업 상한, 넘으면 청크를 버림
+
+uplink_bytes = Counter("audio_uplink_bytes_total", "브라우저 → 서버 오디오 수신 바이트", ["codec"])
+decode_seconds = Histogram("audio_decode_seconds", "opus 청크(0.5초) 디코딩 CPU 시간",
+                           buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1))
+decode_dropped = Counter("audio_decode_dropped_total", "디코딩 풀이 가득 차 버린 opus 청크 수")
+decode_errors = Counter("audio_decode_errors_total", "프레이밍이 깨졌거나 디코딩에 실패해 버린 opus 청크 수")
+
+_executor = ThreadPoolExecutor(max_workers=OPUS_DECODE_WORKERS, thread_name_prefix="opus-decode")
+_pending = 0
+
+
+def split_packets(payload: bytes) -> list:
+    # 클라이언트 프레이밍: [uint16 LE 길이][opus 패킷] 반복 (0.5초마다 패킷 ~25개를 한 메시지로 전송)
+    # 길이 접두사가 남은 바이트를 넘거나 끝에 접두사 조각만 남으면 잘린 메시지 → ValueError (청크 전체를 버림)
+    packets, offset, view = [], 0, memoryview(payload)
+    while offset + 2 <= len(view):
+        (size,) = struct.unpack_from("<H", view, offset)
+        offset += 2
+        if offset + size > len(view):
+            raise ValueError(f"opus 패킷 길이 {size}B가 남은 페이로드 {len(view) - offset}B를 넘음")
+        packets.append(view[offset:offset + size])
+        offset += size
+    if offset != len(view):
+        raise ValueError("opus 프레임 끝에 불완전한 길이 접두사")
+    return packets
+
+
+class OpusStreamDecoder:  # 연결 하나의 opus 디코더 (디코더 상태가 패킷 순서에 의존하므로 사용자별로 생성)
+    def __init__(self):
+        import opuslib  # 선택 의존성: opus 업링크를 쓸 때만 필요 (libopus 시스템 라이브러리 포함)
+        self.decoder = opuslib.Decoder(SAMPLE_RATE, 1)
+
+    def decode(self, payload: bytes) -> bytes:
+        started = time.thread_time()
+        pcm = b"".join(self.decoder.decode(bytes(packet), OPUS_MAX_FRAME) for packet in split_packets(payload))
+        decode_seconds.observe(time.thread_time() - started)
+        return pcm
+
+
+def create_decoder(codec: str):
+    # pcm이면 None (디코딩 없음), opus 디코더 생성 실패(opuslib/libopus 없음) 시 예외 → 호출자가 연결 거부
+    if codec != "opus":
+        return None
+    return OpusStreamDecoder()
+
+
+async def decode_chunk(decoder: OpusStreamDecoder, payload: bytes):
+    # 이벤트 루프 밖(스레드 풀)에서 디코딩, 풀 대기열이 가득 차거나 잘못된 패킷이면 None (청크만 버리고 연결은 유지)
+    global _pending
+    if _pending >= OPUS_MAX_PENDING:
+        decode_dropped.inc()
+        return None
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, decoder.decode, payload)
+    except Exception as e:  # 프레이밍 오류(ValueError) / opuslib.OpusError (손상·잘린 패킷)
+        decode_errors.inc()
+        print(f"[FastAPI] ⚠️ opus 청크 디코딩 실패 → 버림: {e}")
+        return None
+    finally:
+        _pending -= 1
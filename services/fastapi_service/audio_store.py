@@ -0,0 +1,58 @@
+import os
+import time
+import uuid
+
+import redis
+
+# 오디오 페이로드 전송 방식: Celery 메시지에는 참조(ref)만 싣고 PCM은 한 번만 저장
+AUDIO_TRANSPORT = os.getenv("AUDIO_TRANSPORT", "redis")  # inline(기존 bytes 직접 전송) | redis | shm
+AUDIO_BLOB_TTL = int(os.getenv("AUDIO_BLOB_TTL", "60"))  # 처리되지 않은 오디오 자동 만료 (초)
+AUDIO_SHM_DIR = os.getenv("AUDIO_SHM_DIR", "/dev/shm/whisper-audio")  # 같은 노드 파드끼리 공유하는 tmpfs 경로
+AUDIO_KEY_PREFIX = "audio:"
+
+
+class AudioStore:  # fastapi → stt_worker 오디오 전달용 저장소 (쓰기 전용)
+    def __init__(self, redis_url: str, transport: str = AUDIO_TRANSPORT):
+        self.transport = transport
+        self.redis = redis.Redis.from_url(redis_url) if transport == "redis" else None
+        self.last_sweep = 0.0
+        if transport == "shm":
+            os.makedirs(AUDIO_SHM_DIR, exist_ok=True)
+
+    def put(self, pcm: bytes, ttl: int = AUDIO_BLOB_TTL):
+        # 저장 후 Celery 인자로 보낼 값 반환 (inline이면 bytes 그대로, 아니면 "redis:..." / "shm:..." 문자열)
+        if self.transport == "redis":
+            key = f"{AUDIO_KEY_PREFIX}{uuid.uuid4().hex}"
+            self.redis.set(key, pcm, ex=ttl)  # 워커가 처리를 마친 뒤 삭제, 처리하지 못한 blob은 TTL로 정리
+            return f"redis:{key}"
+        if self.transport == "shm":
+            path = os.path.join(AUDIO_SHM_DIR, f"{uuid.uuid4().hex}.pcm")
+            with open(path, "wb") as f:
+                f.write(pcm)
+            self._sweep()
+            return f"shm:{path}"
+        return pcm
+
+    def put_many(self, pcms: list, ttl: int = AUDIO_BLOB_TTL) -> list:
+        # 여러 청크를 한 번에 저장 (redis: SET 파이프라인 한 번의 왕복)
+        if self.transport != "redis":
+            return [self.put(pcm, ttl) for pcm in pcms]
+        keys = [f"{AUDIO_KEY_PREFIX}{uuid.uuid4().hex}" for _ in pcms]
+        pipe = self.redis.pipeline(transaction=False)
+        for key, pcm in zip(keys, pcms):
+            pipe.set(key, pcm, ex=ttl)
+        pipe.execute()
+        return [f"redis:{key}" for key in keys]
+
+    def _sweep(self):
+        # shm 모드는 TTL이 없으므로 오래된 파일을 주기적으로 삭제 (워커는 처리를 마친 뒤 삭제)
+        now = time.time()
+        if now - self.last_sweep < AUDIO_BLOB_TTL:
+            return
+        self.last_sweep = now
+        for entry in os.scandir(AUDIO_SHM_DIR):
+            try:
+                if now - entry.stat().st_mtime > AUDIO_BLOB_TTL:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
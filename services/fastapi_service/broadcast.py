@@ -0,0 +1,122 @@
+import os
+import time
+import asyncio
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# WebSocket 전송 설정: 연결마다 전송 큐 + 전용 writer 태스크 → 느린 브라우저가 다른 사용자 전송을 막지 않음
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))  # 연결당 대기 메시지 최대 개수
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))  # 한 번의 send가 이보다 오래 걸리면 끊음
+WS_MAX_DROPS = int(os.getenv("WS_MAX_DROPS", "32"))  # 큐가 넘쳐 버린 메시지가 이만큼 쌓이면 느린 소비자로 보고 끊음
+WS_SLOW_POLICY = os.getenv("WS_SLOW_POLICY", "drop_oldest")  # drop_oldest(오래된 메시지 버림) | disconnect(즉시 끊음)
+
+send_latency = Histogram(
+    "ws_send_latency_seconds", "메시지 큐 적재 → 브라우저 전송 완료까지 걸린 시간",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+queue_depth = Gauge("ws_send_queue_depth", "WebSocket 전송 대기 메시지 수", ["stat"])
+dropped_messages = Counter("ws_dropped_messages_total", "전송 큐가 가득 차 버린 메시지 수")
+slow_disconnects = Counter("ws_slow_consumer_disconnects_total", "느린 소비자로 판단해 끊은 연결 수", ["reason"])
+
+
+class Connection:  # WebSocket 하나의 전송 큐 + writer 태스크
+    def __init__(self, websocket, hub):
+        self.websocket = websocket
+        self.hub = hub
+        self.queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.closed = False
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, message, on_sent=None) -> bool:
+        # 논블로킹 적재, 큐가 가득 차면 정책에 따라 가장 오래된 메시지를 버리거나 연결을 끊음
+        # on_sent: 브라우저로 전송이 끝난 뒤 writer 태스크에서 호출 (파이프라인 추적 deliver 기록용)
+        if self.closed:
+            return False
+        item = (time.monotonic(), message, on_sent)
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            pass
+        dropped_messages.inc()
+        self.dropped += 1
+        if WS_SLOW_POLICY == "disconnect" or self.dropped >= WS_MAX_DROPS:
+            self.hub.kick(self, "queue_full")
+            return False
+        self.queue.get_nowait()  # 가장 오래된 메시지 버리고 최신 메시지 유지
+        self.queue.put_nowait(item)
+        return True
+
+    async def _write_loop(self):
+        try:
+            while True:
+                enqueued_at, message, on_sent = await self.queue.get()
+                if isinstance(message, bytes):
+                    send = self.websocket.send_bytes(message)
+                else:
+                    send = self.websocket.send_text(message)
+                await asyncio.wait_for(send, WS_SEND_TIMEOUT)
+                send_latency.observe(time.monotonic() - enqueued_at)
+                if on_sent:
+                    on_sent()
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            self.hub.kick(self, "send_timeout")
+        except Exception as e:
+            print(f"❌ WebSocket 전송 실패: {e}")
+            self.hub.kick(self, "send_error")
+
+    async def close(self):
+        self.closed = True
+        self.writer.cancel()
+
+
+class BroadcastHub:  # 연결된 WebSocket 전체에 대한 동시 fan-out
+    def __init__(self):
+        self.connections = {}  # websocket → Connection
+
+    def add(self, websocket) -> Connection:
+        connection = Connection(websocket, self)
+        self.connections[websocket] = connection
+        return connection
+
+    async def remove(self, websocket):
+        connection = self.connections.pop(websocket, None)
+        if connection:
+            await connection.close()
+
+    def send(self, websocket, message, on_sent=None) -> bool:
+        connection = self.connections.get(websocket)
+        return connection.enqueue(message, on_sent) if connection else False
+
+    def broadcast(self, message, origin=None, on_sent=None):
+        # 전송을 기다리지 않고 각 연결 큐에 적재만 함 (O(N) 논블로킹), 실제 전송은 연결별 writer가 동시에 수행
+        # origin: 결과를 만든 세션의 WebSocket → 그 연결로 전송이 끝났을 때만 on_sent 호출
+        for connection in list(self.connections.values()):
+            connection.enqueue(message, on_sent if connection.websocket is origin else None)
+        self.update_depth()
+
+    def kick(self, connection: Connection, reason: str):
+        # 느린 소비자 정리: 큐를 닫고 소켓을 끊음 → 수신 루프가 종료되며 사용자 정리
+        if connection.closed:
+            return
+        connection.closed = True
+        slow_disconnects.labels(reason=reason).inc()
+        print(f"[FastAPI] 🐢 느린 소비자 연결 종료 ({reason}, drop {connection.dropped}건)")
+        self.connections.pop(connection.websocket, None)
+        connection.writer.cancel()
+        asyncio.create_task(self._close_socket(connection.websocket))
+
+    @staticmethod
+    async def _close_socket(websocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1008), WS_SEND_TIMEOUT)
+        except Exception:
+            pass
+
+    def update_depth(self):
+        depths = [c.queue.qsize() for c in self.connections.values()]
+        queue_depth.labels(stat="total").set(sum(depths))
+        queue_depth.labels(stat="max").set(max(depths, default=0))
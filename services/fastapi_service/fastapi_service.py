@@ -1,22 +1,54 @@
 import os
+import time
+import uuid
 import asyncio
 from contextlib import asynccontextmanager 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from functools import partial  # 전송 완료 콜백에 결과 메시지 바인딩
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
-from prometheus_client import Counter, generate_latest, Gauge
+from prometheus_client import Counter, generate_latest, Gauge, Histogram
 from fastapi import Response
 from redis.asyncio import from_url as redis_from_url
 from celery import Celery
+from streaming import STREAMING_MODE, StreamingSession
+from audio_store import AUDIO_TRANSPORT, AudioStore
+from audio_codec import AUDIO_CODECS, create_decoder, decode_chunk, uplink_bytes
+from ingest import PcmRing, TaskSender
+from broadcast import BroadcastHub
+import protocol  # WebSocket 메시지 스키마 (JSON 바이너리 프레임)
+import tracing  # 청크별 단계 타임스탬프 → pipeline_stage_seconds 히스토그램
+from stats import StatsReader
+from stream_transport import PIPELINE_TRANSPORT, BackPressure, StreamTransport, consume_results
+from scheduler import FairScheduler  # 세션별 공정 스케줄링 + 오래된 청크 만료 + 입장 제어
+from jobs import JOB_AUDIO_TTL, JOB_QUEUE, AudioFormatError, JobRunner  # 녹음 파일 오프라인 전사 + 감정 분석 (/jobs)
 
 REDIS_HOST = os.getenv("REDIS_HOST", "redis" if os.getenv("DOCKER") else "localhost")
 REDIS_PORT = 6379
 redis_url = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
 celery = Celery("fastapi_service", broker=redis_url)
+audio_store = AudioStore(redis_url)  # PCM은 Redis/shm에 한 번만 저장하고 Celery 메시지에는 참조만 전달
+stream_transport = StreamTransport(redis_url)  # PIPELINE_TRANSPORT=streams: stream:stt 생산자 + 대기열 길이 조회
+backpressure = BackPressure(stream_transport)  # STT 대기열이 밀리면 청크를 버리거나 솎아냄
+# 세션별 큐 → 처리 대기 작업이 줄어든 만큼만 전송 스레드로 (한 세션이 stt_queue를 독차지하지 않음)
+stt_scheduler = FairScheduler(lambda task: task_sender.submit(task), backpressure)
+# 오프라인 작업 구간은 큐에서 오래 기다릴 수 있어 TTL을 따로 지정하는 Redis에 저장 (shm은 같은 노드 + 짧은 정리 주기 전제)
+job_audio_store = AudioStore(redis_url, "inline" if AUDIO_TRANSPORT == "inline" else "redis")
+job_runner = JobRunner(lambda tasks: send_job_segments(tasks))
+redis_client = None  # 파드 전체가 공유하는 비동기 Redis 연결 풀 (lifespan에서 생성)
+task_sender = None  # STT 작업 전송 스레드 (websocket_endpoint는 큐에 넣기만 함)
 
 connected_users = {}  # 현재 연결된 WebSocket 사용자 정보를 저장할 딕셔너리
-# 통계용 수치들
-positive_count = 0
-negative_count = 0
+sessions = {}  # 세션 id → WebSocket (스트리밍 중간 결과를 요청한 사용자에게만 전달)
+hub = BroadcastHub()  # 연결별 전송 큐 + writer 태스크로 결과/통계/인원 fan-out
+# 통계는 analyzer가 Redis에 집계 (모든 파드가 같은 값), 파드는 StatsReader로 캐시해서 읽기만 함
+stats_reader = None
+last_stats_frame = None  # 마지막으로 브로드캐스트한 통계 프레임 (새로 접속한 사용자에게 바로 전송)
+presence_dirty = False  # 접속/종료가 있었으면 다음 틱에 인원 수를 한 번만 브로드캐스트
+# 세션별 결과 채널(result:<session>) 패턴, 통계 브로드캐스트는 선택 + 주기 제한
+RESULT_PATTERN = "result:*"
+STATS_BROADCAST = os.getenv("STATS_BROADCAST", "1") == "1"
+STATS_INTERVAL = float(os.getenv("STATS_INTERVAL", "1.0"))  # 통계/인원 수는 이벤트마다가 아니라 이 주기로 한 번만 전송
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.25"))  # 이벤트 루프 지연 측정 주기 (초)
 # Prometheus 카운터 메트릭 정의
 http_requests = Counter("http_requests_total", "Total HTTP Requests")
 # Prometheus Gauge 메트릭 선언
@@ -25,6 +57,16 @@ positive_gauge = Gauge("emotion_positive_total", "👍 긍정 카운트")
 negative_gauge = Gauge("emotion_negative_total", "👎 부정 카운트")
 pos_percent_gauge = Gauge("emotion_positive_percent", "👍 긍정 비율")
 neg_percent_gauge = Gauge("emotion_negative_percent", "👎 부정 비율")
+window_gauge = Gauge("emotion_window_count", "최근 창(1m/10m) 감정 카운트", ["window", "emotion"])
+first_text_histogram = Histogram(
+    "stt_time_to_first_text_seconds", "세션 첫 오디오 수신 → 첫 텍스트 도착까지 걸린 시간",
+    buckets=(0.5, 1, 1.5, 2, 3, 4, 5, 7.5, 10, 15),
+)
+loop_lag_histogram = Histogram(
+    "event_loop_lag_seconds", "이벤트 루프 지연 (예약한 sleep보다 늦게 깨어난 시간)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+loop_lag_gauge = Gauge("event_loop_lag_last_seconds", "마지막으로 측정한 이벤트 루프 지연")
 
 # Redis pubsub 전역 선언
 pubsub = None
@@ -106,6 +148,7 @@ html = """
         <div id="people">연결 인원:0</div>
     </div>
     <div id="log"></div>
+    <div id="partial" style="padding: 0 10px; color: #888; font-style: italic;"></div>  <!-- 스트리밍 중간 결과 -->
 
     <div id="statsRow">                               <!-- 소음과 슬라이드로 감도 조절기능 추가 -->
         <div id="leftInfo">🔈 소음: <span id="currentEnergy">0</span></div>
@@ -122,15 +165,106 @@ html = """
         let ctx = null;
         let stream = null;
         let worklet = null; 
-        let audioBuffer = [];
         let lastSendTime = performance.now();
+        let codec = "pcm";
+        let encoder = null;  // WebCodecs opus 인코더 (codec=opus 일 때만)
+        let samplesEncoded = 0;
 
         const log = document.getElementById("log");
         const stats = document.getElementById("centerStat");
         const people = document.getElementById("people");
+        const partial = document.getElementById("partial");
         const button = document.getElementById("startButton");
+        const textDecoder = new TextDecoder();
         const isMobile = /Mobi|Android|iPhone/i.test(navigator.userAgent);
 
+        // 업링크 코덱: 페이지 주소에 ?codec=opus 를 붙이면 WebCodecs로 opus 인코딩 후 전송 (미지원 브라우저는 pcm)
+        const requestedCodec = new URLSearchParams(window.location.search).get("codec") === "opus" ? "opus" : "pcm";
+        const opusConfig = {
+            codec: "opus", sampleRate: 16000, numberOfChannels: 1, bitrate: 24000,
+            opus: { application: "voip", frameDuration: 20000 }  // 20ms 프레임
+        };
+
+        class PcmRing {  // 고정 크기 Int16Array 링 버퍼 (샘플을 JS 배열에 하나씩 push 하지 않음)
+            constructor(capacity) {
+                this.buf = new Int16Array(capacity);
+                this.start = 0;
+                this.length = 0;
+            }
+            push(chunk) {
+                const cap = this.buf.length;
+                const over = this.length + chunk.length - cap;
+                if (over > 0) {  // 전송이 밀려 가득 차면 가장 오래된 샘플부터 덮어씀
+                    this.start = (this.start + over) % cap;
+                    this.length -= over;
+                }
+                const end = (this.start + this.length) % cap;
+                const first = Math.min(chunk.length, cap - end);
+                this.buf.set(chunk.subarray(0, first), end);
+                this.buf.set(chunk.subarray(first), 0);
+                this.length += chunk.length;
+            }
+            drain() {
+                const out = new Int16Array(this.length);
+                const first = Math.min(this.length, this.buf.length - this.start);
+                out.set(this.buf.subarray(this.start, this.start + first));
+                out.set(this.buf.subarray(0, this.length - first), first);
+                this.start = (this.start + this.length) % this.buf.length;
+                this.length = 0;
+                return out;
+            }
+        }
+
+        class PacketBuffer {  // opus 패킷을 [uint16 LE 길이][패킷] 형식으로 이어붙이는 고정 크기 바이트 버퍼
+            constructor(capacity) {
+                this.bytes = new Uint8Array(capacity);
+                this.view = new DataView(this.bytes.buffer);
+                this.length = 0;
+            }
+            push(chunk) {  // EncodedAudioChunk
+                if (this.length + 2 + chunk.byteLength > this.bytes.length) return;  // 전송이 막혀 가득 차면 버림
+                this.view.setUint16(this.length, chunk.byteLength, true);
+                chunk.copyTo(this.bytes.subarray(this.length + 2, this.length + 2 + chunk.byteLength));
+                this.length += 2 + chunk.byteLength;
+            }
+            drain() {
+                const out = this.bytes.slice(0, this.length);
+                this.length = 0;
+                return out;
+            }
+        }
+
+        const pcmRing = new PcmRing(16000 * 2);  // 최대 2초 분량
+        const packets = new PacketBuffer(64 * 1024);
+
+        async function pickCodec() {  // opus 요청 + 브라우저 지원 시에만 opus
+            if (requestedCodec !== "opus" || !("AudioEncoder" in window)) return "pcm";
+            try {
+                return (await AudioEncoder.isConfigSupported(opusConfig)).supported ? "opus" : "pcm";
+            } catch (e) {
+                return "pcm";
+            }
+        }
+
+        function pushAudio(chunk) {  // worklet의 Int16Array 청크 (128 샘플)
+            if (!encoder) {
+                pcmRing.push(chunk);
+                return;
+            }
+            const data = new AudioData({
+                format: "s16", sampleRate: 16000, numberOfChannels: 1, numberOfFrames: chunk.length,
+                timestamp: Math.round(samplesEncoded * 1e6 / 16000), data: chunk
+            });
+            samplesEncoded += chunk.length;
+            encoder.encode(data);
+            data.close();
+        }
+
+        function drainAudio() {  // 0.5초마다 보낼 페이로드 (pcm: Int16Array, opus: 길이 접두 패킷 묶음), 없으면 null
+            const out = encoder ? packets.drain() : pcmRing.drain();
+            return out.length ? out : null;
+        }
+
         // 슬라이더와 관련된 DOM 요소들 정의
         const slider = document.getElementById("thresholdSlider");
         const energyDisplay = document.getElementById("currentEnergy");
@@ -158,25 +292,43 @@ html = """
 
         button.onclick = async function () {
             if (button.textContent.includes("Start")) {
-                ws = new WebSocket(resolveWebSocketURL("/ws"));  // WebSocket 인스턴스 생성
+                codec = await pickCodec();
+                ws = new WebSocket(resolveWebSocketURL(`/ws?codec=${codec}`));  // WebSocket 인스턴스 생성
                 ws.onopen = () => console.log("✅ WebSocket 연결 성공");  // WebSocket 연결 성공 시 처리
                 ws.onclose = () => console.log("❌ WebSocket 연결 종료");  // WebSocket 연결 종료 시 처리
                 ws.onerror = (e) => console.error("❌ WebSocket 오류 발생:", e);  // WebSocket 오류 발생 시 처리
 
+                ws.binaryType = "arraybuffer";  // 서버 메시지는 UTF-8 JSON 바이너리 프레임
                 ws.onmessage = function (event) {
-                    const data = event.data;
-                    if (data.startsWith("PEOPLE:")) {
-                        people.textContent = "연결 인원:" + data.replace("PEOPLE:", "");
-                        return;
-                    }
-                    if (data.startsWith("✅ Listener 통계 → ")) {
-                        stats.textContent = data.replace("✅ Listener 통계 → ", "");
-                        return;
+                    const msg = JSON.parse(typeof event.data === "string" ? event.data : textDecoder.decode(event.data));
+                    switch (msg.type) {
+                        case "presence":
+                            people.textContent = "연결 인원:" + msg.count;
+                            break;
+                        case "partial":  // 내 발화의 중간 결과
+                            partial.textContent = msg.text;
+                            break;
+                        case "transcript":  // 확정 텍스트 → 곧 감정 분석 결과로 표시되므로 중간 결과 줄을 비움
+                            partial.textContent = "";
+                            break;
+                        case "admission":  // STT 혼잡: reject면 곧 연결이 닫힘, degrade면 중간 결과 없이 느리게 처리
+                            partial.textContent = msg.decision === "reject"
+                                ? `⏳ 서버가 혼잡합니다 (예상 대기 ${msg.drain_seconds}s). 잠시 후 다시 시도해 주세요.`
+                                : `🐢 서버가 혼잡해 결과가 늦을 수 있습니다 (예상 대기 ${msg.drain_seconds}s)`;
+                            break;
+                        case "stats":
+                            stats.textContent = `👍${msg.positive}회${msg.positive_percent.toFixed(0)}%|` +
+                                `${msg.negative_percent.toFixed(0)}%${msg.negative}회 👎`;
+                            break;
+                        case "sentiment": {
+                            const positive = msg.label === "POSITIVE";
+                            const div = document.createElement("div");
+                            div.textContent = `${positive ? "👍 긍정" : "👎 부정"} [${(msg.score * 100).toFixed(0)}%] : ${msg.text}`;
+                            log.appendChild(div);
+                            log.scrollTop = log.scrollHeight;
+                            break;
+                        }
                     }
-                    const div = document.createElement("div");
-                    div.textContent = data;
-                    log.appendChild(div);
-                    log.scrollTop = log.scrollHeight;
                 };
 
                 try {
@@ -208,6 +360,15 @@ html = """
                     worklet?.port.postMessage({ type: "threshold", value: initialThreshold });
                     sensitivityLabel.textContent = (initialThreshold * 1000).toFixed(1);  // 정수형 감도 표기
 
+                    if (codec === "opus") {  // 인코딩된 패킷은 output 콜백에서 바이트 버퍼에 쌓임
+                        encoder = new AudioEncoder({
+                            output: (chunk) => packets.push(chunk),
+                            error: (e) => console.error("❌ opus 인코딩 오류:", e)
+                        });
+                        encoder.configure(opusConfig);
+                        samplesEncoded = 0;
+                    }
+
                     // 오디오 처리 및 energy 수신 처리
                     worklet.port.onmessage = (e) => {  // worklet에서 energy 데이터 수신 처리
                         if (e.data?.type === "energy") {// 메시지를 받았을 때
@@ -216,15 +377,13 @@ html = """
 
                         const now = performance.now();
                         if (e.data?.type !== "energy") { // 버퍼 넣기전에 energy 타입인지 확인
-                        const chunk = new Int16Array(e.data);
-                        audioBuffer.push(...chunk); //전개 연산자(Spread operator) chunk가 128프레임 배열이라 각 원소를 하나씩 푸쉬
-                            }
+                            pushAudio(new Int16Array(e.data));  // pcm 링 버퍼에 복사 또는 opus 인코더에 전달
+                        }
 
                         if (now - lastSendTime >= 500) {   // 0.5초 단위로 녹음
                             if (ws.readyState === WebSocket.OPEN) {
-                                const final = new Int16Array(audioBuffer);
-                                ws.send(final.buffer);  // audioBuffer를 Int16Array로 변환해 WebSocket으로 전송
-                                audioBuffer = [];
+                                const payload = drainAudio();
+                                if (payload) ws.send(payload.buffer);  // 모아둔 PCM 또는 opus 패킷 묶음을 WebSocket으로 전송
                                 lastSendTime = now;
                             }
                         }
@@ -236,9 +395,20 @@ html = """
                     console.error("❌ Audio 처리 중 오류 발생:", error);
                 }
             } else {
-                if (audioBuffer.length > 0 && ws && ws.readyState === WebSocket.OPEN) {
-                    const final = new Int16Array(audioBuffer);
-                    ws.send(final.buffer);  // audioBuffer를 Int16Array로 변환해 WebSocket으로 전송
+                if (encoder) {  // 인코더에 남은 프레임까지 패킷으로 받아둠
+                    try {
+                        await encoder.flush();
+                    } catch (e) {
+                        console.error("❌ opus flush 실패:", e);
+                    }
+                }
+                const payload = drainAudio();
+                if (payload && ws && ws.readyState === WebSocket.OPEN) {
+                    ws.send(payload.buffer);  // 남은 PCM/opus 데이터 전송
+                }
+                if (encoder) {
+                    encoder.close();
+                    encoder = null;
                 }
                 if (ws) {
                     ws.close();
@@ -252,7 +422,6 @@ html = """
                     stream.getTracks().forEach(t => t.stop());
                     stream = null;
                 }
-                audioBuffer = [];
                 button.textContent = "🎙️ Start";
                 console.log("🛑 마이크/연결 종료");
             }
@@ -305,16 +474,31 @@ html = """
 # FastAPI lifespan 함수 정의: 서버 시작/종료 타이밍에 실행되는 코드 정의
 @asynccontextmanager  # FastAPI 서버 수명주기(lifespan) 설정을 위한 데코레이터
 async def lifespan(app: FastAPI):  # 서버 시작 및 종료 시 수행할 비동기 함수 정의
-    global pubsub
+    global pubsub, stats_reader, redis_client, task_sender
     # 서버 시작 시: Redis 연결 및 pubsub 구독 설정
     redis = await redis_from_url(redis_url, encoding="utf-8", decode_responses=True)  # Redis 서버와 비동기 연결 설정
+    redis_client = redis  # WebSocket 연결마다 새 연결을 만들지 않고 이 풀을 공유
+    stats_reader = StatsReader(redis)
+    job_runner.client = redis
+    task_sender = TaskSender(send_stt_batch)  # Celery/Redis 전송은 이벤트 루프 밖 스레드에서 묶어서
+    task_sender.start()
     pubsub = redis.pubsub()  # Redis Pub/Sub 인스턴스 생성
-    await pubsub.subscribe("result_channel")  # Redis 채널 구독 시작
+    await pubsub.subscribe("result_channel", "stt_channel")  # Redis 채널 구독 시작 (결과 + 스트리밍 중간 결과)
+    await pubsub.psubscribe(RESULT_PATTERN)  # 세션별 결과 채널 (RESULT_ROUTING=session)
     asyncio.create_task(redis_subscriber())  # 백그라운드로 Redis 수신 태스크 실행
+    asyncio.create_task(stats_broadcaster())  # STATS_INTERVAL마다 Redis 통계로 메트릭 갱신 (+ 선택적 브로드캐스트)
+    asyncio.create_task(backpressure.run())  # STT 대기열 길이는 백그라운드에서 조회 (청크마다 Redis 왕복 없음)
+    asyncio.create_task(stt_scheduler.run())  # 처리 대기 작업이 줄어드는 만큼 세션별 큐에서 다시 전송
+    asyncio.create_task(monitor_event_loop())  # event_loop_lag_seconds 측정
+    if PIPELINE_TRANSPORT == "streams":  # 워커 결과는 이 파드 전용 결과 스트림으로 돌아옴 (재시작해도 유실 없음)
+        asyncio.create_task(consume_results(redis, handle_result_entry))
     yield
     # 서버 종료 시: 구독 해제 및 리소스 정리
-    await pubsub.unsubscribe("result_channel")  # 서버 종료 시 Redis 채널 구독 해제
+    await pubsub.unsubscribe("result_channel", "stt_channel")  # 서버 종료 시 Redis 채널 구독 해제
+    await pubsub.punsubscribe(RESULT_PATTERN)
     await pubsub.close()
+    await asyncio.to_thread(task_sender.stop)  # 대기 중인 STT 작업 전송 후 스레드 종료
+    await redis.close()
     print("[FastAPI] 🔒 Redis pubsub 정리 완료")
 
 
@@ -331,9 +515,40 @@ async def get():  # '/' 경로 처리 함수
 
 # 감정 분석 통계 API
 @app.get("/status")  # 감정 통계용 API
-def status():
-    # 상태 응답
-    return {"positive": positive_count, "negative": negative_count}
+async def status():
+    # 상태 응답: 전체 누적(positive/negative) + 최근 1분/10분 창, 모든 파드가 같은 Redis 집계를 반환
+    return await stats_reader.snapshot()
+
+
+# 오프라인 작업 API: 녹음 파일 업로드 → 구간별 병렬 전사 + 감정 분석 → 진행률 / 결과 조회
+#   curl --data-binary @meeting.wav "http://localhost:8000/jobs?name=meeting.wav"   (16bit PCM WAV 또는 16kHz raw PCM)
+@app.post("/jobs", status_code=202)
+async def create_job(request: Request, name: str = ""):
+    if PIPELINE_TRANSPORT == "streams":  # 구간 결과 기록은 Celery 워커 경로에만 있음
+        raise HTTPException(501, "오프라인 작업은 PIPELINE_TRANSPORT=celery 에서만 지원")
+    try:
+        job_id = await job_runner.upload(request.stream(), name)  # 본문을 받는 대로 파일에 저장
+    except AudioFormatError as e:  # 깨진 WAV 헤더 400, 16bit PCM이 아닌 WAV(WAVE_FORMAT_EXTENSIBLE 등) 415
+        raise HTTPException(e.status, str(e))
+    except ValueError as e:
+        raise HTTPException(413, str(e))
+    return {"id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}")  # 상태 / 진행률 (구간 수 기준)
+async def job_status(job_id: str):
+    job = await job_runner.status(job_id)
+    if job is None:
+        raise HTTPException(404, "작업 없음")
+    return job
+
+
+@app.get("/jobs/{job_id}/results")  # 구간 순서대로 전사 + 감정 분석 결과 (진행 중이면 끝난 구간까지)
+async def job_results(job_id: str):
+    job = await job_runner.results(job_id)
+    if job is None:
+        raise HTTPException(404, "작업 없음")
+    return job
 
 
 # Prometheus 메트릭 엔드포인트
@@ -346,107 +561,247 @@ def metrics():
 # WebSocket 엔드포인트 정의 - 오디오 수신 및 STT 큐 전송
 @app.websocket("/ws")  # WebSocket 연결 정의
 async def websocket_endpoint(websocket: WebSocket):  # 클라이언트 오디오 수신 및 STT 큐 전송 처리
-    # Redis 연결 확인
-    redis = await redis_from_url(redis_url)  # Redis 서버와 비동기 연결 설정
+    # Redis 연결 확인 (공유 연결 풀 사용)
     try:
-        await redis.ping()
+        await redis_client.ping()
     except Exception as e:
         print(f"❌Redis 연결 실패: {e}")
         await websocket.close()
         return
 
+    # 업링크 코덱: /ws?codec=opus 면 브라우저가 보낸 opus 패킷을 서버에서 PCM으로 디코딩
+    codec = websocket.query_params.get("codec", "pcm")
+    codec = codec if codec in AUDIO_CODECS else "pcm"
+    try:
+        decoder = create_decoder(codec)
+    except Exception as e:  # opuslib/libopus 미설치 등
+        print(f"[FastAPI] ❌ {codec} 디코더 생성 실패: {e}")
+        await websocket.close(code=1003)
+        return
+
+    # 입장 제어: STT 대기열 예상 소진 시간이 목표를 넘으면 거절(1013 Try Again Later) 또는 제한 입장
+    decision, drain = stt_scheduler.admit()
     # WebSocket 연결 수락 및 사용자 등록
     await websocket.accept()
-    connected_users[websocket] = {"buffer": bytearray(), "start_time": None}
+    if decision != "accept":
+        print(f"[FastAPI] 🚧 입장 {decision} (예상 STT 대기 {drain:.1f}s)")
+        await websocket.send_bytes(protocol.admission(decision, drain))
+        if decision == "reject":
+            await websocket.close(code=1013)
+            return
+    session_id = uuid.uuid4().hex  # 스트리밍 결과 라우팅용 세션 id
+    stt_scheduler.open(session_id, degraded=decision == "degrade")  # 제한 입장이면 낮은 가중치 + partial 생략
+    # 청크 모드 버퍼는 연결 시 한 번 할당하는 고정 크기 링 버퍼 (USER_BUFFER_SECONDS 초과분은 오래된 것부터 덮어씀)
+    connected_users[websocket] = {"buffer": PcmRing(), "start_time": None, "session": session_id,
+                                  "stream": StreamingSession(session_id) if STREAMING_MODE else None,
+                                  "degraded": decision == "degrade"}
+    sessions[session_id] = websocket
+    hub.add(websocket)
     active_users_gauge.set(len(connected_users))  # 실시간 유저 인원 반영
-    # 전체 인원 브로드캐스트
-    for user in connected_users:
-        await user.send_text(f"PEOPLE:{len(connected_users)}")
+    # 전체 인원은 다음 틱에 한 번만 브로드캐스트 (동시 접속이 몰려도 N² 전송이 되지 않음)
+    mark_presence()
+    if last_stats_frame:
+        hub.send(websocket, last_stats_frame)
 
     TIMEOUT_SECONDS = 3  # 4초 모아서 stt한테 바로 전달
 
     try:
         while True:
             audio_chunk = (await websocket.receive_bytes())  # 클라이언트로부터 오디오 청크 수신
+            received_at = time.time()  # 추적 기준 시각 (capture)
             user_state = connected_users.get(websocket)
             if not user_state:
                 break
+            uplink_bytes.labels(codec=codec).inc(len(audio_chunk))
+            if decoder:  # opus → PCM 디코딩은 스레드 풀에서 (이벤트 루프를 막지 않음), 풀이 밀리면 청크 버림
+                audio_chunk = await decode_chunk(decoder, audio_chunk)
+                if not audio_chunk:
+                    continue
+
+            if user_state["stream"]:  # 스트리밍 모드: 겹치는 윈도우로 partial/final 작업 전송
+                for task in user_state["stream"].feed(audio_chunk):
+                    # back-pressure 중이거나 제한 입장 세션이면 partial만 솎아냄 (final은 prompt 연결과 분석 결과에 필요)
+                    if task["mode"] == "final" or (not user_state["degraded"] and backpressure.admit(user_state)):
+                        send_stt_task(task, received_at)
+                continue
 
             buffer = user_state["buffer"]
             start_time = user_state["start_time"]
 
             if not start_time:
                 user_state["start_time"] = asyncio.get_event_loop().time()
+                user_state["captured_at"] = received_at  # 이 청크 버퍼의 첫 오디오 수신 시각
 
-            buffer.extend(audio_chunk)
+            buffer.write(audio_chunk)
 
             if (asyncio.get_event_loop().time() - user_state["start_time"] >= TIMEOUT_SECONDS):
-                print(f"[FastAPI] 🎯 사용자 {id(websocket)} → STT 전달, size: {len(buffer)}")
-                try:  # Celery를 통해 STT 작업 전송# 브라우저에서 Int16Array로 전처리된 raw PCM데이터를 그대로 수신
-                    celery.send_task("stt_worker.transcribe_audio", args=[bytes(buffer)], queue="stt_queue", )
-                except Exception as e:  # Celery 직렬화 호환성과 STT 입력 포맷의 효율성 위해 bytes()로 감싼 후 전송
-                    print(f"[FastAPI] ❌ Celery 전송 실패: {e}")
-                # 버퍼 및 타이머 초기화
-                connected_users[websocket] = {"buffer": bytearray(), "start_time": None}
+                if backpressure.admit(user_state):  # STT 대기열이 밀려 있으면 이 청크는 버림
+                    print(f"[FastAPI] 🎯 사용자 {id(websocket)} → STT 전달, size: {len(buffer)}")
+                    # 브라우저에서 Int16Array로 전처리된 raw PCM데이터를 그대로 수신, 결과는 이 세션으로 라우팅
+                    send_stt_task({"audio": buffer.take(), "session_id": session_id, "mode": "chunk"},
+                                  user_state["captured_at"])
+                # 버퍼 및 타이머 초기화 (버퍼는 재할당 없이 비우기만 함)
+                buffer.clear()
+                user_state["start_time"] = None
 
     except WebSocketDisconnect:  # WebSocket 연결 끊김 예외 처리
-        connected_users.pop(websocket, None)  # 연결끊기면 남은 잔여 버퍼 처리 없으면 None을 반환
+        pass
+    except RuntimeError as e:  # 느린 소비자로 판단되어 서버 쪽에서 먼저 끊은 경우
+        print(f"[FastAPI] 🔌 사용자 {id(websocket)} 연결 종료: {e}")
+    finally:  # 예상 못 한 예외로 끝나도 사용자 / 세션 / 전송 큐 / 스케줄러 정리
+        user_state = connected_users.pop(websocket, None)  # 연결끊기면 남은 잔여 버퍼 처리 없으면 None을 반환
+        sessions.pop(session_id, None)
+        await hub.remove(websocket)
+        if user_state and user_state["stream"]:  # 스트리밍 모드: 남은 윈도우를 final로 확정
+            for task in user_state["stream"].flush():
+                send_stt_task(task)
+        stt_scheduler.close(session_id)
         active_users_gauge.set(len(connected_users))  # 실시간 연결 유저 인원 반영
-        for user in connected_users:
-            await user.send_text(f"PEOPLE:{len(connected_users)}")
+        mark_presence()
+
+
+def send_stt_task(task: dict, captured_at: float = None):  # 이벤트 루프에서 호출: 세션별 큐에 넣기만 함 (I/O 없음)
+    task["trace"] = tracing.start(captured_at or time.time())
+    stt_scheduler.submit(task["session_id"], task)  # 차례가 되면 전송 스레드 큐로 (STT_SCHEDULER=fifo면 바로)
+
 
+def send_stt_batch(tasks: list):  # 전송 스레드: STT 작업 묶음 전송 (celery: stt_queue 태스크, streams: stream:stt 항목)
+    # AUDIO_TRANSPORT=inline이면 PCM bytes를 메시지에 직접 실음, redis면 SET 파이프라인 한 번
+    audios = audio_store.put_many([task.pop("audio") for task in tasks])
+    for task in tasks:
+        task["trace"]["send"] = time.time()
+    if PIPELINE_TRANSPORT == "streams":  # ticket 등록도 같은 파이프라인에서
+        stream_transport.send_stt_batch(list(zip(audios, tasks)))
+        return
+    # 전송 전에 ticket 등록 → 처리 대기 작업 수 = stt:inflight 중 만료 전 항목 (스케줄러 / 입장 제어)
+    stream_transport.track(tasks)
+    with celery.producer_or_acquire() as producer:  # 묶음 전체가 브로커 연결 하나를 재사용
+        for audio, task in zip(audios, tasks):
+            celery.send_task("stt_worker.transcribe_audio", args=[audio], kwargs=task, queue="stt_queue",
+                             producer=producer)
+
+
+def send_job_segments(tasks: list):  # 작업 실행 스레드: 구간 오디오 저장 + JOB_QUEUE 전송 (stt:inflight에는 넣지 않음)
+    audios = job_audio_store.put_many([task.pop("audio") for task in tasks], ttl=JOB_AUDIO_TTL)
+    with celery.producer_or_acquire() as producer:
+        for audio, task in zip(audios, tasks):
+            celery.send_task("stt_worker.transcribe_audio", args=[audio], kwargs=task, queue=JOB_QUEUE,
+                             producer=producer)
+
+
+def mark_presence():
+    global presence_dirty
+    presence_dirty = True
 
-# Redis PubSub 수신 및 감정 통계 계산 루프
+
+async def handle_stream_text(data: str):  # stt_channel: 세션별 partial/transcript 텍스트 처리
+    message = protocol.decode(data)
+    if not message:
+        return
+    websocket = sessions.get(message.get("session"))
+    user_state = connected_users.get(websocket)
+    if not user_state or not user_state["stream"]:
+        return
+    stream = user_state["stream"]
+    if not stream.on_text(message["mode"], message["text"], message["seq"]):
+        return  # 더 최신 결과가 이미 표시됨
+    latency = stream.take_first_text_latency()
+    if latency is not None:
+        first_text_histogram.observe(latency)
+        print(f"[FastAPI] ⏱️ 세션 {stream.session_id} 첫 텍스트까지 {latency:.2f}s")
+    # transcript를 받으면 브라우저는 중간 결과 줄을 비움 (곧 감정 분석 결과로 표시됨)
+    hub.send(websocket, protocol.stream_text(message), on_sent=partial(tracing.observe, message))
+
+
+# Redis PubSub 수신 및 결과 라우팅 루프
 async def redis_subscriber():  # Redis Pub/Sub 메시지 수신 및 처리 루프
-    global positive_count, negative_count  # 감정 분석 결과(긍정/부정) 전역 변수선언
     print("[FastAPI] ✅ Subscribed to result_channel")
 
     try:  # 개선된 이벤트 기반 처리 방식 (async for + listen)
         async for message in pubsub.listen():
-            if message.get("type") != "message":
+            kind = message.get("type")
+            if kind not in ("message", "pmessage"):
                 continue
 
+            channel = message.get("channel")
             data = message.get("data", "")
+            if channel == "stt_channel":  # 스트리밍 중간 결과는 요청 세션에게만 전달
+                await handle_stream_text(data)
+                continue
             print(f"[FastAPI] 📩 메시지 수신: {data}")
 
-            # 메시지를 모든 연결된 WebSocket 사용자에게 전송
-            for user in list(connected_users):
-                try:
-                    await user.send_text(data)
-                except Exception as e:
-                    print(f"❌ WebSocket 전송 실패: {e}")
-                    connected_users.pop(user, None)
-
-            # 감정 분석 결과 카운팅
-            if "긍정" in data:
-                positive_count += 1
-            elif "부정" in data:
-                negative_count += 1
-
-            total = positive_count + negative_count
-            if total:
-                pos_percent = (positive_count / total) * 100
-                neg_percent = (negative_count / total) * 100
-            else:  # 감정 분석 결과(긍정/부정) 카운터 초기화
-                pos_percent = neg_percent = 0
-
-            # 실시간 메트릭 갱신
-            positive_gauge.set(positive_count)
-            negative_gauge.set(negative_count)
-            pos_percent_gauge.set(pos_percent)
-            neg_percent_gauge.set(neg_percent)
-
-            stats = f"✅ Listener 통계 → 👍{positive_count}회{pos_percent:.0f}%|{neg_percent:.0f}%{negative_count}회 👎"
-            print(f"[FastAPI] 📊 {stats}")
-
-            for user in list(connected_users):
-                try:
-                    await user.send_text(stats)
-                except Exception:
-                    connected_users.pop(user, None)
+            if kind == "pmessage":  # result:<session> → 세션 id로 WebSocket 하나만 조회해서 전송 (O(1))
+                dispatch_result(channel.partition(":")[2], data)
+            else:  # result_channel (RESULT_ROUTING=broadcast): 모든 사용자 전송 큐에 적재
+                message = protocol.decode(data)
+                if message:  # 한 번 인코딩한 프레임을 모든 사용자에게 재사용, 추적은 결과를 만든 세션 전송 완료 시점
+                    hub.broadcast(protocol.sentiment(message), origin=sessions.get(message.get("session")),
+                                  on_sent=partial(tracing.observe, message))
     except asyncio.CancelledError:
         print("[FastAPI] 🔴 redis_subscriber 종료됨")
     except Exception as e:
         print(f"[FastAPI] ❌ 예외 발생: {e}")
 
 
+def dispatch_result(session_id: str, data: str):  # 세션 하나에만 결과 전송 (통계는 analyzer가 이미 집계)
+    websocket = sessions.get(session_id)
+    message = protocol.decode(data) if websocket else None
+    if message:
+        hub.send(websocket, protocol.sentiment(message), on_sent=partial(tracing.observe, message))
+
+
+async def handle_result_entry(fields: dict):  # PIPELINE_TRANSPORT=streams: 결과 스트림 항목 처리
+    if fields.get("kind") == "stream":  # partial/final 텍스트 (stt_channel 메시지와 같은 JSON)
+        await handle_stream_text(fields["data"])
+        return
+    print(f"[FastAPI] 📩 스트림 결과 수신: {fields['data']}")
+    dispatch_result(fields.get("session", ""), fields["data"])
+
+
+def update_stats_gauges(snapshot: dict):  # Redis 집계값으로 메트릭 갱신 (파드마다 같은 값)
+    positive_gauge.set(snapshot["positive"])
+    negative_gauge.set(snapshot["negative"])
+    pos_percent_gauge.set(snapshot["positive_percent"])
+    neg_percent_gauge.set(snapshot["negative_percent"])
+    for window, counts in snapshot["windows"].items():
+        window_gauge.labels(window=window, emotion="positive").set(counts["positive"])
+        window_gauge.labels(window=window, emotion="negative").set(counts["negative"])
+
+
+async def monitor_event_loop():  # 예약한 sleep보다 늦게 깨어난 만큼이 이벤트 루프가 막혀 있던 시간
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            lag = max(0.0, loop.time() - started - LOOP_LAG_INTERVAL)
+            loop_lag_histogram.observe(lag)
+            loop_lag_gauge.set(lag)
+    except asyncio.CancelledError:
+        print("[FastAPI] 🔴 monitor_event_loop 종료됨")
+
+
+async def stats_broadcaster():  # 고정 틱(STATS_INTERVAL)마다 인원/통계를 바뀐 경우에만 한 번씩 브로드캐스트
+    global presence_dirty, last_stats_frame
+    last = None
+    try:
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            if presence_dirty:
+                presence_dirty = False
+                hub.broadcast(protocol.presence(len(connected_users)))
+            try:
+                snapshot = await stats_reader.snapshot()
+            except Exception as e:
+                print(f"[FastAPI] ⚠️ 통계 조회 실패: {e}")
+                continue
+            update_stats_gauges(snapshot)
+            counts = (snapshot["positive"], snapshot["negative"])
+            if not STATS_BROADCAST or counts == last:
+                continue
+            last = counts
+            print(f"[FastAPI] 📊 통계 👍{counts[0]} 👎{counts[1]}")
+            last_stats_frame = protocol.stats(snapshot)
+            hub.broadcast(last_stats_frame)
+    except asyncio.CancelledError:
+        print("[FastAPI] 🔴 stats_broadcaster 종료됨")
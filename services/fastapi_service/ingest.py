@@ -0,0 +1,118 @@
+import os
+import time
+import queue
+import threading
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# STT 작업 적재: websocket_endpoint는 큐에 넣기만 하고 Redis/Celery 왕복은 전송 스레드가 묶어서 처리
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "1024"))  # 전송 대기 작업 최대 개수, 넘치면 버림
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "32"))  # 전송 스레드가 한 번에 묶어 보내는 작업 수
+INGEST_THREADS = int(os.getenv("INGEST_THREADS", "2"))  # 전송 스레드 수 (Redis 왕복 중에는 GIL 해제)
+USER_BUFFER_SECONDS = float(os.getenv("USER_BUFFER_SECONDS", "6"))  # 사용자별 PCM 버퍼 상한, 넘치면 오래된 오디오부터 덮어씀
+BYTES_PER_SECOND = 16000 * 2  # 16kHz int16 mono
+
+ingest_depth = Gauge("stt_ingest_queue_depth", "STT 전송 스레드 대기 작업 수")
+ingest_dropped = Counter("stt_ingest_dropped_total", "전송 큐가 가득 차 버린 STT 작업 수")
+ingest_batch_seconds = Histogram(
+    "stt_ingest_batch_seconds", "STT 작업 묶음 하나를 Redis/Celery로 보내는 데 걸린 시간",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+buffer_overflow = Counter("audio_buffer_overflow_bytes_total", "사용자 버퍼 상한을 넘어 덮어쓴 오디오 바이트")
+
+
+class PcmRing:  # 사용자별 고정 크기 PCM 링 버퍼 (연결 시 한 번 할당, 이후 크기가 늘지 않음)
+    def __init__(self, seconds: float = USER_BUFFER_SECONDS):
+        self.buf = bytearray(int(seconds * BYTES_PER_SECOND) & ~1)  # int16 경계 유지
+        self.start = 0
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def write(self, chunk: bytes):
+        cap = len(self.buf)
+        view = memoryview(chunk)
+        if len(view) > cap:  # 한 메시지가 버퍼보다 크면 마지막 cap 바이트만 유지
+            buffer_overflow.inc(len(view) - cap)
+            view = view[len(view) - cap:]
+        over = self.length + len(view) - cap
+        if over > 0:  # 가득 차면 가장 오래된 오디오부터 덮어씀
+            buffer_overflow.inc(over)
+            self.start = (self.start + over) % cap
+            self.length -= over
+        end = (self.start + self.length) % cap
+        first = min(len(view), cap - end)
+        self.buf[end:end + first] = view[:first]
+        self.buf[:len(view) - first] = view[first:]
+        self.length += len(view)
+
+    def take(self) -> bytes:
+        # 쌓인 오디오를 순서대로 꺼내고 비움 (STT 메시지로 나갈 bytes 한 번만 복사)
+        end = self.start + self.length
+        if end <= len(self.buf):
+            data = bytes(self.buf[self.start:end])
+        else:
+            data = bytes(self.buf[self.start:]) + bytes(self.buf[:end - len(self.buf)])
+        self.clear()
+        return data
+
+    def clear(self):
+        self.start = self.length = 0
+
+
+class TaskSender:  # 논블로킹 STT 작업 적재 + 전송 스레드 (작업을 묶어서 send_batch 한 번으로 전송)
+    def __init__(self, send_batch):
+        self.send_batch = send_batch  # list[dict] → None, 전송 스레드에서 호출 (블로킹 I/O 허용)
+        self.queue = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+        self.threads = []
+
+    def start(self):
+        for i in range(INGEST_THREADS):
+            thread = threading.Thread(target=self._run, name=f"stt-ingest-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        # 종료 시 남은 작업을 보내고 스레드 정리 (스레드마다 종료 표시 하나)
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def submit(self, task: dict) -> bool:
+        # 이벤트 루프에서 호출: 블로킹 없이 큐에 넣기만 함, 가득 차면 버림
+        try:
+            self.queue.put_nowait(task)
+        except queue.Full:
+            ingest_dropped.inc()
+            return False
+        ingest_depth.set(self.queue.qsize())
+        return True
+
+    def _run(self):
+        while True:
+            task = self.queue.get()
+            if task is None:
+                return
+            batch = [task]
+            stop = False
+            while len(batch) < INGEST_BATCH_SIZE:  # 이미 쌓여 있는 작업만 추가로 묶음 (기다리지 않음)
+                try:
+                    task = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if task is None:
+                    stop = True
+                    break
+                batch.append(task)
+            ingest_depth.set(self.queue.qsize())
+            started = time.perf_counter()
+            try:
+                self.send_batch(batch)
+            except Exception as e:
+                print(f"[FastAPI] ❌ STT 작업 {len(batch)}개 전송 실패: {e}")
+            ingest_batch_seconds.observe(time.perf_counter() - started)
+            if stop:
+                return
@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import uuid
+import wave
+import struct
+import asyncio
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+# 오프라인 작업 (/jobs): 업로드한 녹음 파일을 무음 기준 구간으로 나눠 STT 워커들에 병렬로 보내고 구간별 결과를 모음
+#   업로드 → 파일로 바로 저장 (메모리에 전체를 올리지 않음) → 16kHz mono PCM 변환 + 프레임 에너지 계산 (한 번 읽기)
+#   → 무음 구간 가운데에서 자름 (JOB_MIN~MAX_SEGMENT_SECONDS) → JOB_QUEUE로 최대 JOB_MAX_INFLIGHT개씩 전송
+#   → 워커가 구간마다 job:<id>:segments 해시에 결과 기록 (stt_worker / analyzer_worker job_store.py)
+# 작업 상태는 Redis에 있어 어느 파드에서든 조회 가능, 구간 전송은 업로드를 받은 파드가 담당 (파드가 죽으면 작업은 멈춤)
+JOBS_DIR = os.getenv("JOBS_DIR", "/tmp/whisper-jobs")
+JOB_MAX_BYTES = int(os.getenv("JOB_MAX_BYTES", str(2 * 1024 ** 3)))  # 업로드 최대 크기
+JOB_QUEUE = os.getenv("JOB_QUEUE", "stt_job_queue")  # 라이브 stt_queue와 분리 (별도 워커 배포가 -Q stt_job_queue로 소비, 라이브 워커 용량 / 입장 제어와 무관)
+JOB_MAX_INFLIGHT = int(os.getenv("JOB_MAX_INFLIGHT", "32"))  # 작업 하나가 동시에 워커에 맡겨두는 구간 수
+JOB_MIN_SEGMENT_SECONDS = float(os.getenv("JOB_MIN_SEGMENT_SECONDS", "5"))
+JOB_MAX_SEGMENT_SECONDS = float(os.getenv("JOB_MAX_SEGMENT_SECONDS", "25"))  # whisper 30초 창 안쪽
+JOB_MIN_SILENCE_MS = int(os.getenv("JOB_MIN_SILENCE_MS", "400"))  # 이보다 긴 무음에서만 자름
+JOB_STALL_SECONDS = float(os.getenv("JOB_STALL_SECONDS", "600"))  # 이 시간 동안 끝난 구간이 없으면 실패 처리
+JOB_TTL = int(os.getenv("JOB_TTL", "86400"))  # 작업 상태 / 결과 보관 시간
+JOB_AUDIO_TTL = int(os.getenv("JOB_AUDIO_TTL", "3600"))  # 구간 오디오 blob 만료 (라이브 AUDIO_BLOB_TTL보다 길게)
+JOB_KEY_PREFIX = "job:"  # job:<id> 해시 (상태), job:<id>:segments 해시 (구간 번호 → 결과 JSON, 워커가 기록)
+SAMPLE_RATE = 16000
+FRAME = SAMPLE_RATE * 30 // 1000  # 에너지 계산 프레임 (30ms)
+ENERGY_DB, SPEECH_DB, MARGIN_DB = -45.0, -30.0, 10.0  # stt_worker/vad.py 에너지 VAD와 같은 기준
+READ_SECONDS = 10  # 변환 시 한 번에 읽는 길이
+WAV_HEADER_PROBE = 64 * 1024  # 업로드 앞부분에서 WAV fmt 청크를 찾는 범위
+WAVE_FORMAT_PCM = 1  # WAVE_FORMAT_EXTENSIBLE(0xFFFE) / float / 압축 포맷은 미지원
+
+jobs_total = Counter("jobs_total", "오프라인 작업 수 (status: done | failed)", ["status"])
+jobs_active = Gauge("jobs_active", "이 파드에서 구간을 전송 중인 작업 수")
+job_segments_sent = Counter("job_segments_sent_total", "오프라인 작업 구간 전송 수")
+job_audio_seconds = Counter("job_audio_seconds_total", "업로드된 녹음 길이 합계 (초)")
+
+
+class Resampler:  # 블록 단위 선형 보간 리샘플러 (블록 경계에서 위치를 이어감, 음성 인식용이라 저역 필터 생략)
+    def __init__(self, rate: int):
+        self.step = rate / SAMPLE_RATE
+        self.pos = 0.0
+        self.tail = None
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.step == 1:
+            return samples.astype(np.int16)
+        buf = samples.astype(np.float32)
+        if self.tail is not None:
+            buf = np.concatenate(([self.tail], buf))
+        positions = np.arange(self.pos, len(buf) - 1, self.step)
+        out = np.interp(positions, np.arange(len(buf)), buf)
+        self.pos = (positions[-1] + self.step if len(positions) else self.pos) - (len(buf) - 1)
+        self.tail = buf[-1]
+        return np.clip(out, -32768, 32767).astype(np.int16)
+
+
+class AudioFormatError(ValueError):  # 업로드 파일 헤더 오류 (status: 400 깨진 헤더 | 415 미지원 포맷)
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def check_header(head: bytes):
+    # 업로드 앞부분(WAV_HEADER_PROBE)으로 포맷 검사: RIFF가 아니면 raw 16kHz mono s16le로 간주해 통과
+    # open_source / wave 모듈이 읽을 수 있는 16bit PCM WAV만 허용 (작업을 만들기 전에 거절)
+    if head[:4] != b"RIFF":
+        return
+    if len(head) < 12 or head[8:12] != b"WAVE":
+        raise AudioFormatError(400, "RIFF 파일이지만 WAVE 헤더가 아님")
+    pos = 12
+    while pos + 8 <= len(head):
+        chunk_id, size = head[pos:pos + 4], struct.unpack_from("<I", head, pos + 4)[0]
+        if chunk_id == b"fmt ":
+            if size < 16 or pos + 24 > len(head):
+                raise AudioFormatError(400, "WAV fmt 청크가 잘림")
+            format_tag, channels, rate = struct.unpack_from("<HHI", head, pos + 8)
+            bits = struct.unpack_from("<H", head, pos + 22)[0]
+            if format_tag != WAVE_FORMAT_PCM:
+                raise AudioFormatError(415, f"PCM WAV만 지원 (format tag 0x{format_tag:04X})")
+            if bits != 16:
+                raise AudioFormatError(415, f"16bit PCM WAV만 지원 ({bits}bit)")
+            if not channels or not rate:
+                raise AudioFormatError(400, "WAV 채널 수 / 샘플레이트가 0")
+            return
+        if chunk_id == b"data":  # fmt 청크는 data 청크보다 앞에 있어야 함
+            break
+        pos += 8 + size + (size & 1)  # 청크는 2바이트 정렬
+    raise AudioFormatError(400, "WAV fmt 청크 없음")
+
+
+def open_source(path: str):
+    # (닫을 파일, 읽기 함수, 샘플레이트, 채널 수): 16bit PCM WAV, 아니면 raw 16kHz mono s16le로 간주
+    with open(path, "rb") as f:
+        riff = f.read(4) == b"RIFF"
+    if not riff:
+        f = open(path, "rb")
+        return f, (lambda frames: f.read(frames * 2)), SAMPLE_RATE, 1
+    reader = wave.open(path, "rb")
+    if reader.getsampwidth() != 2:
+        reader.close()
+        raise ValueError("16bit PCM WAV만 지원")
+    return reader, reader.readframes, reader.getframerate(), reader.getnchannels()
+
+
+def convert(path: str, pcm_path: str) -> tuple:
+    # 업로드 파일 → 16kHz mono PCM 파일 + 30ms 프레임별 dBFS (READ_SECONDS씩 읽어 메모리 사용량 일정)
+    source, read, rate, channels = open_source(path)
+    resampler = Resampler(rate)
+    levels, carry, samples = [], np.zeros(0, np.int16), 0
+    try:
+        with open(pcm_path, "wb") as out:
+            while True:
+                block = read(rate * READ_SECONDS)
+                if not block:
+                    break
+                audio = np.frombuffer(block[:len(block) // (2 * channels) * 2 * channels], "<i2")
+                if channels > 1:
+                    audio = audio.reshape(-1, channels).mean(axis=1)
+                pcm = resampler.process(audio)
+                out.write(pcm.tobytes())
+                samples += len(pcm)
+                carry = np.concatenate((carry, pcm))
+                n = len(carry) // FRAME
+                frames = carry[:n * FRAME].reshape(n, FRAME).astype(np.float32) / 32768.0
+                levels.append(10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10))
+                carry = carry[n * FRAME:]
+    finally:
+        source.close()
+    return samples, np.concatenate(levels) if levels else np.zeros(0, np.float32)
+
+
+def split(levels: np.ndarray, samples: int) -> list:
+    # 무음 구간 가운데를 절단 후보로, 구간 길이가 MIN~MAX 사이가 되도록 가장 늦은 후보에서 자름
+    # 후보가 없으면 MAX 직전 2초 중 가장 조용한 프레임에서 자름, 음성 프레임이 없는 구간은 버림
+    if not len(levels):
+        return []
+    noise_floor = np.percentile(levels, 10)
+    speech = levels > min(max(ENERGY_DB, noise_floor + MARGIN_DB), SPEECH_DB)
+    edges = np.flatnonzero(np.diff(np.concatenate(([1], speech.astype(np.int8), [1]))))
+    silences = [(start, end) for start, end in zip(edges[::2], edges[1::2])
+                if (end - start) * 30 >= JOB_MIN_SILENCE_MS]
+    cuts = np.array([(start + end) // 2 for start, end in silences], dtype=np.int64)
+    min_frames, max_frames = int(JOB_MIN_SEGMENT_SECONDS * 1000 / 30), int(JOB_MAX_SEGMENT_SECONDS * 1000 / 30)
+    segments, start = [], 0
+    while len(levels) - start > max_frames:
+        window = cuts[(cuts > start + min_frames) & (cuts <= start + max_frames)]
+        if len(window):
+            cut = int(window[-1])
+        else:
+            search = start + max_frames - min(max_frames - min_frames, 2000 // 30)
+            cut = search + int(np.argmin(levels[search:start + max_frames]))
+        segments.append((start, cut))
+        start = cut
+    segments.append((start, len(levels)))
+    return [(begin * FRAME, samples if end == len(levels) else end * FRAME)
+            for begin, end in segments if speech[begin:end].any()]
+
+
+def read_pcm(pcm_path: str, start: int, end: int) -> bytes:
+    with open(pcm_path, "rb") as f:
+        f.seek(start * 2)
+        return f.read((end - start) * 2)
+
+
+class JobRunner:  # 업로드 저장 + 구간 분할 + 전송 (이벤트 루프에서 실행, 파일 I/O / 변환은 스레드)
+    def __init__(self, send_segments):
+        self.send_segments = send_segments  # list[dict] → None, 스레드에서 호출 (오디오 저장 + JOB_QUEUE 전송)
+        self.client = None  # redis.asyncio 클라이언트 (lifespan에서 설정)
+        self.tasks = set()  # 실행 중인 작업 태스크 (GC 방지)
+        os.makedirs(JOBS_DIR, exist_ok=True)
+
+    @staticmethod
+    def key(job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}{job_id}"
+
+    async def update(self, job_id: str, **fields):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(self.key(job_id), mapping={k: str(v) for k, v in fields.items()})
+        pipe.expire(self.key(job_id), JOB_TTL)
+        await pipe.execute()
+
+    async def upload(self, chunks, name: str) -> str:
+        # 요청 본문을 받는 대로 파일에 씀, JOB_MAX_BYTES를 넘으면 ValueError, 미지원 WAV면 AudioFormatError
+        job_id = uuid.uuid4().hex
+        path = os.path.join(JOBS_DIR, f"{job_id}.upload")
+        size = 0
+        head = b""  # 헤더 검사 전까지 모은 앞부분 (검사 후 None)
+        f = await asyncio.to_thread(open, path, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > JOB_MAX_BYTES:
+                    raise ValueError(f"업로드 최대 크기 {JOB_MAX_BYTES} bytes 초과")
+                if head is not None:
+                    head += chunk[:WAV_HEADER_PROBE - len(head)]
+                    if len(head) >= WAV_HEADER_PROBE:
+                        check_header(head)
+                        head = None
+                await asyncio.to_thread(f.write, chunk)
+            if head is not None:  # 업로드가 WAV_HEADER_PROBE보다 짧음
+                check_header(head)
+        except BaseException:
+            f.close()
+            os.remove(path)
+            raise
+        f.close()
+        await self.update(job_id, status="queued", name=name, bytes=size, created=time.time())
+        task = asyncio.create_task(self.run(job_id, path))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return job_id
+
+    async def run(self, job_id: str, path: str):
+        pcm_path = path[:-len(".upload")] + ".pcm"
+        jobs_active.inc()
+        try:
+            await self.update(job_id, status="splitting")
+            samples, levels = await asyncio.to_thread(convert, path, pcm_path)
+            await asyncio.to_thread(os.remove, path)
+            segments = split(levels, samples)
+            job_audio_seconds.inc(samples / SAMPLE_RATE)
+            await self.update(job_id, status="running", duration=samples / SAMPLE_RATE, total=len(segments), sent=0)
+            print(f"[FastAPI] 📼 작업 {job_id}: {samples / SAMPLE_RATE:.0f}s → 구간 {len(segments)}개")
+            await self.dispatch(job_id, pcm_path, segments)
+            await self.wait(job_id, len(segments))
+            await self.update(job_id, status="done", finished=time.time())
+            print(f"[FastAPI] ✅ 작업 {job_id} 완료")
+            jobs_total.labels(status="done").inc()
+        except Exception as e:
+            print(f"[FastAPI] ❌ 작업 {job_id} 실패: {e}")
+            await self.update(job_id, status="failed", error=str(e), finished=time.time())
+            jobs_total.labels(status="failed").inc()
+        finally:
+            jobs_active.dec()
+            for leftover in (path, pcm_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    async def done(self, job_id: str) -> int:
+        return await self.client.hlen(f"{self.key(job_id)}:segments")
+
+    async def dispatch(self, job_id: str, pcm_path: str, segments: list):
+        # 워커에 맡긴 구간이 JOB_MAX_INFLIGHT개 미만이 될 때마다 채워서 보냄 (큐와 오디오 blob이 한꺼번에 쌓이지 않음)
+        sent = 0
+        while sent < len(segments):
+            done = await self.wait(job_id, sent - JOB_MAX_INFLIGHT + 1)
+            room = JOB_MAX_INFLIGHT - (sent - done)
+            batch = []
+            for index in range(sent, min(sent + room, len(segments))):
+                start, end = segments[index]
+                pcm = await asyncio.to_thread(read_pcm, pcm_path, start, end)
+                batch.append({"audio": pcm, "mode": "chunk", "job": {
+                    "id": job_id, "index": index, "start": round(start / SAMPLE_RATE, 2),
+                    "end": round(end / SAMPLE_RATE, 2)}})
+            await asyncio.to_thread(self.send_segments, batch)
+            sent += len(batch)
+            job_segments_sent.inc(len(batch))
+            await self.update(job_id, sent=sent)
+
+    async def wait(self, job_id: str, target: int) -> int:
+        # 끝난 구간이 target개 이상이 될 때까지 대기, JOB_STALL_SECONDS 동안 진행이 없으면 TimeoutError
+        last, progress_at = -1, time.monotonic()
+        while True:
+            done = await self.done(job_id)
+            if done >= target:
+                return done
+            if done != last:
+                last, progress_at = done, time.monotonic()
+            elif time.monotonic() - progress_at > JOB_STALL_SECONDS:
+                raise TimeoutError(f"{JOB_STALL_SECONDS:.0f}s 동안 완료된 구간 없음 ({done}/{target})")
+            await asyncio.sleep(0.2)
+
+    async def status(self, job_id: str):
+        job = await self.client.hgetall(self.key(job_id))
+        if not job:
+            return None
+        total, done = int(job.get("total", 0)), await self.done(job_id)
+        return {"id": job_id, "status": job["status"], "name": job.get("name", ""),
+                "duration": float(job.get("duration", 0)), "total": total, "sent": int(job.get("sent", 0)),
+                "done": done, "progress": done / total if total else 0.0, "error": job.get("error")}
+
+    async def results(self, job_id: str):
+        # 구간 번호 순서로 정렬한 전사 + 감정 분석 결과 (아직 끝나지 않은 구간은 빠짐)
+        job = await self.status(job_id)
+        if job is None:
+            return None
+        segments = await self.client.hgetall(f"{self.key(job_id)}:segments")
+        job["segments"] = sorted((json.loads(v) for v in segments.values()), key=lambda s: s["index"])
+        job["text"] = " ".join(s["text"] for s in job["segments"] if s["text"])
+        return job
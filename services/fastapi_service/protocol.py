@@ -0,0 +1,53 @@
+import json
+
+# WebSocket 메시지 스키마 (브라우저로는 UTF-8 JSON 바이너리 프레임으로 전송)
+#   presence  {"type": "presence", "count": 3}
+#   partial   {"type": "partial", "seq": 7, "text": "안녕하"}           스트리밍 중간 결과 (내 세션만)
+#   transcript{"type": "transcript", "seq": 8, "text": "안녕하세요"}     스트리밍 확정 텍스트 (내 세션만, 음성이 없으면 "")
+#   sentiment {"type": "sentiment", "label": "POSITIVE", "score": 0.93, "text": "...", "ts": 1718000000.0}
+#   stats     {"type": "stats", "positive": 10, "negative": 2, "positive_percent": 83.3, ..., "windows": {...}}
+#   admission {"type": "admission", "decision": "reject", "drain_seconds": 8.2}  STT 혼잡으로 거절/제한 입장 (내 세션만)
+# analyzer_worker / stt_worker 가 Redis에 올리는 메시지도 같은 type 필드를 사용 (session 필드는 라우팅용, 브라우저로는 안 보냄)
+# trace 필드(단계별 타임스탬프)는 tracing.py 히스토그램에만 쓰고 브라우저로는 안 보냄
+MESSAGE_TYPES = ("presence", "partial", "transcript", "sentiment", "stats")
+
+
+def encode(message: dict) -> bytes:
+    # 메시지당 한 번만 직렬화, 같은 bytes 객체를 모든 수신자 전송 큐에 그대로 넣음
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def decode(data) -> dict:
+    # Redis에서 받은 워커 메시지 파싱 (형식이 틀리면 None)
+    try:
+        message = json.loads(data)
+    except (TypeError, ValueError) as e:
+        print(f"[FastAPI] ❌ 메시지 파싱 실패: {e}")
+        return None
+    if not isinstance(message, dict) or message.get("type") not in MESSAGE_TYPES:
+        print(f"[FastAPI] ❌ 알 수 없는 메시지 type: {str(data)[:80]}")
+        return None
+    return message
+
+
+def presence(count: int) -> bytes:
+    return encode({"type": "presence", "count": count})
+
+
+def stream_text(message: dict) -> bytes:
+    # stt_worker partial/transcript → 브라우저 프레임 (세션 id 제외)
+    return encode({"type": message["type"], "seq": message["seq"], "text": message["text"]})
+
+
+def sentiment(message: dict) -> bytes:
+    # analyzer 결과 → 브라우저 프레임 (세션 id 제외)
+    return encode({"type": "sentiment", "label": message["label"], "score": message["score"],
+                   "text": message["text"], "ts": message["ts"]})
+
+
+def stats(snapshot: dict) -> bytes:
+    return encode({"type": "stats", **snapshot})
+
+
+def admission(decision: str, drain_seconds: float) -> bytes:
+    return encode({"type": "admission", "decision": decision, "drain_seconds": round(min(drain_seconds, 3600), 1)})
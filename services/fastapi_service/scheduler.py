@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+from collections import deque
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# STT 작업 스케줄링: stt_queue(FIFO)에 바로 넣지 않고 세션별 큐에 모았다가 처리 대기 작업이 줄어드는 만큼만 내보냄
+# - 공정성: 세션 간 deficit round robin (비용 = 청크 오디오 길이), 혼자 계속 말하거나 청크를 쏟아내는 세션이
+#   다른 세션의 전사를 밀어내지 않음 (세션별 큐가 넘치면 그 세션의 오래된 작업부터 버림)
+# - 만료: 캡처 후 STT_MAX_CHUNK_AGE초가 지난 청크는 늦게 전사하지 않고 버림 (워커도 꺼낼 때 한 번 더 확인)
+# - 입장 제어: 예상 대기열 소진 시간이 목표를 넘으면 새 세션을 거절하거나 낮은 가중치로 받음
+STT_SCHEDULER = os.getenv("STT_SCHEDULER", "fair")  # fair(세션별 DRR) | fifo(기존처럼 바로 전송)
+# 보냈지만 아직 처리되지 않은 STT 작업 상한 (전체 파드 합계, STT 워커 동시 처리 수 합계의 2배 정도)
+# 처리 대기 수는 파드마다 보낸 작업의 ticket(stt:inflight, 작업별 만료)으로 셈 → 유실된 작업은 STT_INFLIGHT_TTL 뒤 크레딧 반환
+SCHED_MAX_INFLIGHT = int(os.getenv("SCHED_MAX_INFLIGHT", "16"))
+# 처리 대기 작업을 소진 속도 × 이 시간(초) 이내로 유지 → 나머지는 세션별 큐에서 공정하게 대기 (0이면 SCHED_MAX_INFLIGHT만 적용)
+SCHED_TARGET_DRAIN_SECONDS = float(os.getenv("SCHED_TARGET_DRAIN_SECONDS", "4"))
+SCHED_MIN_INFLIGHT = 2
+SCHED_QUANTUM_SECONDS = float(os.getenv("SCHED_QUANTUM_SECONDS", "3.0"))  # 세션 차례마다 보낼 수 있는 오디오 길이
+SCHED_SESSION_QUEUE = int(os.getenv("SCHED_SESSION_QUEUE", "8"))  # 세션별 대기 작업 상한
+SCHED_INTERVAL = float(os.getenv("SCHED_INTERVAL", "0.05"))  # 대기 작업 재시도 주기 (초)
+STT_MAX_CHUNK_AGE = float(os.getenv("STT_MAX_CHUNK_AGE", "10"))  # 0이면 만료 없음
+ADMISSION_TARGET_DRAIN_SECONDS = float(os.getenv("ADMISSION_TARGET_DRAIN_SECONDS", "6"))  # 0이면 입장 제어 끔
+ADMISSION_POLICY = os.getenv("ADMISSION_POLICY", "reject")  # reject(연결 거절) | degrade(낮은 가중치로 입장)
+ADMISSION_DEGRADED_WEIGHT = float(os.getenv("ADMISSION_DEGRADED_WEIGHT", "0.5"))
+BYTES_PER_SECOND = 16000 * 2
+
+scheduler_pending = Gauge("stt_scheduler_pending", "세션별 큐에서 전송을 기다리는 STT 작업 수")
+scheduler_sessions = Gauge("stt_scheduler_sessions", "대기 작업이 있는 세션 수")
+scheduler_dropped = Counter("stt_scheduler_dropped_total", "스케줄러가 버린 STT 작업 (reason: stale | overflow)",
+                            ["reason"])
+scheduler_wait_seconds = Histogram(
+    "stt_scheduler_wait_seconds", "세션별 큐 대기 시간 (적재 → 브로커로 전송)",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+admission_decisions = Counter("admission_decisions_total", "새 세션 입장 결정 (accept | degrade | reject)",
+                              ["decision"])
+estimated_drain_seconds = Gauge("stt_estimated_drain_seconds", "현재 STT 대기 작업을 워커가 모두 처리하는 데 걸릴 예상 시간")
+
+
+def task_cost(task: dict) -> float:  # 작업 비용 = 오디오 길이(초)
+    return max(len(task.get("audio") or b"") / BYTES_PER_SECOND, 0.1)
+
+
+def is_stale(task: dict, now: float) -> bool:
+    return STT_MAX_CHUNK_AGE > 0 and now - task["trace"]["capture"] > STT_MAX_CHUNK_AGE
+
+
+class SessionQueue:
+    def __init__(self, weight: float):
+        self.tasks = deque()
+        self.weight = weight
+        self.deficit = 0.0
+        self.in_turn = False  # 이번 차례에 quantum을 이미 받았는지 (크레딧이 떨어져 차례 중간에 멈춘 경우)
+
+
+class FairScheduler:  # 이벤트 루프에서만 사용 (락 없음)
+    def __init__(self, send, backpressure):
+        self.send = send  # task → None (TaskSender.submit, 논블로킹)
+        self.backpressure = backpressure  # 처리 대기 작업 수 / 소진 속도
+        self.queues = {}  # 세션 id → SessionQueue
+        self.weights = {}  # 세션 id → 가중치 (입장 시 결정, 연결 종료 시 삭제)
+        self.active = deque()  # 대기 작업이 있는 세션 (DRR 순서)
+        self.active_set = set()  # active 멤버십 확인용 (deque 탐색은 O(n))
+        self.pending = 0  # 세션별 큐 전체 대기 작업 수
+        self.released = 0  # 마지막 조회 이후 내보낸 작업 수
+        self.refreshed_at = None
+
+    def admit(self) -> tuple:
+        # 새 세션 입장 결정 (decision, 예상 소진 시간): 처리 대기 작업 + 이 파드 세션별 큐를 현재 소진 속도로 처리하는 시간 기준
+        drain = self.backpressure.drain_seconds(self.pending)
+        estimated_drain_seconds.set(min(drain, 1e6))
+        if ADMISSION_TARGET_DRAIN_SECONDS <= 0 or drain <= ADMISSION_TARGET_DRAIN_SECONDS:
+            decision = "accept"
+        else:
+            decision = "degrade" if ADMISSION_POLICY == "degrade" else "reject"
+        admission_decisions.labels(decision=decision).inc()
+        return decision, drain
+
+    def open(self, session_id: str, degraded: bool = False):
+        self.weights[session_id] = ADMISSION_DEGRADED_WEIGHT if degraded else 1.0
+
+    def close(self, session_id: str):
+        self.weights.pop(session_id, None)  # 남은 작업(스트리밍 마지막 final 등)은 그대로 전송
+
+    def submit(self, session_id: str, task: dict):
+        if STT_SCHEDULER != "fair":
+            self.send(task)
+            return
+        queue = self.queues.get(session_id)
+        if queue is None:
+            queue = self.queues[session_id] = SessionQueue(self.weights.get(session_id, 1.0))
+        if len(queue.tasks) >= SCHED_SESSION_QUEUE:  # 넘치면 이 세션의 partial, 없으면 가장 오래된 작업부터 버림
+            victim = next((t for t in queue.tasks if t.get("mode") == "partial"), queue.tasks[0])
+            queue.tasks.remove(victim)
+            self.pending -= 1
+            scheduler_dropped.labels(reason="overflow").inc()
+        queue.tasks.append(task)
+        self.pending += 1
+        if len(queue.tasks) == 1 and session_id not in self.active_set:
+            self.active.append(session_id)
+            self.active_set.add(session_id)
+        self.pump()
+
+    def credit(self) -> int:
+        # 처리 대기 작업이 상한보다 적은 만큼만 전송 (BackPressure가 주기적으로 갱신)
+        if self.backpressure.refreshed_at != self.refreshed_at:
+            self.refreshed_at = self.backpressure.refreshed_at
+            self.released = 0
+        limit = SCHED_MAX_INFLIGHT
+        if SCHED_TARGET_DRAIN_SECONDS > 0 and self.backpressure.rate is not None:  # 워커가 느리면 상한도 낮춤
+            limit = min(limit, max(SCHED_MIN_INFLIGHT, int(self.backpressure.rate * SCHED_TARGET_DRAIN_SECONDS)))
+        return limit - self.backpressure.outstanding - self.released
+
+    def pump(self):
+        # deficit round robin: 세션 차례마다 quantum × 가중치만큼 오디오 길이를 보낼 수 있음
+        budget = self.credit()
+        now = time.time()
+        while budget > 0 and self.active:
+            session_id = self.active[0]
+            queue = self.queues[session_id]
+            while queue.tasks and is_stale(queue.tasks[0], now):
+                queue.tasks.popleft()
+                self.pending -= 1
+                scheduler_dropped.labels(reason="stale").inc()
+            if queue.tasks and not queue.in_turn:
+                queue.deficit += SCHED_QUANTUM_SECONDS * queue.weight
+                queue.in_turn = True
+            while budget > 0 and queue.tasks and task_cost(queue.tasks[0]) <= queue.deficit:
+                task = queue.tasks.popleft()
+                self.pending -= 1
+                queue.deficit -= task_cost(task)
+                budget -= 1
+                self.release(task, now)
+            if queue.tasks and task_cost(queue.tasks[0]) <= queue.deficit:
+                break  # 크레딧 소진: 다음 pump에서 이 세션 차례를 이어서 진행
+            queue.in_turn = False
+            self.active.popleft()
+            if queue.tasks:
+                self.active.append(session_id)
+            else:
+                self.active_set.discard(session_id)
+                del self.queues[session_id]
+        scheduler_pending.set(self.pending)
+        scheduler_sessions.set(len(self.active))
+
+    def release(self, task: dict, now: float):
+        self.released += 1
+        task["trace"]["release"] = now
+        scheduler_wait_seconds.observe(max(0.0, now - task["trace"]["enqueue"]))
+        self.send(task)
+
+    async def run(self):
+        # 백그라운드 태스크: 대기열이 줄어든 만큼 세션별 큐에서 다시 내보냄
+        try:
+            while True:
+                await asyncio.sleep(SCHED_INTERVAL)
+                if self.active:
+                    self.pump()
+        except asyncio.CancelledError:
+            print("[FastAPI] 🔴 STT 스케줄러 종료됨")
@@ -0,0 +1,43 @@
+import os
+import time
+
+# analyzer_worker/stats_store.py 가 집계한 Redis 감정 통계 조회 (모든 fastapi 파드가 같은 값을 봄)
+STATS_TOTAL_KEY = "stats:total"
+STATS_BUCKET_PREFIX = "stats:bucket:"
+STATS_BUCKET_SECONDS = int(os.getenv("STATS_BUCKET_SECONDS", "10"))  # analyzer와 같은 값이어야 함
+STATS_WINDOWS = {"1m": 60, "10m": 600}  # 창 이름 → 길이 (초)
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "1.0"))  # 파드당 Redis 조회는 이 주기에 최대 한 번
+
+
+def summarize(positive: int, negative: int) -> dict:
+    total = positive + negative
+    return {"positive": positive, "negative": negative,
+            "positive_percent": positive / total * 100 if total else 0.0,
+            "negative_percent": negative / total * 100 if total else 0.0}
+
+
+class StatsReader:  # 전체 누적 + 최근 1분/10분 창을 한 번의 파이프라인 왕복으로 읽고 잠시 캐시
+    def __init__(self, client):
+        self.client = client  # redis.asyncio 클라이언트 (decode_responses=True)
+        self.cached = None
+        self.cached_at = 0.0
+
+    async def snapshot(self) -> dict:
+        now = time.monotonic()
+        if self.cached is not None and now - self.cached_at < STATS_CACHE_SECONDS:
+            return self.cached
+        current = int(time.time() // STATS_BUCKET_SECONDS)
+        longest = max(STATS_WINDOWS.values()) // STATS_BUCKET_SECONDS
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hmget(STATS_TOTAL_KEY, "positive", "negative")
+        for offset in range(longest):  # 버킷 수는 창 길이로 고정 (트래픽과 무관)
+            pipe.hmget(f"{STATS_BUCKET_PREFIX}{current - offset}", "positive", "negative")
+        rows = [[int(v or 0) for v in row] for row in await pipe.execute()]
+
+        snapshot = summarize(*rows[0])
+        snapshot["windows"] = {}
+        for name, seconds in STATS_WINDOWS.items():
+            buckets = rows[1:1 + seconds // STATS_BUCKET_SECONDS]
+            snapshot["windows"][name] = summarize(sum(b[0] for b in buckets), sum(b[1] for b in buckets))
+        self.cached, self.cached_at = snapshot, now
+        return snapshot
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+
+import redis
+from prometheus_client import Counter, Gauge
+
+# 파이프라인 전송 방식: celery(기존 리스트 큐 + PUB/SUB) | streams(Redis Streams + 소비자 그룹)
+PIPELINE_TRANSPORT = os.getenv("PIPELINE_TRANSPORT", "celery")
+STT_STREAM = "stream:stt"
+STT_GROUP = "stt_workers"
+RESULT_STREAM = f"stream:results:{socket.gethostname()}"  # 파드별 결과 스트림 (워커가 reply_to로 회신)
+RESULT_GROUP = "fastapi"
+STREAM_MAXLEN = int(os.getenv("STREAM_MAXLEN", "10000"))  # XADD 시 스트림 최대 길이 (근사 트리밍)
+STREAM_BLOCK_MS = int(os.getenv("STREAM_BLOCK_MS", "5000"))
+
+# back-pressure: STT 대기열이 임계값을 넘으면 websocket_endpoint에서 청크를 버리거나 솎아냄
+BACKPRESSURE_LAG = int(os.getenv("BACKPRESSURE_LAG", "50"))  # 처리 대기 중인 STT 작업 수 임계값 (0이면 비활성)
+BACKPRESSURE_POLICY = os.getenv("BACKPRESSURE_POLICY", "downsample")  # drop(전부 버림) | downsample(N개 중 1개만 전송)
+BACKPRESSURE_KEEP_EVERY = int(os.getenv("BACKPRESSURE_KEEP_EVERY", "2"))  # downsample 시 N개 중 1개 전송
+LAG_CHECK_INTERVAL = float(os.getenv("LAG_CHECK_INTERVAL", "0.5"))  # 대기열 길이 조회 주기 (초)
+# 처리 대기 작업 = stt:inflight 정렬 집합: 보낸 작업마다 "<파드>:<id>" 항목(ticket), 점수 = 만료 시각, 워커가 끝내면 ZREM
+# → 브로커 대기열 + 워커가 prefetch로 가져간 작업까지 포함 (LLEN/lag에는 안 잡힘)
+# 유실된 작업(워커 재시작 등)은 그 항목만 STT_INFLIGHT_TTL 뒤 빠짐 (전체 카운터를 한꺼번에 재설정하지 않음)
+STT_INFLIGHT_KEY = "stt:inflight"
+# 워커는 캡처 후 STT_MAX_CHUNK_AGE가 지난 청크를 바로 버리므로 그 시간 + 청크 추론 시간보다 길면 충분
+STT_INFLIGHT_TTL = float(os.getenv("STT_INFLIGHT_TTL", "20"))
+STT_DONE_KEY = "stt:done"  # 모든 STT 워커가 끝낸 작업 수 누적 → 소진 속도
+DRAIN_RATE_SMOOTHING = float(os.getenv("DRAIN_RATE_SMOOTHING", "0.3"))  # 소진 속도 EWMA 가중치
+POD_NAME = socket.gethostname()
+
+stt_queue_lag = Gauge("stt_queue_lag", "STT 처리 대기 작업 수 (streams: lag + pending, celery: LLEN)")
+stt_outstanding = Gauge("stt_outstanding", "STT에 보냈지만 아직 처리되지 않은 작업 수 (stt:inflight, 만료 제외)")
+inflight_expired = Counter("stt_inflight_expired_total", "STT_INFLIGHT_TTL 안에 끝나지 않아 유실로 본 STT 작업 수")
+stt_drain_rate = Gauge("stt_drain_rate", "STT 워커가 처리를 끝내는 작업 수 / 초 (대기 작업이 있을 때만 갱신)")
+backpressure_dropped = Counter("stt_backpressure_dropped_total", "back-pressure로 STT에 보내지 않은 청크 수")
+
+
+class StreamTransport:  # fastapi → stream:stt 생산자 + STT 대기열 길이 조회
+    def __init__(self, redis_url: str):
+        self.redis = redis.Redis.from_url(redis_url)
+
+    def send_stt(self, audio, task: dict):
+        self.send_stt_batch([(audio, task)])
+
+    def send_stt_batch(self, items: list):
+        # items: (audio, task) 목록을 XADD 파이프라인 한 번으로 전송
+        # audio는 AudioStore.put() 결과 (참조 문자열이면 ref, bytes면 audio 필드), None 값은 XADD 불가라 제외
+        pipe = self.redis.pipeline(transaction=False)
+        self.track([task for _, task in items], pipe)
+        for audio, task in items:
+            fields = {("ref" if isinstance(audio, str) else "audio"): audio, "reply_to": RESULT_STREAM}
+            # dict 값(trace)은 JSON 문자열로
+            fields.update({k: json.dumps(v) if isinstance(v, dict) else v for k, v in task.items() if v is not None})
+            pipe.xadd(STT_STREAM, fields, maxlen=STREAM_MAXLEN, approximate=True)
+        pipe.execute()
+
+    def lag(self) -> int:
+        # streams: 그룹이 아직 읽지 않은 항목(lag) + 읽었지만 ACK 안 된 항목(pending)
+        if PIPELINE_TRANSPORT != "streams":
+            return self.redis.llen("stt_queue")
+        try:
+            groups = self.redis.xinfo_groups(STT_STREAM)
+        except redis.ResponseError:  # 스트림이 아직 없음
+            return 0
+        for group in groups:
+            name = group["name"].decode() if isinstance(group["name"], bytes) else group["name"]
+            if name == STT_GROUP:
+                lag = group.get("lag")
+                if lag is None:  # Redis < 7 또는 트리밍으로 계산 불가 → 마지막 전달 id 이후 항목 수 (임계값+1까지만 셈)
+                    last_id = group["last-delivered-id"]
+                    last_id = last_id.decode() if isinstance(last_id, bytes) else last_id
+                    lag = len(self.redis.xrange(STT_STREAM, min=f"({last_id}", count=BACKPRESSURE_LAG + 1))
+                return int(lag) + int(group["pending"])
+        return self.redis.xlen(STT_STREAM)  # 그룹이 아직 없음 (워커가 한 번도 안 뜸) → 전체가 대기 중
+
+    def track(self, tasks: list, pipe=None):
+        # 전송 전에 작업마다 ticket을 붙이고 만료 시각과 함께 처리 대기 집합에 등록 (워커가 끝나면 ticket을 ZREM)
+        deadline = time.time() + STT_INFLIGHT_TTL
+        for task in tasks:
+            task["ticket"] = f"{POD_NAME}:{uuid.uuid4().hex[:16]}"
+        if pipe is not None:
+            pipe.zadd(STT_INFLIGHT_KEY, {task["ticket"]: deadline for task in tasks})
+            return
+        self.redis.zadd(STT_INFLIGHT_KEY, {task["ticket"]: deadline for task in tasks})
+
+    def inflight(self) -> tuple:  # (처리 대기 작업 수, 완료 누적, 이번에 만료시킨 작업 수)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zremrangebyscore(STT_INFLIGHT_KEY, "-inf", time.time())
+        pipe.zcard(STT_INFLIGHT_KEY)
+        pipe.get(STT_DONE_KEY)
+        expired, count, done = pipe.execute()
+        return int(count), int(done or 0), int(expired)
+
+
+class BackPressure:  # 대기열 길이 / 소진 속도를 주기적으로 조회해 청크 전송 여부 결정 (스케줄러 / 입장 제어도 사용)
+    def __init__(self, transport: StreamTransport):
+        self.transport = transport
+        self.lag = 0
+        self.overloaded = False
+        self.outstanding = 0  # 보냈지만 아직 처리되지 않은 작업 수 (전체 파드 합계, 브로커 대기열 lag 이상)
+        self.refreshed_at = None  # 마지막 조회 시각 (monotonic)
+        self.done = None  # 마지막으로 읽은 완료 누적 (stt:done)
+        self.rate = None  # 작업 / 초 (EWMA), 아직 측정 전이면 None
+
+    async def run(self):
+        # 백그라운드 태스크: LAG_CHECK_INTERVAL마다 스레드에서 대기열 길이 조회 (admit은 메모리 값만 읽음)
+        try:
+            while True:
+                await asyncio.to_thread(self.refresh)
+                await asyncio.sleep(LAG_CHECK_INTERVAL)
+        except asyncio.CancelledError:
+            print("[FastAPI] 🔴 back-pressure 조회 종료됨")
+
+    def refresh(self):  # 블로킹 Redis 조회 (이벤트 루프에서 직접 호출하지 않음)
+        try:
+            lag = self.transport.lag()
+            inflight, done, expired = self.transport.inflight()
+        except Exception as e:
+            print(f"[FastAPI] ⚠️ STT 대기열 조회 실패: {e}")
+            return
+        now = time.monotonic()
+        if expired:
+            inflight_expired.inc(expired)
+            print(f"[FastAPI] ♻️ {STT_INFLIGHT_TTL:g}초 안에 끝나지 않은 작업 {expired}개를 유실로 보고 처리 대기에서 제외")
+        if self.done is not None and self.outstanding and done >= self.done:
+            # 처리 대기 작업이 있었던 구간만 소진 속도로 반영 (한가할 때 0으로 내려가지 않게)
+            rate = (done - self.done) / max(now - self.refreshed_at, 1e-3)
+            self.rate = rate if self.rate is None else self.rate + DRAIN_RATE_SMOOTHING * (rate - self.rate)
+            stt_drain_rate.set(self.rate)
+        self.lag, self.done, self.refreshed_at = lag, done, now
+        self.outstanding = max(lag, inflight)
+        stt_queue_lag.set(self.lag)
+        stt_outstanding.set(self.outstanding)
+        overloaded = self.lag > BACKPRESSURE_LAG
+        if overloaded != self.overloaded:
+            print(f"[FastAPI] {'🚦 back-pressure 시작' if overloaded else '🟢 back-pressure 해제'} (대기 {self.lag})")
+        self.overloaded = overloaded
+
+    def drain_seconds(self, pending: int = 0) -> float:
+        # 처리 대기 작업 + 아직 보내지 않은 작업(pending)을 현재 소진 속도로 처리하는 데 걸릴 예상 시간
+        backlog = self.outstanding + pending
+        if not backlog or self.rate is None:  # 대기 작업이 없거나 아직 측정 전
+            return 0.0
+        return backlog / self.rate if self.rate > 0 else float("inf")
+
+    def admit(self, user_state: dict) -> bool:
+        # True면 STT로 전송, False면 이 청크는 버림 (사용자별 카운터로 downsample)
+        if BACKPRESSURE_LAG <= 0 or not self.overloaded:
+            return True
+        user_state["skipped"] = user_state.get("skipped", 0) + 1
+        if BACKPRESSURE_POLICY == "downsample" and user_state["skipped"] % BACKPRESSURE_KEEP_EVERY == 0:
+            return True
+        backpressure_dropped.inc()
+        return False
+
+
+async def ensure_result_group(client):
+    try:
+        await client.xgroup_create(RESULT_STREAM, RESULT_GROUP, id="0", mkstream=True)
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def consume_results(client, handler):
+    # 파드별 결과 스트림 소비: 재시작 전에 읽고 ACK 못 한 항목(pending)부터 처리한 뒤 새 항목 대기
+    while True:
+        try:
+            await ensure_result_group(client)
+            await _consume_results(client, handler)
+        except asyncio.CancelledError:
+            print("[FastAPI] 🔴 결과 스트림 소비 종료됨")
+            return
+        except Exception as e:  # Redis 재시작/연결 끊김: 잠시 후 pending부터 다시 읽음
+            print(f"[FastAPI] ❌ 결과 스트림 읽기 실패: {e}")
+            await asyncio.sleep(1)
+
+
+async def _consume_results(client, handler):
+    start = "0"  # "0"이면 내 pending 항목, ">"면 새 항목
+    while True:
+        response = await client.xreadgroup(RESULT_GROUP, RESULT_GROUP, {RESULT_STREAM: start},
+                                           count=100, block=None if start == "0" else STREAM_BLOCK_MS)
+        entries = [entry for _, stream_entries in response or [] for entry in stream_entries]
+        if start == "0" and not entries:
+            start = ">"
+            continue
+        for entry_id, fields in entries:
+            if fields:  # 트리밍된 pending 항목은 fields가 비어 있음
+                try:
+                    await handler(fields)
+                except Exception as e:
+                    print(f"[FastAPI] ❌ 결과 스트림 처리 실패: {e}")
+            await client.xack(RESULT_STREAM, RESULT_GROUP, entry_id)
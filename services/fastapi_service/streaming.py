@@ -0,0 +1,71 @@
+import os
+import time
+
+# 스트리밍(슬라이딩 윈도우) 전사 설정
+STREAMING_MODE = os.getenv("STREAMING_MODE", "0") == "1"  # 1이면 고정 3초 컷 대신 겹치는 윈도우 + 중간 결과 사용
+STREAM_STEP_SECONDS = float(os.getenv("STREAM_STEP_SECONDS", "1.0"))  # 새 오디오가 이만큼 쌓일 때마다 partial 전사
+STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "5.0"))  # 윈도우가 이 길이에 도달하면 final 확정
+STREAM_OVERLAP_SECONDS = float(os.getenv("STREAM_OVERLAP_SECONDS", "0.5"))  # final 후 다음 윈도우로 넘길 꼬리 오디오
+STREAM_MIN_FLUSH_SECONDS = float(os.getenv("STREAM_MIN_FLUSH_SECONDS", "0.5"))  # 연결 종료 시 이보다 짧으면 버림
+BYTES_PER_SECOND = 16000 * 2  # 16kHz int16 mono
+
+
+class StreamingSession:  # 사용자 한 명의 슬라이딩 윈도우 상태
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.window = bytearray()  # 현재 윈도우 (직전 final의 겹침 구간 포함)
+        self.since_partial = 0  # 마지막 partial 이후 새로 들어온 바이트 수
+        self.seq = 0  # 전송 순번 (늦게 도착한 partial 무시용)
+        self.prompt = ""  # 직전 final 텍스트 → 다음 윈도우 whisper prompt + 겹침 중복 제거 기준
+        self.started_at = None  # 첫 오디오 수신 시각 (time-to-first-text 측정 기준)
+        self.first_text_at = None
+        self.first_text_pending = False
+        self.shown_seq = 0  # 화면에 반영한 마지막 결과 순번
+
+    def _task(self, mode: str, pcm: bytes) -> dict:
+        self.seq += 1
+        return {"audio": pcm, "session_id": self.session_id, "mode": mode, "prompt": self.prompt, "seq": self.seq}
+
+    def feed(self, chunk: bytes) -> list:
+        # 오디오 청크를 누적하고 지금 보내야 할 STT 작업(partial/final) 목록 반환
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        self.window.extend(chunk)
+        self.since_partial += len(chunk)
+        if len(self.window) >= STREAM_WINDOW_SECONDS * BYTES_PER_SECOND:
+            task = self._task("final", bytes(self.window))
+            overlap = int(STREAM_OVERLAP_SECONDS * BYTES_PER_SECOND) & ~1  # int16 경계 유지
+            self.window = bytearray(self.window[-overlap:]) if overlap else bytearray()
+            self.since_partial = 0
+            return [task]
+        if self.since_partial >= STREAM_STEP_SECONDS * BYTES_PER_SECOND:
+            self.since_partial = 0
+            return [self._task("partial", bytes(self.window))]
+        return []
+
+    def flush(self) -> list:
+        # 연결 종료 시 남은 윈도우를 final로 확정
+        if len(self.window) < STREAM_MIN_FLUSH_SECONDS * BYTES_PER_SECOND:
+            return []
+        task = self._task("final", bytes(self.window))
+        self.window = bytearray()
+        return [task]
+
+    def on_text(self, mode: str, text: str, seq: int) -> bool:
+        # stt_worker 결과 반영, 화면에 보여줄 최신 결과면 True (늦게 도착한 partial은 무시)
+        if mode == "partial" and seq < self.shown_seq:
+            return False
+        self.shown_seq = max(self.shown_seq, seq)
+        if mode == "final":  # 빈 final(무음 / 필터링 / 만료)이면 prompt도 비움 (다음 윈도우에 오래된 문맥을 넘기지 않음)
+            self.prompt = text
+        if self.first_text_at is None and text and self.started_at is not None:
+            self.first_text_at = time.monotonic()
+            self.first_text_pending = True
+        return True
+
+    def take_first_text_latency(self):
+        # 첫 텍스트까지 걸린 시간(초)을 세션당 한 번만 반환
+        if not self.first_text_pending:
+            return None
+        self.first_text_pending = False
+        return self.first_text_at - self.started_at
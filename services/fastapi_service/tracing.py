@@ -0,0 +1,47 @@
+import time
+
+from prometheus_client import Histogram
+
+# 파이프라인 추적: 청크마다 단계별 epoch 타임스탬프(trace)를 STT 작업 → analyzer → 결과 메시지로 전달
+#   capture(청크 버퍼 첫 오디오 수신) → enqueue(세션별 큐 적재) → release(스케줄러가 내보냄) → send(브로커 전송)
+#   → stt_start → stt_end → analyzer_start → analyzer_end → publish → deliver(브라우저로 WebSocket 전송 완료)
+# 워커가 다른 노드면 구간 값에 노드 간 시계 차이가 섞임 (NTP 동기화 가정)
+TRACE_STAGES = (
+    ("enqueue", "buffer"),  # 3초 청크/윈도우가 찰 때까지 모은 시간
+    ("release", "schedule"),  # 세션별 큐 대기 (STT_SCHEDULER=fair, 처리 대기 작업이 줄어들 때까지)
+    ("send", "ingest"),  # 전송 스레드 큐 대기 + 오디오 저장
+    ("stt_start", "stt_queue"),  # stt_queue / stream:stt 대기
+    ("stt_end", "stt"),  # 오디오 로드 + VAD + whisper + 필터
+    ("analyzer_start", "analyzer_queue"),
+    ("analyzer_end", "analyzer"),  # DistilBERT 분류 (배치 대기 포함)
+    ("publish", "publish"),
+    ("deliver", "fanout"),  # Redis → 이 파드 → 전송 큐 → send_text 완료 (전송 큐 구간만은 ws_send_latency_seconds)
+)
+
+stage_seconds = Histogram(
+    "pipeline_stage_seconds", "파이프라인 단계별 소요 시간 (trace 타임스탬프 간격)", ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+end_to_end_seconds = Histogram(
+    "pipeline_end_to_end_seconds", "오디오 수신 → 결과 WebSocket 전송 완료까지 전체 지연", ["type"],
+    buckets=(0.25, 0.5, 1, 2, 3, 4, 5, 7.5, 10, 15, 30),
+)
+
+
+def start(captured_at: float) -> dict:
+    return {"capture": captured_at, "enqueue": time.time()}
+
+
+def observe(message: dict):
+    # 결과 메시지의 trace로 구간별 히스토그램 기록 (없는 단계는 건너뛰고 직전 단계 기준으로 계산)
+    # 전송 허브의 writer 태스크가 send_text를 마친 뒤 호출 (broadcast.Connection on_sent) → 그 시각이 deliver
+    trace = message.get("trace")
+    if not isinstance(trace, dict) or "capture" not in trace:
+        return
+    trace["deliver"] = time.time()
+    previous = trace["capture"]
+    for name, stage in TRACE_STAGES:
+        if name in trace:
+            stage_seconds.labels(stage=stage).observe(max(0.0, trace[name] - previous))
+            previous = trace[name]
+    end_to_end_seconds.labels(type=message.get("type", "")).observe(max(0.0, trace["deliver"] - trace["capture"]))
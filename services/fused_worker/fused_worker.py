@@ -0,0 +1,113 @@
+import os  # 환경변수 / 서비스 모듈 경로
+import sys  # stt_worker / analyzer_worker 모듈 import 경로 추가
+import threading  # 감정 분석 단계 동시 실행 상한
+from concurrent.futures import ThreadPoolExecutor  # 감정 분석 단계 전용 스레드
+
+# STT + 감정 분석 단일 프로세스 워커 (선택): stt_queue 작업을 받아 whisper → 반복 필터 → 감정 분석 → 바로 publish
+# analyzer_queue를 거치지 않아 청크마다 브로커 왕복 / 직렬화 한 번과 analyzer 대기열 대기가 빠짐
+# 단계별 실행: STT는 Celery 풀 스레드, 감정 분석은 sentiment_pool 스레드
+#   → 청크 N을 STT 하는 동안 청크 N-1 감정 분석이 동시에 진행
+# stt_worker / analyzer_worker / common 코드를 그대로 import (도커 이미지에도 services/ 아래와 같은 구조로 복사)
+# 줄어드는 건 analyzer 홉뿐: whisper 엔진은 락 하나로 한 번에 한 청크만 디코딩하므로 STT 처리량은 stt_worker와 같음
+#   → concurrency를 늘려도 태스크를 미리 붙잡아 둘 뿐이라 1로 실행 (fastapi의 세션별 공정 스케줄링 / 입장 제어가 그대로 동작)
+#   celery -A fused_worker worker -Q stt_queue --pool=threads --concurrency=1
+#   celery -A fused_worker worker -Q stt_job_queue,analyzer_job_queue --pool=threads --concurrency=1 -n jobs@%h  # 오프라인 작업은 별도 워커
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for service in ("common", "analyzer_worker", "stt_worker"):
+    sys.path.insert(0, os.path.join(SERVICES_DIR, service))
+
+from celery import Celery  # 비동기 작업 처리를 위한 Celery 모듈
+# 모델 선로딩 / 프리워밍 / 메트릭 서버 시작 + 종료 시 남은 감정 분석 마무리
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_ready, worker_shutdown
+import worker_metrics  # 단계별 처리 시간 / 대기열 길이 Prometheus 메트릭 (METRICS_PORT)
+from model_loader import clear_ready, mark_child_ready, mark_ready, prefork_children  # 준비 신호 (두 모델 모두 프리워밍 후)
+import stt_worker  # whisper 엔진 / VAD / 반복 필터 (라이브러리로 import → 자체 시그널 핸들러는 동작 안 함)
+import analyzer_worker  # 감정 분석 백엔드 / 결과 캐시 / publish (위와 같음)
+
+# 감정 분석 단계 스레드 수 (배칭 사용 시 여러 문장이 동시에 제출되어야 배치가 채워짐)
+FUSED_SENTIMENT_THREADS = int(os.getenv(
+    "FUSED_SENTIMENT_THREADS",
+    str(analyzer_worker.ANALYZER_BATCH_MAX_SIZE if analyzer_worker.ANALYZER_BATCHING else 1)))
+
+celery = Celery("fused_worker", broker=f"redis://{stt_worker.REDIS_HOST}:6379/0")
+stt_worker.runtime.configure(celery)  # WORKER_RUNTIME=auto면 whisper 스레드 기준으로 prefork 풀 크기 / prefetch 1
+sentiment_pool = ThreadPoolExecutor(FUSED_SENTIMENT_THREADS, thread_name_prefix="fused-sentiment")
+# 감정 분석 단계에 들어갈 수 있는 문장 수 = 스레드 수 (ThreadPoolExecutor 큐는 무제한이라 따로 제한)
+# 모두 차 있으면 STT 스레드가 빌 때까지 기다림 → 태스크가 끝나지 않으니 브로커에서 다음 청크를 더 가져오지 않음
+sentiment_slots = threading.BoundedSemaphore(FUSED_SENTIMENT_THREADS)
+_prefork_children = 0  # prefork 자식 수 (0이면 이 프로세스에서 직접 프리워밍)
+
+
+def submit_sentiment(*args):
+    sentiment_slots.acquire()
+    try:
+        future = sentiment_pool.submit(analyzer_worker.analyzer_text, *args)
+    except RuntimeError:  # 종료 중 (풀이 이미 shutdown)
+        sentiment_slots.release()
+        raise
+    future.add_done_callback(lambda _: sentiment_slots.release())
+    return future
+
+
+# stt_worker와 같은 태스크 이름/인자 → fastapi 변경 없음 (shared=False: import한 stt_worker 태스크와 섞이지 않음)
+@celery.task(name="stt_worker.transcribe_audio", queue="stt_queue", shared=False)
+def transcribe_audio(audio_bytes, session_id=None, mode="final", prompt=None, seq=0, trace=None, job=None,
+                     ticket=None):
+    try:
+        if job:  # 오프라인 작업 구간 (stt_job_queue): 감정 분석은 라이브 sentiment_pool 대신 작업 전용 대기열로
+            text = stt_worker.transcribe_job_segment(audio_bytes, job)
+            if text is not None:
+                stt_worker.send_job_sentiment(celery, text, job)
+            return
+        print(f"[Fused] 🎧 오디오 청크 수신 ({mode})")
+        trace = worker_metrics.stamp(trace, "stt_start")
+        worker_metrics.observe_queue_wait(trace)
+        text = stt_worker.transcribe_chunk(audio_bytes, mode, prompt, trace, ticket)
+        if text is None:
+            if session_id and mode == "final":  # 빈 확정 결과도 전달 (stt_worker와 동일)
+                stt_worker.publish_stream_text(session_id, mode, seq, "")
+            return
+        trace = worker_metrics.stamp(trace, "stt_end")
+
+        if session_id and mode != "chunk":  # 스트리밍 세션이면 partial/final 텍스트를 해당 세션에 바로 전달
+            stt_worker.publish_stream_text(session_id, mode, seq, text, trace)
+        if mode == "partial":  # 중간 결과는 감정 분석하지 않음
+            return
+        # analyzer_queue 대신 감정 분석 스레드로 넘기고 바로 반환 → 이 스레드는 다음 청크 STT 시작
+        # (analyzer_queue 구간 = sentiment_pool 대기 시간, 결과 publish는 analyzer_worker와 동일)
+        submit_sentiment(text, session_id, trace)
+    finally:
+        stt_worker.release_pcm(audio_bytes, stt_worker.r)  # STT가 끝난 뒤 오디오 삭제 (stt_worker와 동일)
+
+
+@worker_init.connect
+def preload_models(sender=None, **kwargs):  # 부모 프로세스: 풀(자식) 생성 전에 whisper + 감정 분석 모델 로드
+    global _prefork_children
+    clear_ready()
+    _prefork_children = prefork_children(sender)
+    stt_worker.whisper_model.preload()
+    analyzer_worker.sentiment_model.preload()
+
+
+@worker_process_init.connect
+def init_child(**kwargs):  # prefork 자식마다 두 모델 프리워밍 후 준비 보고
+    stt_worker.runtime.after_fork()
+    stt_worker.whisper_model.after_fork()
+    analyzer_worker.sentiment_model.after_fork()
+    mark_child_ready()
+
+
+@worker_ready.connect
+def start_metrics(**kwargs):  # 메트릭 서버는 한 번만, 두 단계의 대기열을 함께 노출
+    worker_metrics.start(stt_worker.r, [("stt_queue", None), ("analyzer_queue", None)])
+    stt_worker.whisper_model.startup(_prefork_children > 0)
+    analyzer_worker.sentiment_model.startup(_prefork_children > 0)
+    mark_ready(_prefork_children)  # prefork면 자식이 모두 프리워밍을 끝낸 뒤 준비 신호
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def drain_sentiment(**kwargs):
+    # 태스크는 감정 분석 제출 후 바로 끝나므로(이미 ack됨) 종료 전에 남은 문장 분석 / publish를 마침
+    print("[Fused] ⏳ 남은 감정 분석 마무리 후 종료")
+    sentiment_pool.shutdown(wait=True)
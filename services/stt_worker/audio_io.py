@@ -0,0 +1,37 @@
+import struct  # WAV 헤더 직접 작성
+
+import numpy as np  # PCM 변환
+
+# 오디오 입력 계층: websocket bytes → (int16 뷰) → float32 엔진 입력까지 전부 메모리에서 처리
+SAMPLE_RATE = 16000
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def pcm16_to_float32(audio: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    # int16 → float32 변환과 [-1, 1] 정규화를 한 번의 벡터 연산으로 처리
+    # (astype 후 나눗셈처럼 중간 float 배열을 두 번 만들지 않음)
+    if audio.dtype == np.float32:
+        return audio
+    return np.multiply(audio, INT16_SCALE, out=out, dtype=np.float32)
+
+
+def float32_to_pcm16(audio: np.ndarray) -> np.ndarray:
+    # 서브프로세스/HTTP 백엔드 전달용 float32 → little-endian int16
+    if audio.dtype == np.int16:
+        return audio
+    scaled = np.multiply(audio, 32768.0, dtype=np.float32)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype("<i2")
+
+
+def wav_header(num_samples: int) -> bytes:
+    # 16kHz mono int16 PCM WAV 헤더 (44 bytes)
+    data_size = num_samples * 2
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, 1,
+                       SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16, b"data", data_size)
+
+
+def wav_bytes(audio: np.ndarray) -> bytes:
+    # 메모리 내 WAV 직렬화 (whisper.cpp server 업로드 / cli stdin 파이프용, 디스크 I/O 없음)
+    pcm = float32_to_pcm16(audio)
+    return wav_header(len(pcm)) + pcm.tobytes()
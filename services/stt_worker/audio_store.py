@@ -0,0 +1,37 @@
+import os  # shm 파일 삭제
+import mmap  # shm 파일을 복사 없이 매핑
+
+import numpy as np  # PCM 배열 뷰 생성
+
+
+# 읽을 때는 지우지 않고 작업이 끝난 뒤 release_pcm으로 삭제
+# → 처리 중 워커가 죽어 Celery 재전달 / Streams XAUTOCLAIM으로 다시 받아도 오디오가 남아 있음 (못 지운 blob은 TTL / sweep으로 정리)
+def load_pcm(payload, redis_client) -> np.ndarray:
+    # Celery 인자 → int16 PCM 배열 (bytes면 기존 inline 방식, 문자열이면 저장소 참조)
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return np.frombuffer(payload, dtype=np.int16)
+    scheme, _, location = payload.partition(":")
+    if scheme == "redis":
+        data = redis_client.get(location)
+        if data is None:
+            raise KeyError(f"오디오 blob 만료 또는 없음: {location}")
+        return np.frombuffer(data, dtype=np.int16)  # 응답 bytes 위에 뷰만 생성 (추가 복사 없음)
+    if scheme == "shm":
+        with open(location, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return np.frombuffer(mapped, dtype=np.int16)
+    raise ValueError(f"알 수 없는 오디오 참조: {payload[:40]}")
+
+
+def release_pcm(payload, redis_client):
+    # 작업 처리가 끝난 뒤 저장소의 오디오 삭제 (inline bytes는 할 일 없음, 매핑은 unlink 후에도 유효)
+    if isinstance(payload, (bytes, bytearray, memoryview)) or not payload:
+        return
+    scheme, _, location = payload.partition(":")
+    try:
+        if scheme == "redis":
+            redis_client.delete(location)
+        elif scheme == "shm":
+            os.remove(location)
+    except Exception as e:
+        print(f"[STT] ⚠️ 오디오 blob 삭제 실패 ({location}): {e}")
@@ -0,0 +1,71 @@
+import os  # 임계값 환경변수
+import re  # 단어 토큰화 (한 번만 수행) / 단어 연속 반복 확인
+from collections import Counter  # 단어 / n-gram 빈도
+from typing import Sequence
+
+# whisper 환각(반복 텍스트) 필터 임계값 — 기본값은 기존 is_repetitive 규칙과 동일
+REPEAT_CHAR_RUN = int(os.getenv("REPEAT_CHAR_RUN", "5"))  # 공백 제외 전체가 같은 문자 N회 이상 (ㅋㅋㅋㅋㅋ, 아 아 아 아 아)
+REPEAT_WORD_RUN = int(os.getenv("REPEAT_WORD_RUN", "5"))  # 같은 단어가 연속 N회 이상 (좋아요 좋아요 ...)
+REPEAT_MIN_COUNT = int(os.getenv("REPEAT_MIN_COUNT", "5"))  # 빈도 규칙: 최소 등장 횟수 (단어/n-gram 공통)
+REPEAT_RATIO = float(os.getenv("REPEAT_RATIO", "0.2"))  # 빈도 규칙: 전체 대비 비율 초과 시 반복으로 판단
+REPEAT_NGRAM_SIZES = tuple(int(n) for n in os.getenv("REPEAT_NGRAM_SIZES", "2,3").split(","))
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class RepetitionFilter:  # 기존 다중 정규식 is_repetitive와 같은 판정을 토큰화 한 번으로 계산 (test_repetition_filter.py로 일치 검사)
+    def __init__(self, char_run: int = REPEAT_CHAR_RUN, word_run: int = REPEAT_WORD_RUN,
+                 min_count: int = REPEAT_MIN_COUNT, ratio: float = REPEAT_RATIO,
+                 ngram_sizes: Sequence[int] = REPEAT_NGRAM_SIZES):
+        self.char_run = char_run
+        self.word_run = word_run
+        self.min_count = min_count
+        self.ratio = ratio
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.word_run_pattern = re.compile(rf"\b(\w+)\b(?: \1){{{max(word_run - 1, 0)},}}")
+
+    def _frequent(self, counts: Counter, total: int) -> bool:
+        # 가장 많이 나온 항목이 min_count회 이상이면서 전체의 ratio를 넘으면 반복
+        if total <= 0 or not counts:
+            return False
+        top = max(counts.values())
+        return top >= self.min_count and top / total > self.ratio
+
+    def _has_word_run(self, tokens: list) -> bool:
+        # 같은 토큰이 word_run회 연속 (마지막은 접두사 일치 허용) — 정규식 매치의 필요조건
+        run, prev = 0, None
+        for token in tokens:
+            if prev is not None and run + 1 >= self.word_run and token.startswith(prev):
+                return True
+            run = run + 1 if token == prev else 1
+            prev = token
+        return False
+
+    def is_repetitive(self, text: str) -> bool:
+        # 1. 문자 반복: 공백을 모두 제거한 텍스트가 한 글자의 반복 (기존 규칙 1 + 3)
+        compact = "".join(text.split())
+        if len(compact) >= self.char_run and compact == compact[0] * len(compact):
+            return True
+
+        tokens = WORD_PATTERN.findall(text)  # \w+ 단어 토큰화는 여기서 한 번만
+        total = len(tokens)
+
+        # 2. 단어 연속 반복: 토큰 순회로 후보를 찾았을 때만 기존 규칙 2 정규식으로 확인
+        #    (반복 사이는 공백 한 칸, 마지막 반복은 접두사만 같아도 됨 — "아 아 아 아 아이" → 반복)
+        if self._has_word_run(tokens) and self.word_run_pattern.search(text):
+            return True
+
+        # 3. 단어 빈도 (전체 단어 수가 min_count 이상일 때만)
+        if total >= self.min_count and self._frequent(Counter(tokens), total):
+            return True
+
+        # 4. n-gram 빈도: 기존과 같이 공백 기준 단어로 묶되, 문자열 join 대신 토큰 튜플을 해시 키로 사용
+        words = text.split()
+        for n in self.ngram_sizes:
+            windows = len(words) - n + 1
+            if windows >= self.min_count and self._frequent(Counter(zip(*(words[i:] for i in range(n)))), windows):
+                return True
+        return False
+
+
+default_filter = RepetitionFilter()
@@ -0,0 +1,56 @@
+import os  # 환경변수 접근
+import sys  # services/common import 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))  # services/common 공용 모듈
+
+import json  # trace 필드 직렬화
+
+import worker_metrics
+from model_loader import mark_ready
+from stream_consumer import STREAM_MAXLEN, reply, run_consumers, text_field
+from stt_worker import r, release_pcm, stream_text_message, transcribe_chunk, whisper_model
+
+# Redis Streams 전송 모드 STT 소비자: stream:stt → whisper → stream:analyzer (+ 파드별 결과 스트림)
+# 실행: python stream_worker.py (Celery 워커 대신)
+STT_STREAM = "stream:stt"
+STT_GROUP = "stt_workers"
+ANALYZER_STREAM = "stream:analyzer"
+
+
+def handle(entries: list):
+    for entry_id, fields in entries:
+        # 오디오는 ref(저장소 참조 문자열) 또는 audio(raw PCM bytes) 필드 중 하나로 전달됨
+        audio = text_field(fields, "ref") or fields.get("audio", b"")
+        try:
+            handle_entry(entry_id, fields, audio)
+        finally:
+            # XACK 전, 처리가 끝난 뒤에만 오디오 삭제 → 도중에 죽으면 XAUTOCLAIM으로 넘겨받은 소비자가 다시 읽음
+            release_pcm(audio, r)
+
+
+def handle_entry(entry_id, fields, audio):
+    session_id = text_field(fields, "session_id")
+    mode = text_field(fields, "mode", "chunk")
+    seq = int(text_field(fields, "seq", "0"))
+    reply_to = text_field(fields, "reply_to")
+    print(f"[STT] 🎧 스트림 오디오 수신 ({mode}, {entry_id})")
+    trace = worker_metrics.stamp(text_field(fields, "trace"), "stt_start")
+    worker_metrics.observe_queue_wait(trace)
+    text = transcribe_chunk(audio, mode, text_field(fields, "prompt") or None, trace, text_field(fields, "ticket"))
+    if text is None:
+        if reply_to and mode == "final":  # 빈 확정 결과도 전달 → 브라우저 중간 결과 줄 정리 + 세션 seq/prompt 갱신
+            reply(r, reply_to, {"kind": "stream", "data": stream_text_message(session_id, mode, seq, "")})
+        return
+    trace = worker_metrics.stamp(trace, "stt_end")
+    if reply_to and mode != "chunk":  # 스트리밍 partial/final 텍스트는 요청한 파드로 바로 전달
+        reply(r, reply_to, {"kind": "stream", "data": stream_text_message(session_id, mode, seq, text, trace)})
+    if mode == "partial":
+        return
+    r.xadd(ANALYZER_STREAM, {"text": text, "session": session_id or "", "reply_to": reply_to or "",
+                             "trace": json.dumps(trace)}, maxlen=STREAM_MAXLEN, approximate=True)
+
+
+if __name__ == "__main__":
+    whisper_model.warm_up()  # 모델 로드 + 더미 추론 후 소비 시작
+    mark_ready()
+    worker_metrics.start(r, [(STT_STREAM, STT_GROUP)])
+    run_consumers(r, STT_STREAM, STT_GROUP, handle, count=1)
@@ -1,17 +1,51 @@
 import os  # 운영체제 환경변수 접근을 위한 모듈
-import re  # 정규표현식 처리 모듈
+import sys  # services/common import 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))  # services/common 공용 모듈
+from worker_runtime import Runtime  # WORKER_RUNTIME=auto: cgroup CPU 할당량으로 프로세스 수 / 프로세스당 스레드 수 결정
+runtime = Runtime(default_threads=2)
+runtime.pin_threads("WHISPER_THREADS")  # numpy / whisper_engine import 전에 스레드 수 고정
+import json  # 스트리밍 중간 결과 publish용 직렬화
+import redis  # 스트리밍 중간/확정 텍스트를 fastapi로 직접 publish
 import numpy as np  # 오디오 데이터를 배열로 처리하기 위한 numpy 모듈
-from scipy.io.wavfile import write  # numpy 배열을 wav 파일로 저장하기 위한 write 함수
 # import whisper as openai_whisper  # OpenAI Whisper 모델 불러오기 whisper.cpp로 전환
 from celery import Celery  # 비동기 작업 처리를 위한 Celery 모듈
-import tempfile  # 임시 파일 생성용 모듈
-from collections import Counter
+from celery.signals import worker_init, worker_process_init, worker_ready  # 모델 선로딩 / 프리워밍 / 메트릭 서버 시작
+from repetition_filter import default_filter  # 단일 패스 반복 텍스트 필터
+from whisper_engine import get_engine  # 워커 상주 whisper.cpp 엔진 (모델은 워커당 한 번만 로드)
+from model_loader import ModelLoader, clear_ready, mark_child_ready, mark_ready, prefork_children  # 모델 1회 로드 + 프리워밍 + 준비 신호
+import vad  # 서버측 VAD (무음/잡음 제거)
+from audio_store import load_pcm, release_pcm  # Celery 메시지의 오디오 참조(redis/shm) → PCM / 처리 후 삭제
+import worker_metrics  # 단계별 처리 시간 / 대기열 길이 Prometheus 메트릭 (METRICS_PORT)
+import job_store  # 오프라인 작업 (/jobs) 구간 결과 기록
+from prometheus_client import Counter  # 처리한 오디오 길이 (부하 테스트 처리량 계산용)
 
 # from collections import deque
 
 # 기본 설정
 REDIS_HOST = os.getenv("REDIS_HOST", "redis" if os.getenv("DOCKER") else "localhost")  # Redis 주소 환경 변수로 설정 (도커 환경 고려)
 celery = Celery("stt_worker", broker=f"redis://{REDIS_HOST}:6379/0")  # Celery 앱 인스턴스 생성 및 Redis 브로커 설정
+runtime.configure(celery)  # auto면 prefork 풀 크기 / prefetch 1
+r = redis.Redis(host=REDIS_HOST, port=6379)  # 스트리밍 결과 publish / 오디오 blob 읽기용 동기 클라이언트
+STT_CHANNEL = "stt_channel"  # 스트리밍 모드 partial/final 텍스트 채널 (세션 id 포함)
+audio_seconds_total = Counter("stt_audio_seconds_total", "STT 워커가 받은 오디오 길이 합계 (VAD 전, 초)")
+
+# 처리를 마친 작업 수 (전체 워커 공용 Redis 카운터) → fastapi가 소진 속도 계산
+# 끝낸 작업의 ticket은 stt:inflight에서 제거 → fastapi가 보낸 작업 중 아직 처리되지 않은 수를 셈
+# (브로커 대기열 길이에는 워커가 prefetch로 미리 가져간 작업이 안 잡힘)
+STT_DONE_KEY = "stt:done"
+STT_INFLIGHT_KEY = "stt:inflight"
+# 오프라인 작업 구간의 감정 분석 대기열: 라이브 analyzer_queue 워커가 아닌 작업 전용 워커가 소비 (라이브 감정 분석 지연 방지)
+ANALYZER_JOB_QUEUE = "analyzer_job_queue"
+# 캡처 후 이 시간(초)이 지난 청크는 전사하지 않고 버림 (늦은 결과보다 다음 청크를 빨리 처리), 0이면 끔
+STT_MAX_CHUNK_AGE = float(os.getenv("STT_MAX_CHUNK_AGE", "10"))
+stale_dropped_total = Counter("stt_stale_dropped_total", "캡처 후 STT_MAX_CHUNK_AGE초가 지나 버린 청크 수")
+
+# whisper 모델은 worker_init(부모 프로세스)에서 로드 → prefork 자식은 가중치를 copy-on-write로 공유
+# 프리워밍: 1초 무음을 한 번 디코딩해 첫 청크에서 생기는 버퍼 할당 / 서버 기동 대기를 작업 수신 전에 끝냄
+# (WHISPER_BACKEND=server 면 prefork 자식들이 부모가 띄운 whisper-server 하나를 함께 사용)
+whisper_model = ModelLoader("whisper", get_engine, prewarm=lambda engine: engine.transcribe(np.zeros(16000, np.int16)))
+_prefork_children = 0  # prefork 자식 수 (0이면 이 프로세스에서 직접 프리워밍)
+_own_worker = False  # 이 모듈의 Celery 앱으로 띄운 워커인지 (worker_init에서 결정, prefork 자식은 fork로 물려받음)
 
 # Whisper 모델 로드 whisper.cpp로 전환
 #model_size = os.getenv("MODEL_SIZE", "tiny")  # Whisper 모델 사이즈 설정 (tiny, base 등)
@@ -26,94 +60,187 @@ celery = Celery("stt_worker", broker=f"redis://{REDIS_HOST}:6379/0")  # Celery 
 # buffer = deque()
 
 
-# 반복 텍스트 필터 함수
+# 반복 텍스트 필터 함수 (whisper 환각 제거)
+# 토큰화 한 번으로 문자/단어 연속 반복, 단어 빈도, 2·3-gram 빈도를 모두 검사 (repetition_filter.py)
+# 예: "ㅋㅋㅋㅋㅋ", "아 아 아 아 아", "좋아요 좋아요 좋아요 좋아요 좋아요", "스튜디오에 도착한 스튜디오에 도착한 ..."
 def is_repetitive(text: str) -> bool:
-    # 1. 문자 반복 검사:
-    # 공백을 제거한 후 같은 문자가 5번 이상 반복되면 반복으로 간주
-    # 예: "ㅋㅋㅋㅋㅋ", "아아아아아"
-    if re.fullmatch(r"(.)\1{4,}", text.replace(" ", "")):
-        return True
-
-    # 2. 단어 반복 검사:
-    # 공백 기준으로 같은 단어가 연속적으로 5회 이상 반복될 경우 필터링
-    # 예: "좋아요 좋아요 좋아요 좋아요 좋아요"
-    if re.search(r"\b(\w+)\b(?: \1){4,}", text):
-        return True
-
-    # 3. 음절 반복 검사:
-    # 같은 음절이 공백 포함 형태로 반복되는 경우 필터링
-    # 예: "아 아 아 아 아"
-    if re.fullmatch(r"(.)\s*(?:\1\s*){4,}", text):
-        return True
-
-    # 4. 단어 빈도 기반 반복 검사:
-    # 문장에서 특정 단어가 전체 단어의 30% 이상, 5회 이상 등장할 경우 필터
-    words = re.findall(r"\b\w+\b", text)
-    total = len(words)
-    if total >= 5:
-        freq = Counter(words)
-        most_common, count = freq.most_common(1)[0]
-        if count / total > 0.2 and count >= 5:
-            return True
-    # 5. n-gram 반복 검사:
-    # 2단어, 3단어씩 묶인 문장이 반복되는 경우 필터링
-    # 예: "스튜디오에 도착한 스튜디오에 도착한 ..."
-    if is_ngram_repetitive(text, n=2):
-        return True
-    if is_ngram_repetitive(text, n=3):
-        return True
-    return False
-
-
-# n-gram 각 문장을 n개씩 조개서 문장 단위로 체크하는 for문과 갯수체크하는 counter로 이뤄어진 O(n)와 nlogn정도
-def is_ngram_repetitive(text: str, n=2) -> bool:
-    words = text.split()  # 공백 기준 단어 분리  # n-gram 단위 반복 필터 함수
-    # n개의 단어를 묶어서 n-gram 리스트 구성, #ex: "스튜디오에 도착한 스튜디오에 도착한" → 3단어 단위 n-gram 반복
-    ngrams = [" ".join(words[i: i + n]) for i in range(len(words) - n + 1)]
-    if not ngrams:
-        return False
-    freq = Counter(ngrams)  # n-gram 빈도 측정 (ex: '스튜디오에 도착한': 8회 등)
-    most_common, count = freq.most_common(1)[0]  # 가장 많이 나온 n-gram 추출 most_common은 리스트형
-    if count >= 5 and count / len(ngrams) > 0.2:  # ({'스튜디오에 도착한': 3, '도착한 후': 1}) 같은 딕셔너리 형태의 튜플로 추출
-        return True  # 전체 n-gram 중 특정 문장이 절반 이상 반복되며 5회 이상 등장하면 필터링
-    return False
-
-
-@celery.task(name="stt_worker.transcribe_audio", queue="stt_queue")  # Celery 태스크 등록: STT 작업 함수
-def transcribe_audio(audio_bytes):  # STT 오디오 처리 함수 정의
-    print("[STT] 🎧 오디오 청크 수신")
-    audio_np = np.frombuffer(audio_bytes, dtype=np.int16)  # 'bytes' 데이터를 numpy int16 배열로 변환
-    with tempfile.NamedTemporaryFile(suffix=".wav") as tmpfile:  # 오디오 데이터를 임시 WAV 파일로 저장
-        write(tmpfile.name, 16000, audio_np.astype(np.int16))  # numpy 배열을 16kHz wav로 저장
+    return default_filter.is_repetitive(text)
+
+
+def merge_overlap(previous: str, current: str, max_words: int = 8) -> str:
+    # 겹치는 윈도우 때문에 직전 final 끝부분이 이번 결과 앞에 다시 나오면 제거
+    # 예: "스튜디오에 도착한" + "도착한 후 촬영을" → "후 촬영을"
+    prev_words = [w.strip(".,?!") for w in previous.split()]
+    cur_words = current.split()
+    cur_norm = [w.strip(".,?!") for w in cur_words]
+    for k in range(min(max_words, len(prev_words), len(cur_words)), 0, -1):
+        if prev_words[-k:] == cur_norm[:k]:
+            return " ".join(cur_words[k:])
+    return current
+
+
+def stream_text_message(session_id: str, mode: str, seq: int, text: str, trace: dict = None) -> str:
+    # partial/transcript 타입 메시지 (fastapi_service/protocol.py 스키마, mode는 윈도우 상태 갱신용)
+    message = {"type": "partial" if mode == "partial" else "transcript", "session": session_id,
+               "mode": mode, "seq": seq, "text": text}
+    if trace:  # 단계별 타임스탬프 (fastapi가 전달 시점에 구간별 히스토그램으로 기록)
+        message["trace"] = worker_metrics.stamp(trace, "publish")
+    return json.dumps(message, ensure_ascii=False)
+
+
+def publish_stream_text(session_id: str, mode: str, seq: int, text: str, trace: dict = None):
+    # 스트리밍 모드: 요청한 세션에게만 전달되도록 세션 id와 함께 publish
+    try:
+        r.publish(STT_CHANNEL, stream_text_message(session_id, mode, seq, text, trace))
+    except Exception as e:
+        print(f"[STT] ❌ {mode} 텍스트 publish 실패: {e}")
+
+
+def transcribe(audio_bytes, mode="final", prompt=None):
+    # 오디오 → 필터링된 텍스트 (Celery 태스크 / Streams 소비자 공용)
+    # audio_bytes: raw PCM bytes 또는 오디오 저장소 참조 문자열 ("redis:audio:..." / "shm:/dev/shm/...")
+    # 전사 결과가 없거나 분석할 가치가 없으면 None 반환
+    try:
+        # 참조면 Redis/shm에서 꺼내고, bytes면 그대로 int16 배열로 변환 (둘 다 추가 복사 없음)
+        with worker_metrics.timed("load"):
+            audio_np = load_pcm(audio_bytes, r)
+    except Exception as e:
+        print(f"[STT] ❌ 오디오 로드 실패: {e}")
+        return None
+    audio_seconds_total.inc(len(audio_np) / 16000)
+    with worker_metrics.timed("vad"):
+        audio_np = vad.trim_silence(audio_np)  # 앞뒤/중간 무음 제거, 음성 구간만 이어붙임
+    if not len(audio_np):  # 잡음/무음뿐인 청크는 whisper 환각 방지를 위해 STT 생략
+        print(f"[STT] 🔇 VAD: 음성 없음 → STT 생략 ({vad.stats.summary()})")
+        return None
+    try:
+        # 상주 엔진에 PCM을 메모리로 바로 전달 (임시 WAV/TXT 파일, ./main 프로세스 생성 없음)
+        # 청크마다 따로 디코딩: whisper.cpp는 한 번의 whisper_full 호출에 오디오 하나만 받고 디코더 문맥을 입력 전체에 이어가므로
+        # 여러 세션 청크를 이어붙여 한 번에 돌리면 한 사용자의 말이 다른 사용자 전사에 섞일 수 있음 (세션 간 배칭 안 함)
+        with worker_metrics.timed("inference"):
+            text = get_engine().transcribe(audio_np, prompt)  # 직전 final 텍스트를 prompt로 넘겨 윈도우 간 문맥 유지
+        if prompt and mode == "final":
+            text = merge_overlap(prompt, text)
+        if not text:  # 공백 결과일 경우 분석 생략
+            print("[STT] ⚠️ 공백 텍스트 → 분석 생략")
+            return None
+        with worker_metrics.timed("filter"):
+            repetitive = is_repetitive(text)
+        if repetitive:  # 반복 텍스트 필터링 적용
+            print(f"[STT] ⚠️ 반복 텍스트 감지 → 분석 생략: {text}")
+            return None
+        print(f"[STT] 🎙️ Whisper STT 결과: {text}")
+    except Exception as e:
+        print(f"[STT] ❌ Whisper 처리 실패: {e}")
+        return None
+    return text
+
+
+def transcribe_chunk(audio_bytes, mode, prompt, trace: dict, ticket: str = None):
+    # stt_start 직후 호출, 오래된 청크면 None
+    try:
+        age = trace["stt_start"] - trace["capture"] if "capture" in trace else 0.0
+        if STT_MAX_CHUNK_AGE > 0 and age > STT_MAX_CHUNK_AGE:
+            print(f"[STT] 🗑️ 오래된 청크 버림 ({age:.1f}s 경과)")
+            stale_dropped_total.inc()
+            return None
+        return transcribe(audio_bytes, mode, prompt)
+    finally:  # 버리거나 실패해도 완료로 셈 (fastapi 쪽 처리 대기 수가 줄어들도록)
         try:
-            # whisper.cpp CLI 실행 방식으로 대체됨
-            command = [
-                './main',  # whisper.cpp 실행 파일
-                '-m', '/app/models/ggml-small.bin',
-                '-f', tmpfile.name,
-                '-l', 'ko',
-                '-otxt'
-            ]
-            subprocess.run(command, check=True)
-            txt_output_path = tmpfile.name.replace('.wav', '.txt')
-            with open(txt_output_path, 'r', encoding='utf-8') as f:
-                text = f.read().strip()
-            os.remove(tmpfile.name)
-            os.remove(txt_output_path)
-            if not text:  # 공백 결과일 경우 분석 생략
-                print("[STT] ⚠️ 공백 텍스트 → 분석 생략")
-                return
-            if is_repetitive(text):  # 반복 텍스트 필터링 적용
-                print(f"[STT] ⚠️ 반복 텍스트 감지 → 분석 생략: {text}")
-                return
-            print(f"[STT] 🎙️ Whisper STT 결과: {text}")
+            pipe = r.pipeline(transaction=False)
+            pipe.incr(STT_DONE_KEY)
+            if ticket:
+                pipe.zrem(STT_INFLIGHT_KEY, ticket)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"[STT] ⚠️ 완료 카운터 갱신 실패: {e}")
+
+
+def transcribe_job_segment(audio_bytes, job: dict):
+    # 오프라인 작업 구간: 만료 검사 / stt:done 집계 없음 (라이브 대기열과 별개), 텍스트가 없으면 여기서 빈 결과 기록
+    # (stt_job_queue는 라이브 stt_queue와 다른 워커 배포가 소비 → 라이브 워커의 대기열 / 입장 제어에 영향 없음)
+    print(f"[STT] 📼 작업 구간 수신 ({job['id']} #{job['index']})")
+    text = transcribe(audio_bytes, "chunk")
+    if text is None:
+        job_store.record_segment(r, job)
+        return None
+    return text
+
+
+def send_job_sentiment(app, text: str, job: dict):
+    # 작업 구간 텍스트 → analyzer_job_queue (결과는 analyzer가 publish 대신 job_store에 기록)
+    try:
+        app.send_task("analyzer_worker.analyzer_text", args=[text], kwargs={"job": job}, queue=ANALYZER_JOB_QUEUE)
+    except Exception as e:
+        print(f"[STT] ❌ 작업 구간 감정 분석 요청 실패: {e}")
+        job_store.record_segment(r, job, text)  # 텍스트만이라도 기록해 작업이 끝나도록
+
+
+# shared=False: fused_worker가 이 모듈을 import해도 같은 이름의 자기 태스크가 이 함수로 덮이지 않음
+@celery.task(name="stt_worker.transcribe_audio", queue="stt_queue", shared=False)  # Celery 태스크 등록: STT 작업 함수
+def transcribe_audio(audio_bytes, session_id=None, mode="final", prompt=None, seq=0, trace=None, job=None,
+                     ticket=None):  # STT 오디오 처리 함수 정의
+    # session_id: 결과를 돌려받을 WebSocket 세션 (analyzer까지 그대로 전달)
+    # mode: "chunk"(일반 3초 청크) | "partial"/"final"(스트리밍 윈도우), prompt/seq는 스트리밍 모드에서만 전달됨
+    # trace: 단계별 타임스탬프 (capture/enqueue/send → stt_start/stt_end 추가 후 analyzer로 전달)
+    # job: 오프라인 작업 구간 {"id", "index", "start", "end"} (stt_job_queue, 결과는 publish 대신 job_store에 기록)
+    # ticket: fastapi가 처리 대기 작업으로 등록한 항목 (끝나면 stt:inflight에서 제거)
+    try:
+        if job:
+            text = transcribe_job_segment(audio_bytes, job)
+            if text is not None:
+                send_job_sentiment(celery, text, job)
+            return
+        print(f"[STT] 🎧 오디오 청크 수신 ({mode})")
+        trace = worker_metrics.stamp(trace, "stt_start")
+        worker_metrics.observe_queue_wait(trace)
+        text = transcribe_chunk(audio_bytes, mode, prompt, trace, ticket)
+        if text is None:
+            if session_id and mode == "final":  # 빈 확정 결과도 전달 → 브라우저 중간 결과 줄 정리 + 세션 seq/prompt 갱신
+                publish_stream_text(session_id, mode, seq, "")
+            return
+        trace = worker_metrics.stamp(trace, "stt_end")
 
-        except Exception as e:
-            print(f"[STT] ❌ Whisper 처리 실패: {e}")
+        if session_id and mode != "chunk":  # 스트리밍 세션이면 partial/final 텍스트를 해당 세션에 바로 전달
+            publish_stream_text(session_id, mode, seq, text, trace)
+        if mode == "partial":  # 중간 결과는 감정 분석하지 않음 (final에서 한 번만 분석)
             return
 
         try:
-            celery.send_task("analyzer_worker.analyzer_text", args=[text], queue="analyzer_queue")
+            celery.send_task("analyzer_worker.analyzer_text", args=[text],
+                             kwargs={"session_id": session_id, "trace": trace}, queue="analyzer_queue")
             print("[STT] ✅ analyzer_worker 호출 완료")  # 분석 결과를 analyzer_worker에게 전달
         except Exception as e:
             print(f"[STT] ❌ analyzer_worker 호출 실패: {e}")
+    finally:
+        # 처리가 끝난 뒤에만 오디오 삭제 (도중에 워커가 죽으면 남아 있어 재전달 시 다시 읽음, 아니면 TTL로 정리)
+        release_pcm(audio_bytes, r)
+
+
+@worker_init.connect
+def preload_model(sender=None, **kwargs):  # 부모 프로세스: 풀(자식) 생성 전에 모델 로드
+    global _prefork_children, _own_worker
+    _own_worker = sender.app is celery  # fused_worker가 라이브러리로 import한 경우엔 아래 핸들러 모두 건너뜀
+    if not _own_worker:
+        return
+    clear_ready()
+    _prefork_children = prefork_children(sender)
+    whisper_model.preload()
+
+
+@worker_process_init.connect
+def init_child(**kwargs):  # prefork 자식마다 프리워밍
+    if not _own_worker:
+        return
+    runtime.after_fork()
+    whisper_model.after_fork()
+    mark_child_ready()
+
+
+@worker_ready.connect
+def start_metrics(**kwargs):  # Celery 워커 기동 시 메트릭 서버 시작 + 프리워밍 후 준비 신호
+    if not _own_worker:
+        return
+    worker_metrics.start(r, [("stt_queue", None)])
+    whisper_model.startup(_prefork_children > 0)
+    mark_ready(_prefork_children)  # prefork면 자식이 모두 프리워밍을 끝낸 뒤 준비 신호
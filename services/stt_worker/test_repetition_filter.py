@@ -0,0 +1,119 @@
+import os
+import re
+import sys
+import random
+from collections import Counter
+
+import pytest
+
+# 단일 패스 RepetitionFilter vs 기존 다중 정규식 is_repetitive 판정 일치 검사
+#   python -m pytest -q test_repetition_filter.py (bench/bench_repetition_filter.py도 같은 코퍼스 / 기존 구현 사용)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from repetition_filter import RepetitionFilter  # noqa: E402
+
+# 회귀 코퍼스: (텍스트, 반복 여부) — stt_worker 주석에 있던 예시 + 정상 문장 + 기존 정규식의 경계 사례
+CORPUS = [
+    ("ㅋㅋㅋㅋㅋ", True),
+    ("아아아아아", True),
+    ("아 아 아 아 아", True),
+    ("좋아요 좋아요 좋아요 좋아요 좋아요", True),
+    ("스튜디오에 도착한 스튜디오에 도착한 스튜디오에 도착한 스튜디오에 도착한 스튜디오에 도착한", True),
+    ("스튜디오에 도착한 후 스튜디오에 도착한 후 스튜디오에 도착한 후 스튜디오에 도착한 후 스튜디오에 도착한 후", True),
+    ("감사합니다 감사합니다 감사합니다 감사합니다 감사합니다 감사합니다", True),
+    ("네 네 네 네 네 네 네", True),
+    ("아 아 아 아 아이", True),  # 마지막 반복은 접두사만 같아도 매치 (기존 정규식 \1 뒤에 \b 없음)
+    ("좋아 좋아 좋아 좋아 좋아요 정말", True),
+    ("ㅋㅋ\nㅋㅋㅋ", True),
+    ("ㅋㅋㅋ", False),
+    ("아아", False),
+    ("네", False),
+    ("감사합니다", False),
+    ("좋아요 좋아요", False),
+    ("아 아 아 아이 아", False),  # 접두사 매치 뒤에는 반복이 이어지지 않음
+    ("네, 네, 네, 네, 네, 오늘 발표 정말 잘 들었습니다 질문 하나 드려도 될까요 다음 주에 다시 뵙겠습니다 감사합니다 안녕히 계세요 또 만나요 고맙습니다 좋은 하루 되세요", False),  # 쉼표로 끊긴 연속 반복은 규칙 2 대상 아님
+    ("스튜디오에 도착한 후 촬영을 시작했습니다", False),
+    ("오늘 발표 정말 잘 들었습니다 질문 하나 드려도 될까요", False),
+    ("저는 이 부분이 조금 아쉬웠는데 다음에는 더 좋아질 것 같아요", False),
+    ("스튜디오에 도착한 스튜디오에 도착한 후 촬영", False),
+    ("", False),
+]
+
+# 무작위 비교용 어휘 / 구분자 (접두사 관계, 문장 부호, 여러 칸 공백 포함)
+FUZZ_WORDS = ["아", "아이", "네", "네요", "좋아", "좋아요", "좋아요.", "감사합니다", "ㅋ", "ㅋㅋ", "후", "스튜디오에", "도착한"]
+FUZZ_SEPARATORS = [" ", " ", " ", "  ", ", ", "\n", ""]
+
+
+# 기존 다중 정규식 구현 (비교 기준, stt_worker.py에서 그대로 옮김)
+def legacy_is_repetitive(text: str) -> bool:
+    # 1. 문자 반복 검사:
+    # 공백을 제거한 후 같은 문자가 5번 이상 반복되면 반복으로 간주
+    # 예: "ㅋㅋㅋㅋㅋ", "아아아아아"
+    if re.fullmatch(r"(.)\1{4,}", text.replace(" ", "")):
+        return True
+
+    # 2. 단어 반복 검사:
+    # 공백 기준으로 같은 단어가 연속적으로 5회 이상 반복될 경우 필터링
+    # 예: "좋아요 좋아요 좋아요 좋아요 좋아요"
+    if re.search(r"\b(\w+)\b(?: \1){4,}", text):
+        return True
+
+    # 3. 음절 반복 검사:
+    # 같은 음절이 공백 포함 형태로 반복되는 경우 필터링
+    # 예: "아 아 아 아 아"
+    if re.fullmatch(r"(.)\s*(?:\1\s*){4,}", text):
+        return True
+
+    # 4. 단어 빈도 기반 반복 검사:
+    # 문장에서 특정 단어가 전체 단어의 30% 이상, 5회 이상 등장할 경우 필터
+    words = re.findall(r"\b\w+\b", text)
+    total = len(words)
+    if total >= 5:
+        freq = Counter(words)
+        most_common, count = freq.most_common(1)[0]
+        if count / total > 0.2 and count >= 5:
+            return True
+    # 5. n-gram 반복 검사:
+    # 2단어, 3단어씩 묶인 문장이 반복되는 경우 필터링
+    # 예: "스튜디오에 도착한 스튜디오에 도착한 ..."
+    if legacy_is_ngram_repetitive(text, n=2):
+        return True
+    if legacy_is_ngram_repetitive(text, n=3):
+        return True
+    return False
+
+
+# n-gram 각 문장을 n개씩 조개서 문장 단위로 체크하는 for문과 갯수체크하는 counter로 이뤄어진 O(n)와 nlogn정도
+def legacy_is_ngram_repetitive(text: str, n=2) -> bool:
+    words = text.split()  # 공백 기준 단어 분리  # n-gram 단위 반복 필터 함수
+    # n개의 단어를 묶어서 n-gram 리스트 구성, #ex: "스튜디오에 도착한 스튜디오에 도착한" → 3단어 단위 n-gram 반복
+    ngrams = [" ".join(words[i: i + n]) for i in range(len(words) - n + 1)]
+    if not ngrams:
+        return False
+    freq = Counter(ngrams)  # n-gram 빈도 측정 (ex: '스튜디오에 도착한': 8회 등)
+    most_common, count = freq.most_common(1)[0]  # 가장 많이 나온 n-gram 추출 most_common은 리스트형
+    if count >= 5 and count / len(ngrams) > 0.2:  # ({'스튜디오에 도착한': 3, '도착한 후': 1}) 같은 딕셔너리 형태의 튜플로 추출
+        return True  # 전체 n-gram 중 특정 문장이 절반 이상 반복되며 5회 이상 등장하면 필터링
+    return False
+
+
+def fuzz_texts(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = [rng.choice(FUZZ_WORDS)]
+        for _ in range(rng.randint(0, 14)):
+            parts += [rng.choice(FUZZ_SEPARATORS), rng.choice(FUZZ_WORDS)]
+        texts.append("".join(parts))
+    return texts
+
+
+@pytest.mark.parametrize("text,expected", CORPUS)
+def test_corpus(text, expected):
+    assert legacy_is_repetitive(text) == expected
+    assert RepetitionFilter().is_repetitive(text) == expected
+
+
+def test_matches_legacy_on_random_texts():
+    engine = RepetitionFilter()
+    mismatches = [text for text in fuzz_texts(5000) if engine.is_repetitive(text) != legacy_is_repetitive(text)]
+    assert not mismatches, mismatches[:10]
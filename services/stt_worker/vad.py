@@ -0,0 +1,131 @@
+import os  # 환경변수 접근을 위한 모듈
+import threading  # 누적 통계 갱신용 락
+from typing import List, Tuple
+
+import numpy as np  # 프레임 단위 에너지 계산
+
+# 서버측 VAD 설정 (브라우저 worklet 에너지 게이트를 통과한 무음/잡음을 STT 전에 한 번 더 제거)
+SAMPLE_RATE = 16000
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+VAD_BACKEND = os.getenv("VAD_BACKEND", "energy")  # energy(numpy) | webrtc(webrtcvad 설치 시)
+VAD_FRAME_MS = 30  # 프레임 길이 (webrtcvad 허용값 10/20/30ms 중 하나)
+VAD_ENERGY_DB = float(os.getenv("VAD_ENERGY_DB", "-45"))  # 이보다 작은 프레임은 항상 무음
+VAD_SPEECH_DB = float(os.getenv("VAD_SPEECH_DB", "-30"))  # 이보다 큰 프레임은 항상 음성
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "10"))  # 청크 내 잡음 바닥 대비 음성 판정 여유
+VAD_WEBRTC_MODE = int(os.getenv("VAD_WEBRTC_MODE", "2"))  # webrtcvad 공격성 (0~3)
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))  # 이보다 짧은 음성 구간은 잡음으로 보고 버림
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "300"))  # 이보다 짧은 무음은 같은 발화로 이어붙임
+VAD_PAD_MS = int(os.getenv("VAD_PAD_MS", "100"))  # 음성 구간 앞뒤 여유 (단어 첫/끝 자음 보존)
+VAD_JOIN_GAP_MS = int(os.getenv("VAD_JOIN_GAP_MS", "200"))  # 분리된 음성 구간을 이어붙일 때 넣는 무음 길이
+
+FRAME = SAMPLE_RATE * VAD_FRAME_MS // 1000
+
+
+def _ms_to_frames(ms: int) -> int:
+    return max(1, ms // VAD_FRAME_MS)
+
+
+def energy_speech_frames(audio: np.ndarray) -> np.ndarray:
+    # 프레임별 RMS(dBFS) 계산 후 청크 잡음 바닥 기준 적응형 임계값으로 음성 프레임 판정
+    n = len(audio) // FRAME
+    frames = audio[:n * FRAME].reshape(n, FRAME).astype(np.float32) / 32768.0
+    db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    noise_floor = np.percentile(db, 10)
+    threshold = min(max(VAD_ENERGY_DB, noise_floor + VAD_MARGIN_DB), VAD_SPEECH_DB)
+    return db > threshold
+
+
+_webrtc = None
+
+
+def webrtc_speech_frames(audio: np.ndarray) -> np.ndarray:
+    global _webrtc
+    if _webrtc is None:
+        import webrtcvad  # 선택 의존성
+        _webrtc = webrtcvad.Vad(VAD_WEBRTC_MODE)
+    n = len(audio) // FRAME
+    pcm = audio[:n * FRAME].astype("<i2", copy=False).tobytes()
+    step = FRAME * 2
+    return np.fromiter((_webrtc.is_speech(pcm[i * step:(i + 1) * step], SAMPLE_RATE) for i in range(n)),
+                       dtype=bool, count=n)
+
+
+def speech_segments(audio: np.ndarray) -> List[Tuple[int, int]]:
+    # 음성 구간 (시작, 끝) 샘플 인덱스 목록 반환 (무음/잡음 뿐이면 빈 리스트)
+    if len(audio) < FRAME:
+        return []
+    if VAD_BACKEND == "webrtc":
+        try:
+            flags = webrtc_speech_frames(audio)
+        except ImportError:
+            flags = energy_speech_frames(audio)
+    else:
+        flags = energy_speech_frames(audio)
+    if not flags.any():
+        return []
+
+    # 음성 프레임의 연속 구간(run) 추출
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], flags.astype(np.int8), [0]))))
+    runs = list(zip(edges[::2], edges[1::2]))
+
+    # 짧은 무음으로 끊긴 구간 병합 → 너무 짧은 구간 제거 → 앞뒤 패딩
+    merged = [list(runs[0])]
+    for start, end in runs[1:]:
+        if start - merged[-1][1] < _ms_to_frames(VAD_MIN_SILENCE_MS):
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    pad = _ms_to_frames(VAD_PAD_MS)
+    segments = []
+    for start, end in merged:
+        if end - start < _ms_to_frames(VAD_MIN_SPEECH_MS):
+            continue
+        segments.append((int(max(0, (start - pad) * FRAME)), int(min(len(audio), (end + pad) * FRAME))))
+    return segments
+
+
+def join_segments(audio: np.ndarray, segments: List[Tuple[int, int]]) -> np.ndarray:
+    # 음성 구간만 짧은 무음 간격으로 이어붙임 (앞뒤/중간 긴 무음 제거)
+    if len(segments) == 1:
+        start, end = segments[0]
+        return audio[start:end]
+    gap = np.zeros(SAMPLE_RATE * VAD_JOIN_GAP_MS // 1000, dtype=audio.dtype)
+    pieces = []
+    for start, end in segments:
+        pieces.extend((audio[start:end], gap))
+    return np.concatenate(pieces[:-1])
+
+
+class VadStats:  # VAD로 걸러낸 오디오 양 누적 통계
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chunks = 0
+        self.skipped_chunks = 0  # 음성이 전혀 없어 STT를 생략한 청크 수
+        self.input_seconds = 0.0
+        self.dropped_seconds = 0.0  # 잘려나간 무음/잡음 길이
+
+    def record(self, input_samples: int, kept_samples: int):
+        with self.lock:
+            self.chunks += 1
+            self.skipped_chunks += kept_samples == 0
+            self.input_seconds += input_samples / SAMPLE_RATE
+            self.dropped_seconds += max(0, input_samples - kept_samples) / SAMPLE_RATE
+
+    def summary(self) -> str:
+        with self.lock:
+            ratio = self.dropped_seconds / self.input_seconds * 100 if self.input_seconds else 0.0
+            return (f"청크 {self.chunks}개 중 {self.skipped_chunks}개 생략, "
+                    f"{self.input_seconds:.1f}s 중 {self.dropped_seconds:.1f}s 제거 ({ratio:.0f}%)")
+
+
+stats = VadStats()
+
+
+def trim_silence(audio: np.ndarray) -> np.ndarray:
+    # VAD 적용 결과 반환 (음성이 없으면 길이 0 배열) + 통계 기록
+    if not VAD_ENABLED:
+        return audio
+    segments = speech_segments(audio)
+    speech = join_segments(audio, segments) if segments else audio[:0]
+    stats.record(len(audio), len(speech))
+    return speech
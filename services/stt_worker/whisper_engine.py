@@ -0,0 +1,213 @@
+import os  # 환경변수 접근을 위한 모듈
+import json  # whisper.cpp server 응답 파싱용
+import time  # 서버 기동 대기용
+import uuid  # multipart boundary 생성용
+import atexit  # 워커 종료 시 서브프로세스 정리
+import socket  # 서버 포트 열림 확인용
+import threading  # 엔진 싱글톤 / 추론 직렬화용 락
+import subprocess  # whisper.cpp server 상주 프로세스 / cli 파이프 실행용
+import http.client  # 상주 서버와 keep-alive HTTP 통신
+from typing import List, NamedTuple, Optional
+
+import numpy as np  # PCM 배열 처리
+from audio_io import SAMPLE_RATE, pcm16_to_float32, wav_bytes  # 메모리 내 PCM 변환 / WAV 직렬화
+
+# whisper.cpp 엔진 설정 (워커당 한 번만 모델 로드)
+MODEL_PATH = os.getenv("MODEL_PATH", "/app/models")  # 모델 저장 경로
+MODEL_SIZE = os.getenv("MODEL_SIZE", "small")  # ggml 모델 사이즈 (tiny, base, small, medium)
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", os.path.join(MODEL_PATH, f"ggml-{MODEL_SIZE}.bin"))
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "pywhispercpp")  # pywhispercpp(인프로세스) | server(상주 서브프로세스) | cli
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "ko")
+WHISPER_THREADS = int(os.getenv("WHISPER_THREADS", "4"))  # whisper.cpp 추론 스레드 수
+WHISPER_CLI_BIN = os.getenv("WHISPER_CLI_BIN", "/app/whisper.cpp/build/bin/whisper-cli")
+WHISPER_SERVER_BIN = os.getenv("WHISPER_SERVER_BIN", "/app/whisper.cpp/build/bin/whisper-server")
+# 0(기본)이면 서버를 띄울 때마다 빈 포트를 골라 씀 → MODEL_PRELOAD=0 prefork 자식마다 서버를 띄워도 포트 충돌 없음
+# (고정 포트는 서버를 하나만 띄우는 구성에서만: 부모 선로딩 / threads·solo 풀 / stream_worker)
+WHISPER_SERVER_PORT = int(os.getenv("WHISPER_SERVER_PORT", "0"))
+WHISPER_SERVER_STARTUP_TIMEOUT = float(os.getenv("WHISPER_SERVER_STARTUP_TIMEOUT", "60"))
+
+
+class Segment(NamedTuple):  # 엔진 공통 결과 단위 (초 단위 타임스탬프 + 텍스트)
+    start: float
+    end: float
+    text: str
+
+
+class PyWhisperCppEngine:  # 인프로세스 whisper.cpp 컨텍스트 (pywhispercpp 바인딩)
+    name = "pywhispercpp"
+    wants_float32 = True  # whisper_full 입력은 float32 PCM
+
+    def __init__(self, model_path: str, language: str, n_threads: int):
+        from pywhispercpp.model import Model  # 선택 의존성이라 백엔드 선택 시에만 import
+
+        self.model = Model(
+            model_path,
+            n_threads=n_threads,
+            language=language,
+            print_progress=False,
+            print_realtime=False,
+            print_timestamps=False,
+        )
+
+    def segments(self, audio: np.ndarray, prompt: Optional[str] = None) -> List[Segment]:
+        params = {"initial_prompt": prompt} if prompt else {}
+        # pywhispercpp의 t0/t1은 10ms 단위 → 초 단위로 변환
+        return [Segment(s.t0 / 100, s.t1 / 100, s.text) for s in self.model.transcribe(audio, **params)]
+
+    def close(self):
+        self.model = None
+
+
+def free_port() -> int:
+    # OS가 고른 빈 로컬 포트 (바로 닫고 whisper-server에 넘김)
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class WhisperServerEngine:  # whisper.cpp server를 워커당 하나 띄워두고 HTTP로 PCM 전달
+    name = "server"
+    wants_float32 = False  # int16 그대로 WAV로 감싸서 전송 (불필요한 float 왕복 변환 없음)
+
+    def __init__(self, model_path: str, language: str, n_threads: int,
+                 binary: str = WHISPER_SERVER_BIN, port: int = WHISPER_SERVER_PORT):
+        self.port = port or free_port()
+        self.command = [
+            binary,
+            "-m", model_path,
+            "-l", language,
+            "-t", str(n_threads),
+            "--host", "127.0.0.1",
+            "--port", str(self.port),
+        ]
+        self.process = None
+        self.conn = None
+        self._start()
+        atexit.register(self.close)
+
+    def _start(self):
+        self.process = subprocess.Popen(self.command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + WHISPER_SERVER_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:  # 모델 로드가 끝나 포트가 열릴 때까지 대기
+            if self.process.poll() is not None:
+                raise RuntimeError(f"whisper.cpp server 종료됨 (code={self.process.returncode})")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise TimeoutError("whisper.cpp server 기동 시간 초과")
+
+    def _ensure_alive(self):
+        if self.process is None or self.process.poll() is not None:  # 서버가 죽었으면 재기동
+            print("[STT] ⚠️ whisper.cpp server 재기동")
+            self.conn = None
+            self._start()
+
+    def _post(self, body: bytes, boundary: str) -> dict:
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+        try:
+            self.conn.request("POST", "/inference", body=body,
+                              headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+            response = self.conn.getresponse()
+            payload = response.read()
+        except (http.client.HTTPException, OSError):
+            self.conn = None  # keep-alive 연결이 끊겼으면 다음 호출에서 새로 연결
+            raise
+        if response.status != 200:
+            raise RuntimeError(f"whisper.cpp server 응답 오류: {response.status} {payload[:200]!r}")
+        return json.loads(payload)
+
+    def segments(self, audio: np.ndarray, prompt: Optional[str] = None) -> List[Segment]:
+        self._ensure_alive()
+        boundary = uuid.uuid4().hex
+        fields = {"response_format": "verbose_json", "temperature": "0.0"}
+        if prompt:
+            fields["prompt"] = prompt
+        parts = [
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode()
+            for key, value in fields.items()
+        ]
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="chunk.wav"\r\n'
+            f"Content-Type: audio/wav\r\n\r\n".encode()
+        )
+        parts.append(wav_bytes(audio))  # 메모리 내 WAV (디스크 I/O 없음)
+        parts.append(f"\r\n--{boundary}--\r\n".encode())
+        result = self._post(b"".join(parts), boundary)
+        segments = result.get("segments")
+        if not segments:  # 세그먼트 정보가 없는 응답이면 전체 구간 하나로 취급
+            return [Segment(0.0, len(audio) / SAMPLE_RATE, result.get("text", ""))]
+        return [Segment(float(s.get("start", 0.0)), float(s.get("end", 0.0)), s.get("text", "")) for s in segments]
+
+    def close(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+class WhisperCliEngine:  # 호환용: 청크마다 whisper-cli 실행, 단 WAV는 stdin 파이프로 전달하고 결과는 stdout으로 받음
+    name = "cli"  # 모델을 매번 다시 로드하므로 바인딩/서버를 쓸 수 없는 환경에서만 사용
+    wants_float32 = False
+
+    def __init__(self, model_path: str, language: str, n_threads: int, binary: str = WHISPER_CLI_BIN):
+        self.command = [binary, "-m", model_path, "-l", language, "-t", str(n_threads), "-nt", "-np", "-f", "-"]
+
+    def segments(self, audio: np.ndarray, prompt: Optional[str] = None) -> List[Segment]:
+        command = self.command + (["--prompt", prompt] if prompt else [])
+        completed = subprocess.run(command, input=wav_bytes(audio), stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, check=True)  # 임시 .wav/.txt 파일 없음
+        text = completed.stdout.decode("utf-8", errors="ignore").strip()
+        return [Segment(0.0, len(audio) / SAMPLE_RATE, text)] if text else []
+
+    def close(self):
+        pass
+
+
+BACKENDS = {
+    PyWhisperCppEngine.name: PyWhisperCppEngine,
+    WhisperServerEngine.name: WhisperServerEngine,
+    WhisperCliEngine.name: WhisperCliEngine,
+}
+
+
+class WhisperEngine:  # 워커 상주 STT 엔진: 백엔드 래핑 + 추론 직렬화
+    def __init__(self, backend: str = WHISPER_BACKEND, model_path: str = WHISPER_MODEL,
+                 language: str = WHISPER_LANGUAGE, n_threads: int = WHISPER_THREADS):
+        if backend not in BACKENDS:
+            raise ValueError(f"지원하지 않는 WHISPER_BACKEND: {backend}")
+        started = time.perf_counter()
+        self.backend = BACKENDS[backend](model_path, language, n_threads)
+        self.lock = threading.Lock()  # whisper 컨텍스트는 스레드 안전하지 않으므로 한 번에 하나만 추론
+        print(f"[STT] 🧠 whisper.cpp 엔진 로드 완료 ({backend}, {time.perf_counter() - started:.2f}s)")
+
+    def segments(self, audio: np.ndarray, prompt: Optional[str] = None) -> List[Segment]:
+        if self.backend.wants_float32:
+            audio = pcm16_to_float32(audio)  # int16 → float32 정규화 (한 번의 벡터 연산)
+        with self.lock:
+            return self.backend.segments(audio, prompt)
+
+    def transcribe(self, audio: np.ndarray, prompt: Optional[str] = None) -> str:
+        return "".join(s.text for s in self.segments(audio, prompt)).strip()
+
+    def close(self):
+        self.backend.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> WhisperEngine:
+    # 워커 프로세스당 한 번만 모델 로드 (첫 호출 시 생성 후 재사용)
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = WhisperEngine()
+    return _engine